@@ -0,0 +1,248 @@
+"""Per-project task aggregates, built once per Tasks snapshot.
+
+The Dashboard KPIs, the status/workload charts and get_project_stats all
+read from this index instead of scanning tasks on every rerun. It is built
+with one groupby pass when a new Tasks generation appears, and cell-level
+saves patch it in place (subtract the old rows, add the new ones) rather
+than rebuilding it. Status counts are keyed by canonical status code (see
+status.py).
+"""
+import threading
+from collections import Counter
+
+import pandas as pd
+
+from status import STATUS_COMPLETED
+
+QUANTITY_COLUMNS = ("Quantity_Total", "Quantity_Done", "Cost")
+
+
+def _number(value):
+    value = pd.to_numeric(value, errors="coerce")
+    return 0.0 if pd.isna(value) else float(value)
+
+
+def _date(value):
+    value = pd.to_datetime(value, errors="coerce")
+    return None if pd.isna(value) else value
+
+
+def _counter_add(counter, key, n):
+    if key is None or (not isinstance(key, str) and pd.isna(key)):
+        return
+    counter[key] += n
+    if counter[key] <= 0:
+        del counter[key]
+
+
+class ProjectAggregate:
+    """Status/owner counts, quantity and cost totals and the date span of one project"""
+
+    def __init__(self):
+        self.task_count = 0
+        self.status_counts = Counter()
+        self.owner_counts = Counter()
+        self.quantity_total = 0.0
+        self.quantity_done = 0.0
+        self.cost = 0.0
+        # Multisets of dates, so min/max survive removing a row
+        self.start_dates = Counter()
+        self.end_dates = Counter()
+
+    @property
+    def min_start(self):
+        return min(self.start_dates) if self.start_dates else None
+
+    @property
+    def max_end(self):
+        return max(self.end_dates) if self.end_dates else None
+
+    @property
+    def progress(self):
+        """Quantity-weighted progress, as in get_project_stats"""
+        return round(self.quantity_done / self.quantity_total * 100, 1) if self.quantity_total > 0 else 0
+
+    def add_row(self, row, sign=1):
+        """Adds (sign=1) or removes (sign=-1) one task row (a dict/Series)"""
+        self.task_count += sign
+        _counter_add(self.status_counts, row.get("Status"), sign)
+        _counter_add(self.owner_counts, row.get("Owner"), sign)
+        self.quantity_total += sign * _number(row.get("Quantity_Total"))
+        self.quantity_done += sign * _number(row.get("Quantity_Done"))
+        self.cost += sign * _number(row.get("Cost"))
+        _counter_add(self.start_dates, _date(row.get("Start_Date")), sign)
+        _counter_add(self.end_dates, _date(row.get("End_Date")), sign)
+
+    def merge(self, other):
+        self.task_count += other.task_count
+        self.status_counts.update(other.status_counts)
+        self.owner_counts.update(other.owner_counts)
+        self.quantity_total += other.quantity_total
+        self.quantity_done += other.quantity_done
+        self.cost += other.cost
+        self.start_dates.update(other.start_dates)
+        self.end_dates.update(other.end_dates)
+        return self
+
+    def status_series(self):
+        return pd.Series(dict(self.status_counts), dtype="int64").sort_values(ascending=False)
+
+    def owner_series(self):
+        return pd.Series(dict(self.owner_counts), dtype="int64").sort_values()
+
+
+def _counts(df, column):
+    """{project: Counter(value -> n)} from one groupby"""
+    out = {}
+    if column not in df.columns:
+        return out
+    # observed=True: categorical columns would otherwise pair every project with
+    # every category (pandas < 3), leaving zero counts for owners it doesn't have
+    for (pid, value), n in df.groupby(["Project_ID", column], sort=False, observed=True).size().items():
+        if n:
+            out.setdefault(pid, Counter())[value] = int(n)
+    return out
+
+
+def _with_status_codes(df, vocab):
+    if vocab is not None and "Status" in df.columns:
+        df = df.assign(Status=vocab.codes(df["Status"]))
+    return df
+
+
+def build_aggregates(tasks_df, vocab=None):
+    """{Project_ID: ProjectAggregate} from a Tasks frame"""
+    if tasks_df.empty or "Project_ID" not in tasks_df.columns:
+        return {}
+    df = _with_status_codes(tasks_df, vocab).copy()
+    for col in QUANTITY_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce") if col in df.columns else 0.0
+    for col in ("Start_Date", "End_Date"):
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+
+    grouped = df.groupby("Project_ID", sort=False, observed=True)
+    sizes = grouped.size()
+    sums = grouped[list(QUANTITY_COLUMNS)].sum()
+    status, owner = _counts(df, "Status"), _counts(df, "Owner")
+    starts, ends = _counts(df, "Start_Date"), _counts(df, "End_Date")
+
+    aggs = {}
+    for pid, n in sizes.items():
+        agg = ProjectAggregate()
+        agg.task_count = int(n)
+        agg.quantity_total = float(sums.at[pid, "Quantity_Total"])
+        agg.quantity_done = float(sums.at[pid, "Quantity_Done"])
+        agg.cost = float(sums.at[pid, "Cost"])
+        agg.status_counts = status.get(pid, Counter())
+        agg.owner_counts = owner.get(pid, Counter())
+        agg.start_dates = starts.get(pid, Counter())
+        agg.end_dates = ends.get(pid, Counter())
+        aggs[pid] = agg
+    return aggs
+
+
+class AggregateStore:
+    """Process-wide aggregate index tagged with the Tasks generation it reflects"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None
+        self.aggregates = {}
+        self.vocab = None
+        self.stats = {"builds": 0, "incremental_updates": 0}
+
+    def get(self, source, vocab=None):
+        """`source("Tasks") -> (generation, df)`; rebuilds only for a new generation"""
+        generation, df = source("Tasks")
+        with self.lock:
+            if generation is not None and generation == self.generation:
+                return self.aggregates
+        aggregates = build_aggregates(df, vocab)
+        with self.lock:
+            self.generation, self.aggregates, self.vocab = generation, aggregates, vocab
+            self.stats["builds"] += 1
+        return aggregates
+
+    def apply_rows(self, from_generation, to_generation, old_rows, new_rows):
+        """Moves the index from one Tasks generation to the next given the rows
+        that changed (as they were, and as they are now)."""
+        with self.lock:
+            if self.generation != from_generation or from_generation is None:
+                return False
+            aggregates = dict(self.aggregates)
+            copied = set()
+            for rows, sign in ((old_rows, -1), (new_rows, 1)):
+                for row in _with_status_codes(rows, self.vocab).to_dict("records"):
+                    pid = row.get("Project_ID")
+                    if pid not in copied:
+                        # Copy before mutating: other sessions may be reading the old one
+                        aggregates[pid] = ProjectAggregate().merge(aggregates.get(pid, ProjectAggregate()))
+                        copied.add(pid)
+                    aggregates[pid].add_row(row, sign)
+            self.aggregates = {pid: agg for pid, agg in aggregates.items() if agg.task_count > 0}
+            self.generation = to_generation
+            self.stats["incremental_updates"] += 1
+            return True
+
+
+def portfolio_aggregate(aggregates, project_ids=None):
+    """Sums per-project aggregates (all projects, or the given ids)"""
+    total = ProjectAggregate()
+    for pid, agg in aggregates.items():
+        if project_ids is None or pid in project_ids:
+            total.merge(agg)
+    return total
+
+
+def portfolio_frame(aggregates, projects_df, today=None):
+    """One row per project (Projects sheet order, then task-only ids) with progress,
+    quantity and cost totals, budget use and days left, all vectorized"""
+    today = pd.Timestamp(today if today is not None else pd.Timestamp.now()).normalize()
+    stats = pd.DataFrame.from_records(
+        [(pid, a.task_count, a.status_counts.get(STATUS_COMPLETED, 0), a.quantity_total,
+          a.quantity_done, a.cost, a.min_start, a.max_end) for pid, a in aggregates.items()],
+        columns=["Project_ID", "task_count", "completed", "quantity_total", "quantity_done",
+                 "cost", "task_start", "task_end"],
+    )
+    stats["Project_ID"] = stats["Project_ID"].astype(object)
+    info = [c for c in ("Project_ID", "Name", "Manager", "Start_Date", "End_Date", "Total_Budget") if c in projects_df.columns]
+    if "Project_ID" in info:
+        projects = projects_df[info].astype({"Project_ID": object})
+        # Projects sheet order, then ids that only appear in Tasks
+        df = pd.concat([
+            projects.merge(stats, on="Project_ID", how="left"),
+            stats[~stats["Project_ID"].isin(projects["Project_ID"])],
+        ], ignore_index=True)
+    else:
+        df = stats
+    for col in ("task_count", "completed", "quantity_total", "quantity_done", "cost"):
+        df[col] = df[col].fillna(0)
+    df = df.astype({"task_count": "int64", "completed": "int64"})
+    for col in ("Name", "Manager"):
+        if col not in df.columns:
+            df[col] = None
+    df["Name"] = df["Name"].fillna(df["Project_ID"])
+    budget = pd.to_numeric(df["Total_Budget"], errors="coerce") if "Total_Budget" in df.columns else pd.Series(float("nan"), index=df.index)
+    df["Total_Budget"] = budget
+    df["progress"] = (df["quantity_done"] / df["quantity_total"].where(df["quantity_total"] > 0) * 100).round(1).fillna(0)
+    df["remaining_quantity"] = df["quantity_total"] - df["quantity_done"]
+    df["budget_used"] = (df["cost"] / budget.where(budget > 0) * 100).round(1)
+    # Planned dates from the Projects sheet, falling back to the task span
+    start = df["Start_Date"] if "Start_Date" in df.columns else pd.Series(pd.NaT, index=df.index)
+    end = df["End_Date"] if "End_Date" in df.columns else pd.Series(pd.NaT, index=df.index)
+    df["start"] = pd.to_datetime(start, errors="coerce").fillna(pd.to_datetime(df["task_start"]))
+    df["end"] = pd.to_datetime(end, errors="coerce").fillna(pd.to_datetime(df["task_end"]))
+    df["days_left"] = (df["end"] - today).dt.days
+    return df[[
+        "Project_ID", "Name", "Manager", "task_count", "completed", "progress",
+        "quantity_total", "quantity_done", "remaining_quantity", "cost", "Total_Budget",
+        "budget_used", "start", "end", "days_left",
+    ]].reset_index(drop=True)
+
+
+_store = AggregateStore()
+
+
+def get_aggregate_store():
+    return _store
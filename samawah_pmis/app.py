@@ -1,12 +1,15 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from data_manager import DataManager
-from datetime import datetime
+from schema import editable
+import gantt
+from schedule import task_key
+import fonts
+from status import STATUS_NOT_STARTED, STATUS_IN_PROGRESS, STATUS_COMPLETED, STATUS_OTHER
+from metrics import get_metrics
 import time
-import base64
-import os
+from datetime import datetime
+from urllib.parse import urlencode
 from streamlit_option_menu import option_menu
 
 # --- Samawah Brand Color Palette ---
@@ -89,48 +92,22 @@ def check_password():
 if not check_password():
     st.stop()
 
-# --- Custom Branded Fonts Loading ---
-def get_base64_font(font_path):
-    with open(font_path, "rb") as f:
-        data = f.read()
-    return base64.b64encode(data).decode()
-
-# Font paths (using relative paths for deployment)
-current_dir = os.path.dirname(os.path.abspath(__file__))
-# The fonts are outside the samawah_pmis folder in the root directory
-fonts_dir = os.path.join(os.path.dirname(current_dir), "fonts")
+# Init phase timings (Settings > performance, startup_profile.py)
+metrics = get_metrics()
 
-# Fallback in case the structure changes during deployment
-if not os.path.exists(fonts_dir):
-    fonts_dir = os.path.join(current_dir, "fonts")
-
-font_bold = os.path.join(fonts_dir, "samawah-bold.ttf")
-font_medium = os.path.join(fonts_dir, "samawah-medium.ttf")
-font_regular = os.path.join(fonts_dir, "samawah-regular.ttf")
+# --- Custom Branded Fonts Loading ---
+# Subset WOFF2 files served from static/fonts when static serving is on, inline base64 otherwise
+# (see fonts.py); the CSS is built once per process either way. A fresh process builds it in
+# the background and paints with Cairo meanwhile.
+fonts_dir, static_fonts_dir = fonts.default_dirs()
 
-try:
-    b64_bold = get_base64_font(font_bold)
-    b64_medium = get_base64_font(font_medium)
-    b64_regular = get_base64_font(font_regular)
-    
-    font_css = f"""
-    @font-face {{
-        font-family: 'SamawahBold';
-        src: url(data:font/ttf;base64,{b64_bold}) format('truetype');
-    }}
-    @font-face {{
-        font-family: 'SamawahMedium';
-        src: url(data:font/ttf;base64,{b64_medium}) format('truetype');
-    }}
-    @font-face {{
-        font-family: 'SamawahRegular';
-        src: url(data:font/ttf;base64,{b64_regular}) format('truetype');
-    }}
-    """
-except Exception as e:
-    # Fallback to Cairo if fonts can't be loaded
-    font_css = "@import url('https://fonts.googleapis.com/css2?family=Cairo:wght@400;600;700&display=swap');"
-    st.error(f"Error loading fonts: {e}")
+with metrics.timer("app_phase_seconds", phase="fonts"):
+    try:
+        font_css = fonts.font_css(fonts_dir, static_fonts_dir, static_serving=st.get_option("server.enableStaticServing"), wait=False)
+    except Exception as e:
+        # Fallback to Cairo if fonts can't be loaded
+        font_css = fonts.FALLBACK_CSS
+        st.error(f"Error loading fonts: {e}")
 
 # --- Brand Identity CSS ---
 st.markdown(f"""
@@ -287,11 +264,61 @@ def kpi_card(title, value, delta=None):
     </div>
     """, unsafe_allow_html=True)
 
+def save_status(job_key):
+    """Shows the background-save state of the last job stored under `job_key`"""
+    job_id = st.session_state.get(job_key)
+    if job_id is None:
+        return
+    status = dm.write_status(job_id)
+    if status == "pending" and dm.write_error(job_id):
+        st.caption("📴 تعذر الوصول إلى Google Sheets - التعديلات محفوظة محلياً وستُزامن عند عودة الاتصال")
+    elif status == "pending":
+        st.caption("⏳ تم الحفظ محلياً - جاري المزامنة مع Google Sheets...")
+    elif status == "committed":
+        st.caption("✅ تمت مزامنة آخر التعديلات")
+        conflicts = dm.write_conflicts(job_id)
+        if conflicts:
+            st.warning(f"⚠️ {len(conflicts)} خلية عُدّلت في Google Sheets من مصدر آخر ولم تُستبدل (انظر الإعدادات)")
+    elif status == "failed":
+        st.error(f"❌ تعذرت مزامنة التعديلات: {dm.write_error(job_id)}")
+
 # ---Data Initialization ---
-with st.spinner('جاري تحميل بيانات المنصة...'):
+VIEWS = ["لوحة التحكم", "مخطط جانت", "المهام", "التحديات", "المستندات", "الاجتماعات", "الإعدادات"]
+# Sheets each view reads, with the columns it queries (None: whole rows / aggregates).
+# Only these are loaded for a view: the Documents tab never parses Tasks.
+VIEW_DATA = {
+    "لوحة التحكم": {"Config": None, "Projects": None, "Tasks": None},
+    "مخطط جانت": {"Config": None, "Projects": None, "Tasks": ['Task_ID', 'Task', 'Sub_Task', 'Owner', 'Status', 'Start_Date', 'End_Date']},
+    "المهام": {"Config": None, "Projects": None, "Tasks": None},
+    "التحديات": {"Projects": None, "Challenges": ['Description', 'Status', 'Risk_Impact']},
+    "المستندات": {"Projects": None, "Documents": ['Name', 'Link_URL']},
+    "الاجتماعات": {"Config": None, "Projects": None, "MeetingRecommendations": None},
+    "الإعدادات": {"Config": None, "Projects": None},
+}
+
+with st.spinner('جاري تحميل بيانات المنصة...'), metrics.timer("app_phase_seconds", phase="data_init"):
     dm = DataManager()
+    # One batched request (Google Sheets mode) for what the last view shown needs;
+    # a different view fetches the rest once it is selected
+    dm.prefetch(tuple(VIEW_DATA.get(st.session_state.get("current_view"), {"Projects": None})))
     projects_df = dm.load_data("Projects")
-    tasks_df = dm.load_data("Tasks")
+
+project_names = dict(zip(projects_df['Project_ID'], projects_df['Name'])) if {'Project_ID', 'Name'} <= set(projects_df.columns) else {}
+
+def go_to(view, project_id=None, task_id=None):
+    """Switches to `view` (and project); a task hit also narrows the task list to its section"""
+    st.session_state["nav_view"] = VIEWS.index(view)
+    st.session_state["project_selector"] = project_names.get(project_id, "📊 كل المشاريع")
+    if task_id is not None:
+        section = dm.query("Tasks", columns=['Task'], Task_ID=task_id)
+        st.session_state["t_section"] = section['Task'].astype(str).tolist()[:1]
+        st.session_state["t_page"] = 1
+
+# Deep links: ?view=<view>&project=<Project_ID>
+if "deep_link_applied" not in st.session_state:
+    st.session_state["deep_link_applied"] = True
+    if st.query_params.get("view") in VIEWS:
+        go_to(st.query_params["view"], st.query_params.get("project"))
 
 # ===== MODERN TOP NAVIGATION BAR =====
 st.markdown("""
@@ -308,7 +335,7 @@ with st.container():
         st.markdown("<div style='padding-top: 15px;'>", unsafe_allow_html=True)
         selected_view = option_menu(
             menu_title=None,
-            options=["لوحة التحكم", "مخطط جانت", "المهام", "التحديات", "المستندات", "الاجتماعات", "الإعدادات"],
+            options=VIEWS,
             icons=["speedometer2", "bar-chart-line", "list-task", "exclamation-triangle", "file-earmark-text", "people", "gear"],
             menu_icon="cast",
             default_index=0,
@@ -330,7 +357,9 @@ with st.container():
                     "color": "white",
                     "font-weight": "600"
                 },
-            }
+            },
+            manual_select=st.session_state.pop("nav_view", None),
+            key="main_nav"
         )
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -366,55 +395,98 @@ with st.container():
 st.session_state.current_project = selected_project
 st.session_state.current_view = selected_view
 
+# Sheets this view reads (already loaded unless the view just changed)
+view_data = VIEW_DATA[selected_view]
+with metrics.timer("app_phase_seconds", phase="view_data"):
+    dm.prefetch(tuple(view_data))
+
+# --- Global search (tasks, challenges, recommendations) ---
+search_text = st.text_input(
+    "بحث", key="global_search", label_visibility="collapsed",
+    placeholder="🔍 ابحث في المهام والتحديات والتوصيات..."
+)
+if search_text.strip():
+    search_start = time.perf_counter()
+    hits = dm.search(search_text, limit=10)
+    st.caption(f"{len(hits)} نتيجة ({(time.perf_counter() - search_start) * 1000:.0f} ms)")
+    hit_icons = {"Tasks": "📋", "Challenges": "⚠️", "MeetingRecommendations": "📅"}
+    for i, hit in enumerate(hits):
+        project_name = project_names.get(hit["project_id"], "")
+        col_hit, col_link = st.columns([5, 1])
+        with col_hit:
+            st.button(
+                f"{hit_icons[hit['sheet']]} {hit['title']}",
+                key=f"search_hit_{i}",
+                on_click=go_to,
+                args=(hit["view"], hit["project_id"], hit["key"] if hit["sheet"] == "Tasks" else None),
+            )
+            st.caption(" · ".join(x for x in (hit["view"], str(project_name), hit["detail"]) if x))
+        with col_link:
+            # Shareable link to the same view/project
+            st.markdown(f"[🔗](?{urlencode({'view': hit['view'], 'project': hit['project_id'] or ''})})")
+
 st.markdown("---")
 
 # === Content Rendering Based on Selected View ===
 
 # Filter data based on selected project
 if selected_project == "📊 كل المشاريع" or "لا توجد بيانات" in selected_project:
-    p_info = projects_df.iloc[0] if (not projects_df.empty and len(projects_df) > 0) else None
+    # Portfolio mode: no single project; the dashboard shows the rollup instead
+    p_info = None
     p_id = None
-    p_tasks = tasks_df.copy() if not tasks_df.empty else pd.DataFrame()
 else:
     if not projects_df.empty and 'Name' in projects_df.columns:
         matching_projects = projects_df[projects_df['Name'] == selected_project]
         if not matching_projects.empty:
             p_info = matching_projects.iloc[0]
             p_id = p_info['Project_ID']
-            p_tasks = tasks_df[tasks_df['Project_ID'] == p_id].copy() if not tasks_df.empty else pd.DataFrame()
         else:
-            p_info, p_id, p_tasks = None, None, pd.DataFrame()
+            p_info, p_id = None, None
     else:
-        p_info, p_id, p_tasks = None, None, pd.DataFrame()
-
-# KPIs Calculation (Based on Task Count, Supporting Arabic/English)
-if not p_tasks.empty:
-    total_tasks = len(p_tasks)
-    # Supporting both "Completed" and "مكتمل"
-    completed_tasks = len(p_tasks[p_tasks['Status'].isin(['Completed', 'مكتمل'])])
-    in_progress_tasks = len(p_tasks[p_tasks['Status'].isin(['In Progress', 'جاري التنفيذ', 'قيد التنفيذ', 'قيد الإنجاز'])])
-    remaining_tasks = total_tasks - completed_tasks
-    progress_pct = round((completed_tasks / total_tasks) * 100, 1) if total_tasks > 0 else 0
-else:
-    total_tasks, completed_tasks, in_progress_tasks, remaining_tasks, progress_pct = 0, 0, 0, 0, 0
+        p_info, p_id = None, None
+
+# KPIs Calculation (status codes are canonical, see status.py), for the views reading Tasks
+status_vocab = dm.status_vocabulary if "Config" in view_data else None
+project_agg, status_counts, portfolio_stats = None, None, None
+total_tasks, completed_tasks, in_progress_tasks, remaining_tasks, progress_pct = 0, 0, 0, 0, 0
+if "Tasks" in view_data:
+    # Precomputed per-project aggregates (whole portfolio when no project is selected)
+    project_agg = dm.project_aggregate(p_id)
+    # Cached figures are rebuilt only when Tasks/Config change (or for other filters)
+    chart_version = dm.snapshot_version("Tasks", "Config")
+    status_counts = project_agg.status_series()
+    total_tasks = project_agg.task_count
+    if total_tasks > 0:
+        completed_tasks = int(status_counts.get(STATUS_COMPLETED, 0))
+        in_progress_tasks = int(status_counts.get(STATUS_IN_PROGRESS, 0))
+        remaining_tasks = total_tasks - completed_tasks
+        progress_pct = round((completed_tasks / total_tasks) * 100, 1) if total_tasks > 0 else 0
+
+    # Per-project rollup (one groupby over Tasks, cached per snapshot)
+    portfolio_stats = dm.get_portfolio_stats() if p_id is None else None
 
 # Date calculation logic
 try:
-    target_date = pd.to_datetime(p_info['End_Date'])
+    # Whole portfolio: the latest project deadline
+    target_date = p_info['End_Date'] if p_info is not None else portfolio_stats['end'].max()
     days_left = (target_date - datetime.now()).days
+    end_label = f"{target_date:%Y-%m-%d}"
 except:
     days_left = 0
+    end_label = "-"
 
 # Display content header
-if p_info is not None:
-    st.markdown(f"### {selected_project}")
+st.markdown(f"### {selected_project}")
     
 st.markdown("<br>", unsafe_allow_html=True)
 
 # === VIEW ROUTING: Display content based on selected navigation option ===
+view_started = time.perf_counter()
 
 # ---- VIEW: لوحة التحكم (Dashboard) ----
 if selected_view == "لوحة التحكم":
+    # Plotly Express is imported on first use: views without charts never load it
+    import plotly.express as px
     # Project Header/Banner
     if p_info is not None:
         p_logo = p_info['Logo_URL'] if 'Logo_URL' in p_info and pd.notna(p_info['Logo_URL']) else None
@@ -443,11 +515,19 @@ if selected_view == "لوحة التحكم":
     
     if p_info is not None:
         with c3: kpi_card("الميزانية التقديرية", f"{int(p_info['Total_Budget']/1000)}k ر.س", "💰 إجمالي")
+    elif not portfolio_stats.empty:
+        portfolio_budget = portfolio_stats['Total_Budget'].sum()
+        portfolio_cost = portfolio_stats['cost'].sum()
+        with c3: kpi_card(
+            "ميزانية المحفظة", f"{int(portfolio_budget/1000)}k ر.س",
+            f"💰 المنصرف {round(portfolio_cost / portfolio_budget * 100, 1) if portfolio_budget > 0 else 0}%"
+        )
+    if p_info is not None or not portfolio_stats.empty:
         with c4: 
             if days_left < 0:
-                kpi_card("الموعد النهائي", "انتهى الموعد", f"📅 {p_info['End_Date']}")
+                kpi_card("الموعد النهائي", "انتهى الموعد", f"📅 {end_label}")
             else:
-                kpi_card("الموعد النهائي", f"باقي {days_left} يوم", f"📅 {p_info['End_Date']}")
+                kpi_card("الموعد النهائي", f"باقي {days_left} يوم", f"📅 {end_label}")
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -457,96 +537,222 @@ if selected_view == "لوحة التحكم":
     
     with col1:
         st.markdown("#### 📊 حالة المهام")
-        if not p_tasks.empty:
-            st_counts = p_tasks['Status'].value_counts().reset_index()
-            st_counts.columns = ['الحالة', 'العدد']
-            fig_st = px.bar(st_counts, x='العدد', y='الحالة', orientation='h', color='الحالة',
-                            color_discrete_map={
-                                "Completed": SAMAWAH_TEAL, "مكتمل": SAMAWAH_TEAL,
-                                "In Progress": SAMAWAH_ORANGE, "جاري التنفيذ": SAMAWAH_ORANGE, "قيد التنفيذ": SAMAWAH_ORANGE,
-                                "Not Started": SAMAWAH_NAVY, "لم يبدأ": SAMAWAH_NAVY
-                            })
-            fig_st.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', showlegend=False)
+        if total_tasks > 0:
+            def build_status_chart():
+                st_counts = status_counts.rename(index=status_vocab.label).reset_index()
+                st_counts.columns = ['الحالة', 'العدد']
+                fig_st = px.bar(st_counts, x='العدد', y='الحالة', orientation='h', color='الحالة',
+                                color_discrete_map=status_vocab.color_map({
+                                    STATUS_COMPLETED: SAMAWAH_TEAL,
+                                    STATUS_IN_PROGRESS: SAMAWAH_ORANGE,
+                                    STATUS_NOT_STARTED: SAMAWAH_NAVY,
+                                    STATUS_OTHER: "#95a5a6",
+                                }))
+                fig_st.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', showlegend=False)
+                return fig_st
+            fig_st = dm.figures.get_or_build(("status", p_id), build_status_chart, versions=chart_version)
             st.plotly_chart(fig_st, use_container_width=True)
     
     with col2:
         st.markdown("#### 👥 أحمال العمل")
-        if not p_tasks.empty:
-            wl = p_tasks.groupby('Owner').size().reset_index(name='count').sort_values('count')
-            fig_wl = px.bar(wl, x='count', y='Owner', orientation='h', color_discrete_sequence=[SAMAWAH_NAVY])
-            fig_wl.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        if total_tasks > 0:
+            def build_workload_chart():
+                wl = project_agg.owner_series().rename_axis('Owner').reset_index(name='count')
+                fig_wl = px.bar(wl, x='count', y='Owner', orientation='h', color_discrete_sequence=[SAMAWAH_NAVY])
+                fig_wl.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+                return fig_wl
+            fig_wl = dm.figures.get_or_build(("workload", p_id), build_workload_chart, versions=chart_version)
             st.plotly_chart(fig_wl, use_container_width=True)
 
+    # Portfolio rollup: every project in one table
+    if p_id is None and not portfolio_stats.empty:
+        st.markdown("---")
+        st.markdown("### 🗂️ ملخص المحفظة")
+        overdue = portfolio_stats[(portfolio_stats['days_left'] < 0) & (portfolio_stats['progress'] < 100)]
+        over_budget = portfolio_stats[portfolio_stats['budget_used'] > 100]
+        r1, r2, r3, r4 = st.columns(4)
+        with r1: kpi_card("المشاريع", f"{len(portfolio_stats)}", f"📁 {int(portfolio_stats['task_count'].sum())} مهمة")
+        with r2: kpi_card("متوسط الإنجاز", f"{round(portfolio_stats['progress'].mean(), 1)}%", "📈 حسب الكميات")
+        with r3: kpi_card("متأخرة", f"{len(overdue)}", "⏰ تجاوزت الموعد")
+        with r4: kpi_card("تجاوزت الميزانية", f"{len(over_budget)}", "💸 التكلفة > الميزانية")
+        
+        st.dataframe(
+            portfolio_stats[['Name', 'Manager', 'progress', 'task_count', 'completed', 'remaining_quantity',
+                             'cost', 'Total_Budget', 'budget_used', 'end', 'days_left']],
+            column_config={
+                "Name": "المشروع",
+                "Manager": "مدير المشروع",
+                "progress": st.column_config.ProgressColumn("نسبة الإنجاز", format="%.1f%%", min_value=0, max_value=100),
+                "task_count": "المهام",
+                "completed": "المكتملة",
+                "remaining_quantity": st.column_config.NumberColumn("الكمية المتبقية", format="%d"),
+                "cost": st.column_config.NumberColumn("التكلفة", format="%d"),
+                "Total_Budget": st.column_config.NumberColumn("الميزانية", format="%d"),
+                "budget_used": st.column_config.NumberColumn("المنصرف %", format="%.1f%%"),
+                "end": st.column_config.DateColumn("الموعد النهائي", format="YYYY-MM-DD"),
+                "days_left": "الأيام المتبقية",
+            },
+            use_container_width=True,
+            hide_index=True,
+        )
+
 # ---- VIEW: مخطط جانت (Gantt) ----
 elif selected_view == "مخطط جانت":
     st.markdown("### 📅 الجدول الزمني")
+    current_status_vals = dm.distinct("Tasks", "Status", Project_ID=p_id)
     
-    if not p_tasks.empty:
-        p_tasks['start'] = pd.to_datetime(p_tasks['Start_Date'])
-        p_tasks['end'] = pd.to_datetime(p_tasks['End_Date'])
-        
+    if current_status_vals:
         col_f1, col_f2, col_f3 = st.columns(3)
         with col_f1: group_by = st.selectbox("عرض حسب", ["المهام", "القسم", "المسؤول"], key="g_group")
         with col_f2: 
-            current_status_vals = p_tasks['Status'].unique().tolist()
-            default_status = [v for v in current_status_vals if v not in ['مكتمل', 'Completed']]
+            default_status = [v for v in current_status_vals if status_vocab.code(v) != STATUS_COMPLETED]
             s_filter = st.multiselect("الحالة", current_status_vals, default=default_status if default_status else current_status_vals, key="g_status")
-        with col_f3: o_filter = st.multiselect("المسؤول", p_tasks['Owner'].unique().tolist(), key="g_owner")
+        with col_f3: o_filter = st.multiselect("المسؤول", dm.distinct("Tasks", "Owner", Project_ID=p_id), key="g_owner")
         
-        filtered_tasks = p_tasks.copy()
-        if s_filter: filtered_tasks = filtered_tasks[filtered_tasks['Status'].isin(s_filter)]
-        if o_filter: filtered_tasks = filtered_tasks[filtered_tasks['Owner'].isin(o_filter)]
+        # Date window: only tasks overlapping it are drawn
+        span_start, span_end = project_agg.min_start, project_agg.max_end
+        if span_start is not None and span_end is not None:
+            window = st.date_input(
+                "الفترة", value=(span_start.date(), span_end.date()),
+                min_value=span_start.date(), max_value=span_end.date(), key="g_window"
+            )
+            window_start, window_end = (window[0], window[-1]) if len(window) else (None, None)
+        else:
+            window_start, window_end = None, None
         
-        y_col = "Sub_Task" if group_by == "المهام" else "Task" if group_by == "القسم" else "Owner"
+        # Critical path from the Depends_On links (see schedule.py), when the sheet has any
+        schedules = [s for pid, s in dm.project_schedules().items() if p_id is None or pid == p_id]
+        has_links = any(s.links for s in schedules)
+        critical_only = False
+        if has_links:
+            task_schedule = dm.task_schedule(p_id)
+            critical_count = int(task_schedule['critical'].sum())
+            critical_only = st.checkbox(f"المسار الحرج فقط ({critical_count} مهمة)", key="g_critical")
+            if p_id is not None and schedules and schedules[0].rank:
+                projected_end = task_schedule['early_finish'].max()
+                planned_end = pd.to_datetime(p_info['End_Date'], errors="coerce") if p_info is not None else pd.NaT
+                delay = (projected_end - planned_end).days if pd.notna(planned_end) else 0
+                st.caption(
+                    f"🏁 النهاية المتوقعة حسب الاعتماديات: {projected_end:%Y-%m-%d}"
+                    + (f" · تأخير {delay} يوم عن الموعد المخطط" if delay > 0 else "")
+                )
+            cycle_tasks = sorted({k for s in schedules for k in s.cycle})
+            if cycle_tasks:
+                st.warning(f"⚠️ اعتماديات دائرية بين المهام ({', '.join(cycle_tasks[:10])}) - لم تُحتسب في المسار الحرج")
         
-        if group_by == "القسم" and not filtered_tasks.empty:
-            dept_agg = filtered_tasks.groupby('Task').agg({
-                'start': 'min', 'end': 'max', 'Status': 'first',
-                'Sub_Task': lambda x: f"({len(x)}) مهام"
-            }).reset_index()
-            dept_agg['Combined_Label'] = dept_agg['Task']
-            display_tasks = dept_agg
-            y_col = "Combined_Label"
-        elif group_by == "المهام":
-            if "Task" in filtered_tasks.columns and "Sub_Task" in filtered_tasks.columns:
-                filtered_tasks['Task_Sub'] = filtered_tasks['Task'].astype(str) + " : " + filtered_tasks['Sub_Task'].astype(str)
-                display_tasks = filtered_tasks
-                y_col = "Task_Sub"
-            else:
-                display_tasks = filtered_tasks
-        else:
-            display_tasks = filtered_tasks
-            y_col = "Owner"
+        level = {"المهام": gantt.LEVEL_TASKS, "القسم": gantt.LEVEL_SECTIONS, "المسؤول": gantt.LEVEL_OWNERS}[group_by]
+        gantt_key = ("gantt", p_id, level, tuple(s_filter), tuple(o_filter), window_start, window_end,
+                     critical_only, has_links and pd.Timestamp.now().normalize())
         
-        if not display_tasks.empty:
-            fig = px.timeline(
-                display_tasks, x_start="start", x_end="end", y=y_col, color="Status",
-                template="plotly_white",
-                color_discrete_map={
-                    "Completed": SAMAWAH_MINT, "مكتمل": SAMAWAH_MINT,
-                    "In Progress": SAMAWAH_TEAL, "جاري التنفيذ": SAMAWAH_TEAL, "قيد التنفيذ": SAMAWAH_TEAL,
-                    "Not Started": "#ecf0f1", "لم يبدأ": "#ecf0f1"
-                }
-            )
-            fig.update_layout(
-                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                margin=dict(l=10, r=10, t=10, b=10),
-                height=max(400, len(filtered_tasks) * 30),
-                yaxis={'categoryorder': 'total ascending', 'title': None},
-                xaxis={'title': None, 'showgrid': True},
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        def build_gantt_lanes():
+            # Filters run as an indexed query; only the matching rows are fetched
+            filtered_tasks = dm.query(
+                "Tasks", columns=view_data["Tasks"],
+                Project_ID=p_id, Status=s_filter or None, Owner=o_filter or None
             )
+            # Dates are datetime64 already (see schema.py)
+            filtered_tasks['start'] = filtered_tasks['Start_Date']
+            filtered_tasks['end'] = filtered_tasks['End_Date']
+            filtered_tasks['status_code'] = status_vocab.codes(filtered_tasks['Status'])
+            if has_links:
+                critical_ids = set(task_schedule.loc[task_schedule['critical'], 'Task_ID'])
+                filtered_tasks['critical'] = filtered_tasks['Task_ID'].map(task_key).isin(critical_ids)
+                if critical_only:
+                    filtered_tasks = filtered_tasks[filtered_tasks['critical']]
+            visible_tasks = gantt.clip_window(filtered_tasks, window_start, window_end)
+            lanes, shown_level = gantt.build_lanes(visible_tasks, level)
+            return lanes, shown_level, len(visible_tasks)
+        
+        lanes, shown_level, visible_count = dm.results.get_or_build(gantt_key, build_gantt_lanes, versions=chart_version)
+        if shown_level == gantt.LEVEL_SECTIONS and level != shown_level:
+            st.caption(f"ℹ️ عدد المهام ({visible_count}) كبير، تم التجميع حسب القسم. ضيّق الفترة أو الفلاتر لعرض المهام.")
+        elif shown_level == gantt.LEVEL_OWNER_SPANS:
+            st.caption(f"ℹ️ عدد المهام ({visible_count}) كبير، يُعرض شريط واحد لكل مسؤول. ضيّق الفترة أو الفلاتر لعرض المهام.")
+        
+        if not lanes.empty:
+            pages = gantt.page_count(lanes)
+            # A page left over from a wider filter may be past the end now
+            if st.session_state.get("g_page", 1) > pages:
+                st.session_state["g_page"] = pages
+            page = st.number_input(f"الصفحة (من {pages})", min_value=1, max_value=pages, value=1, key="g_page") if pages > 1 else 1
+            page = min(max(1, int(page)), pages)
+            
+            def build_gantt_chart():
+                fig = gantt.gantt_figure(
+                    gantt.lane_page(lanes, page),
+                    colors={
+                        STATUS_COMPLETED: SAMAWAH_MINT,
+                        STATUS_IN_PROGRESS: SAMAWAH_TEAL,
+                        STATUS_NOT_STARTED: "#ecf0f1",
+                    },
+                    labels={code: status_vocab.label(code) for code in (STATUS_NOT_STARTED, STATUS_IN_PROGRESS, STATUS_COMPLETED, STATUS_OTHER)},
+                    critical_label="على المسار الحرج",
+                )
+                fig.update_layout(
+                    paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                    margin=dict(l=10, r=10, t=10, b=10),
+                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+                )
+                return fig
+            
+            fig = dm.figures.get_or_build(gantt_key + (page,), build_gantt_chart, versions=chart_version)
             st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("لا توجد مهام في الفترة المحددة.")
     else:
         st.info("لا توجد مهام لعرضها.")
 
 # ---- VIEW: المهام (Tasks) ----
 elif selected_view == "المهام":
     st.markdown("### 📋 قائمة المهام")
+    cols_to_show = ['Task', 'Owner', 'Status', 'Start_Date', 'End_Date', 'Sub_Task']
     
-    if not p_tasks.empty:
-        cols_to_show = ['Task', 'Owner', 'Status', 'Start_Date', 'End_Date', 'Sub_Task']
-        display_df = p_tasks[cols_to_show].copy()
+    # Filters and sorting run in the query backend; only the current page reaches the browser
+    col_f1, col_f2, col_f3 = st.columns(3)
+    with col_f1: t_section = st.multiselect("القسم", dm.distinct("Tasks", "Task", Project_ID=p_id), key="t_section")
+    with col_f2: t_owner = st.multiselect("المسؤول", dm.distinct("Tasks", "Owner", Project_ID=p_id), key="t_owner")
+    with col_f3: t_status = st.multiselect("الحالة", dm.distinct("Tasks", "Status", Project_ID=p_id), key="t_status")
+    
+    sort_columns = {"التسليم": "End_Date", "البدء": "Start_Date", "القسم": "Task", "المسؤول": "Owner", "الحالة": "Status"}
+    col_f4, col_f5, col_f6 = st.columns(3)
+    with col_f4:
+        use_due_window = st.checkbox("تحديد فترة التسليم", key="t_due_on")
+        due_window = st.date_input("فترة التسليم", value=(), key="t_due") if use_due_window else ()
+    with col_f5:
+        sort_label = st.selectbox("ترتيب حسب", list(sort_columns), key="t_sort")
+        sort_desc = st.toggle("تنازلي", key="t_sort_desc")
+    with col_f6: page_size = st.selectbox("عدد الصفوف", [25, 50, 100, 200], index=1, key="t_page_size")
+    
+    task_filters = dict(
+        Project_ID=p_id,
+        Task=t_section or None,
+        Owner=t_owner or None,
+        Status=t_status or None,
+        End_Date__ge=due_window[0] if len(due_window) else None,
+        End_Date__le=due_window[-1] if len(due_window) else None,
+    )
+    total_rows = dm.count("Tasks", **task_filters)
+    
+    if total_rows:
+        pages = max(1, -(-total_rows // page_size))
+        page = st.number_input(f"الصفحة (من {pages})", min_value=1, max_value=pages, value=1, key="t_page") if pages > 1 else 1
+        page = min(page, pages)
+        p_tasks = dm.query(
+            "Tasks", columns=['Task_ID'] + cols_to_show,
+            order_by=f"{sort_columns[sort_label]} {'DESC' if sort_desc else 'ASC'}",
+            limit=page_size, offset=(page - 1) * page_size, **task_filters
+        )
+        st.caption(f"عرض {len(p_tasks)} من {total_rows} مهمة")
+        
+        # Task_ID rides along as the (hidden) index so edits can be matched back
+        display_df = editable(p_tasks.set_index('Task_ID'))
+        # A new page/filter gets a fresh editor instead of inheriting the previous page's edits
+        editor_key = "pro_editor_samawah_" + str(abs(hash((p_id, repr(task_filters), sort_label, sort_desc, page_size, page))))
+        # The page as it was when editing started: the save diffs against it, so a cell
+        # another user saved meanwhile is reported as a conflict instead of overwritten
+        base_key = editor_key + "_base"
+        if base_key not in st.session_state or not st.session_state.get(editor_key, {}).get("edited_rows"):
+            st.session_state[base_key] = (dm.snapshot_version("Tasks")[0], p_tasks)
         
         edited_df = st.data_editor(
             display_df,
@@ -556,43 +762,48 @@ elif selected_view == "المهام":
                 "Owner": "المسؤول",
                 "Status": st.column_config.SelectboxColumn(
                     "الحالة", 
-                    options=["مكتمل", "جاري التنفيذ", "قيد التنفيذ", "لم يبدأ", "Completed", "In Progress", "Not Started"], 
+                    # Canonical labels, plus any spelling no alias covers yet
+                    options=status_vocab.labels + [v for v in display_df['Status'].dropna().unique() if v not in status_vocab.labels],
                     required=True
                 ),
-                "Start_Date": "البدء",
-                "End_Date": "التسليم"
+                "Start_Date": st.column_config.DateColumn("البدء", format="YYYY-MM-DD"),
+                "End_Date": st.column_config.DateColumn("التسليم", format="YYYY-MM-DD")
             },
             use_container_width=True,
             hide_index=True,
-            key="pro_editor_samawah"
+            key=editor_key
         )
         
         if st.button("💾 حفظ البيانات وتحديث Google Sheets", type="primary"):
-            # Properly merge edited columns back into the full tasks dataframe
-            for col in edited_df.columns:
-                tasks_df.loc[p_tasks.index, col] = edited_df[col].values
-            if dm.save_task_updates(tasks_df):
-                st.toast("تم تحديث البيانات حياً على Google Sheets!", icon="🚀")
-                time.sleep(1)
+            # Only the rows edited on this page are written back (matched by Task_ID);
+            # the write itself happens in the background queue
+            edited_rows = sorted(st.session_state.get(editor_key, {}).get("edited_rows", {}))
+            base_generation, base_page = st.session_state[base_key]
+            job_id = dm.queue_task_updates(
+                edited_df.iloc[edited_rows].reset_index(), base=base_page, generation=base_generation
+            ) if edited_rows else None
+            if job_id is not None:
+                st.session_state["tasks_save_job"] = job_id
+                del st.session_state[base_key]
+                st.toast("تم حفظ التعديلات وجاري مزامنتها!", icon="🚀")
                 st.rerun()
+        save_status("tasks_save_job")
     else:
         st.info("لا توجد مهام لعرضها.")
 
 # ---- VIEW: التحديات (Challenges) ----
 elif selected_view == "التحديات":
     st.markdown("### ⚠️ التحديات والمخاطر")
-    challenges_df = dm.load_data("Challenges")
-    p_challenges = challenges_df[challenges_df['Project_ID'] == p_id] if p_id else challenges_df
+    p_challenges = dm.query("Challenges", columns=view_data["Challenges"], Project_ID=p_id)
     if not p_challenges.empty:
-        st.dataframe(p_challenges[['Description', 'Status', 'Risk_Impact']], use_container_width=True, hide_index=True)
+        st.dataframe(p_challenges, use_container_width=True, hide_index=True)
     else:
         st.info("لا توجد مخاطر مسجلة حالياً.")
 
 # ---- VIEW: المستندات (Documents) ----
 elif selected_view == "المستندات":
     st.markdown("### 📁 المستندات")
-    docs_df = dm.load_data("Documents")
-    p_docs = docs_df[docs_df['Project_ID'] == p_id] if p_id else docs_df
+    p_docs = dm.query("Documents", columns=view_data["Documents"], Project_ID=p_id)
     if not p_docs.empty:
         for _, row in p_docs.iterrows():
             st.markdown(f"""
@@ -613,9 +824,9 @@ elif selected_view == "الاجتماعات":
     
     # Filter by project if a specific project is selected
     if p_id and not recommendations_df.empty and 'Project_ID' in recommendations_df.columns:
-        p_recommendations = recommendations_df[recommendations_df['Project_ID'] == p_id].copy()
+        p_recommendations = recommendations_df[recommendations_df['Project_ID'] == p_id]
     else:
-        p_recommendations = recommendations_df.copy() if not recommendations_df.empty else pd.DataFrame()
+        p_recommendations = recommendations_df if not recommendations_df.empty else pd.DataFrame()
     
     # --- Add New Recommendation Form ---
     st.markdown("#### ➕ إضافة توصية جديدة")
@@ -626,11 +837,8 @@ elif selected_view == "الاجتماعات":
         with col_form1:
             rec_date = st.date_input("📅 تاريخ الاجتماع", value=datetime.now().date())
             
-            # Get list of team members from Tasks owners
-            if not tasks_df.empty and 'Owner' in tasks_df.columns:
-                team_members = tasks_df['Owner'].dropna().unique().tolist()
-            else:
-                team_members = ["مدير المشروع"]
+            # Team members from Config; the task owners only when Config lists none
+            team_members = dm.get_config_list("Team_Member") or dm.distinct("Tasks", "Owner") or ["مدير المشروع"]
             
             rec_owner = st.selectbox("👤 المسؤول عن التنفيذ", team_members)
         
@@ -652,21 +860,15 @@ elif selected_view == "الاجتماعات":
                     "Created_At": datetime.now().strftime("%Y-%m-%d %H:%M")
                 }
                 
-                # Append to existing dataframe
-                if recommendations_df.empty:
-                    updated_df = pd.DataFrame([new_rec])
-                else:
-                    updated_df = pd.concat([recommendations_df, pd.DataFrame([new_rec])], ignore_index=True)
-                
-                # Save to data source
-                if dm.save_meeting_recommendations(updated_df):
-                    st.success("✅ تم إضافة التوصية بنجاح!")
-                    st.rerun()
-                else:
-                    st.error("❌ حدث خطأ أثناء حفظ التوصية")
+                # Only the new row is sent (in the background); recommendations
+                # other users add at the same time are kept
+                st.session_state["recs_save_job"] = dm.queue_append_rows("MeetingRecommendations", [new_rec])
+                st.success("✅ تم إضافة التوصية بنجاح!")
+                st.rerun()
             else:
                 st.warning("⚠️ الرجاء إدخال نص التوصية")
     
+    save_status("recs_save_job")
     st.markdown("---")
     
     # --- Display Existing Recommendations ---
@@ -689,7 +891,7 @@ elif selected_view == "الاجتماعات":
             )
         
         # Apply filters
-        filtered_recs = p_recommendations.copy()
+        filtered_recs = p_recommendations
         if status_filter and 'Status' in filtered_recs.columns:
             filtered_recs = filtered_recs[filtered_recs['Status'].isin(status_filter)]
         if owner_filter and 'Owner' in filtered_recs.columns:
@@ -729,12 +931,9 @@ elif selected_view == "الاجتماعات":
                 else:
                     updated_full_df = edited_recs
                 
-                if dm.save_meeting_recommendations(updated_full_df):
-                    st.toast("تم حفظ التعديلات بنجاح!", icon="✅")
-                    time.sleep(1)
-                    st.rerun()
-                else:
-                    st.error("حدث خطأ أثناء الحفظ")
+                st.session_state["recs_save_job"] = dm.queue_meeting_recommendations(updated_full_df)
+                st.toast("تم حفظ التعديلات بنجاح!", icon="✅")
+                st.rerun()
         else:
             st.info("لا توجد أعمدة لعرضها.")
     else:
@@ -774,12 +973,62 @@ elif selected_view == "الإعدادات":
     
     # Refresh Data Button
     if st.button("🔄 إعادة تحميل البيانات من Google Sheets"):
+        dm.refresh()
         st.cache_data.clear()
         st.rerun()
     
+    pending_writes = dm.write_queue.pending_count()
+    if pending_writes:
+        st.caption(f"⏳ تعديلات بانتظار المزامنة: {pending_writes}")
+    write_conflicts = dm.write_conflicts()
+    if write_conflicts:
+        with st.expander(f"⚠️ تعارضات المزامنة ({len(write_conflicts)})"):
+            st.caption("تعديلات لم تُكتب لأن الخلية تغيرت في Google Sheets بعد بدء التعديل")
+            st.dataframe(pd.DataFrame(write_conflicts), use_container_width=True, hide_index=True)
+    cache_stats = dm.cache.stats
+    st.caption(f"🗂️ إصدار البيانات: {dm.data_version} — قراءات من الذاكرة: {cache_stats['hits']} / من المصدر: {cache_stats['misses']}")
+    snapshot_age = dm.snapshot_age()
+    if snapshot_age is not None:
+        refreshing = " — 🔄 جاري التحديث في الخلفية" if dm.cache.refreshing() else ""
+        st.caption(f"🕒 عمر البيانات المعروضة: {int(snapshot_age)} ثانية{refreshing} (تحديثات خلفية: {cache_stats['background_refreshes']})")
+    fig_stats = dm.figures.stats
+    st.caption(f"📈 الرسوم المخزنة: {len(dm.figures)} ({dm.figures.bytes // 1024} KB) — إعادة استخدام: {fig_stats['hits']} / بناء: {fig_stats['misses']}")
+    result_stats = dm.results.stats
+    st.caption(f"🧮 الجداول المحسوبة المخزنة: {len(dm.results)} ({dm.results.bytes // 1024} KB) — إعادة استخدام: {result_stats['hits']} / بناء: {result_stats['misses']}")
+
+    # Performance: load/save latencies, transfer volume, fallbacks, view render times
+    with st.expander("⏱️ الأداء"):
+        if not dm.metrics.enabled:
+            st.caption("القياسات معطلة ([metrics] enabled = false)")
+        else:
+            latency = dm.metrics.summary()
+            if latency:
+                st.dataframe(pd.DataFrame(latency), use_container_width=True, hide_index=True)
+            counters = dm.metrics.counter_rows()
+            if counters:
+                st.dataframe(pd.DataFrame(counters), use_container_width=True, hide_index=True)
+            c1, c2 = st.columns(2)
+            with c1:
+                st.download_button("⬇️ تصدير (Prometheus)", dm.metrics.to_prometheus(),
+                                   file_name="samawah_metrics.prom", mime="text/plain")
+            with c2:
+                if st.button("🧹 تصفير القياسات"):
+                    dm.metrics.reset()
+                    st.rerun()
+    
     st.divider()
     
     # System Info
     st.markdown("#### ℹ️ معلومات النظام")
     st.caption(f"📊 إجمالي المشاريع: {len(projects_df)}")
-    st.caption(f"📋 إجمالي المهام: {len(tasks_df)}")
+    if dm.is_loaded("Tasks"):
+        # Settings doesn't load Tasks itself; counted only when another view already did
+        st.caption(f"📋 إجمالي المهام: {dm.count('Tasks')}")
+    st.caption(f"🗄️ محرك الاستعلام: {dm.backend.name}")
+    if status_vocab.unknown:
+        # Add a Config row (Type "Status_Alias", Value "alias=مكتمل") to map these
+        st.caption(f"🏷️ حالات غير معروفة: {'، '.join(sorted(status_vocab.unknown))}")
+
+# --- Metrics ---
+dm.metrics.observe("view_render_seconds", time.perf_counter() - view_started, view=selected_view)
+dm.export_metrics()
@@ -0,0 +1,265 @@
+"""Benchmarks of the data and view paths at 1k/10k/100k tasks.
+
+    python benchmark.py                        # local workbook, 1k/10k/100k tasks
+    python benchmark.py --source sheets        # through the fake Sheets API (fake_sheets.py)
+    python benchmark.py --sizes 1000 10000 --repeat 5
+
+The data comes from generate_mock_data.generate_synthetic_data (fixed
+seed), written to a work directory once per size. Each case runs
+`--repeat` times; the median and minimum are appended to the results file
+(JSON lines) with the git revision, so every run is compared with the
+latest run of a different revision and cases slower than `--threshold`
+are reported (`--fail-on-regression` turns that into exit code 1).
+
+Cases follow what a rerun of the app does: load_data per sheet (after a
+cache refresh), the per-project aggregates and get_project_stats, the
+Dashboard KPI block, the Gantt figure, a Tasks editor page, the editor
+write-back (queue_task_updates) and a synchronous save_task_updates.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from generate_mock_data import generate_synthetic_data, write_workbook
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+TASKS_PER_PROJECT = 500
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_results.jsonl")
+SHEETS = ("Config", "Projects", "Tasks", "Challenges", "Documents", "MeetingRecommendations")
+EDITED_ROWS = 5
+PAGE_SIZE = 50
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def dataset(size, seed=0):
+    return generate_synthetic_data(
+        projects=max(size // TASKS_PER_PROJECT, 1),
+        tasks_per_project=min(size, TASKS_PER_PROJECT),
+        owners=max(size // 200, 10),
+        seed=seed,
+    )
+
+
+def timed(fn, repeat, setup=None):
+    """(median, min) seconds of `fn()` over `repeat` runs; `setup()` runs untimed before each"""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), min(samples)
+
+
+# --- Cases ---
+def edit_page(dm, project_id, column="Owner", value="Benchmark"):
+    """A Tasks editor page with EDITED_ROWS edited cells, as the view hands it to the save"""
+    page = dm.query("Tasks", Project_ID=project_id, order_by="End_Date", limit=PAGE_SIZE)
+    edited = page.astype({column: object}).iloc[:EDITED_ROWS].copy()
+    edited[column] = [f"{value} {i}" for i in range(len(edited))]
+    return edited
+
+
+def run_cases(dm, sheets, repeat, source):
+    from status import STATUS_COMPLETED, STATUS_IN_PROGRESS, STATUS_NOT_STARTED, STATUS_OTHER
+    import gantt
+
+    project_id = sheets["Projects"]["Project_ID"].iloc[0]
+    results = {}
+
+    def case(name, fn, setup=None, runs=repeat):
+        results[name] = timed(fn, runs, setup)
+
+    def cold():
+        dm.refresh()
+
+    def cold_tasks():
+        dm.refresh()
+        dm.load_data("Config")
+        dm.load_data("Tasks")
+
+    if source == "excel":
+        from snapshot import load_workbook_snapshot
+
+        def touch():
+            os.utime(dm.file_path)
+
+        for sheet_name in SHEETS:
+            case(f"parse_sheet[{sheet_name}]", lambda s=sheet_name: load_workbook_snapshot(dm.file_path).get(s), setup=touch)
+        dm.load_data("Tasks")
+    for sheet_name in SHEETS:
+        case(f"load_data[{sheet_name}]", lambda s=sheet_name: dm.load_data(s), setup=cold)
+    case("load_data_warm[Tasks]", lambda: dm.load_data("Tasks"), setup=lambda: dm.load_data("Tasks"))
+    case("project_aggregates", dm.project_aggregates, setup=cold_tasks)
+    case("get_project_stats", lambda: dm.get_project_stats(project_id))
+
+    def kpi_block():
+        # Dashboard header of app.py: project aggregate, status counts, portfolio rollup
+        agg = dm.project_aggregate(project_id)
+        counts = agg.status_series()
+        int(counts.get(STATUS_COMPLETED, 0)), int(counts.get(STATUS_IN_PROGRESS, 0))
+        dm.project_aggregate(None).status_series()
+        dm.get_portfolio_stats()
+
+    case("kpi_block", kpi_block, setup=cold_tasks)
+
+    def gantt_figure():
+        vocab = dm.status_vocabulary
+        tasks = dm.query("Tasks", columns=["Task", "Sub_Task", "Owner", "Status", "Start_Date", "End_Date"], Project_ID=None)
+        tasks["start"] = tasks["Start_Date"]
+        tasks["end"] = tasks["End_Date"]
+        tasks["status_code"] = vocab.codes(tasks["Status"])
+        lanes, _ = gantt.build_lanes(gantt.clip_window(tasks), gantt.LEVEL_TASKS)
+        labels = {code: vocab.label(code) for code in (STATUS_NOT_STARTED, STATUS_IN_PROGRESS, STATUS_COMPLETED, STATUS_OTHER)}
+        gantt.gantt_figure(gantt.lane_page(lanes, 1), colors={}, labels=labels).to_json()
+
+    case("gantt_figure", gantt_figure)
+
+    def editor_page():
+        dm.count("Tasks", Project_ID=project_id)
+        dm.query("Tasks", Project_ID=project_id, order_by="End_Date", limit=PAGE_SIZE, offset=PAGE_SIZE)
+
+    case("task_editor_page", editor_page)
+    case("critical_path", dm.task_schedule, setup=cold_tasks)
+
+    # One End_Date moved by three days and back, as a save hands it to the store
+    store = dm.schedules
+    task = dm.query("Tasks", Project_ID=project_id, order_by="End_Date", limit=1)
+    shifted = task.copy()
+    shifted["End_Date"] = shifted["End_Date"] + pd.Timedelta(days=3)
+    moves = iter(range(10 ** 6))
+
+    def shift_end_date():
+        generation = store.generation
+        old, new = (task, shifted) if next(moves) % 2 == 0 else (shifted, task)
+        store.apply_rows(generation, generation, old, new)
+
+    case("critical_path_update", shift_end_date, setup=dm.project_schedules)
+
+    # Write paths: each run edits different values, so every run is a real change
+    runs = iter(range(10 ** 6))
+    pending, edits = [], {}
+
+    def prepare(value):
+        # The previous background write lands first, so runs don't overlap
+        while pending:
+            dm.write_queue.wait(pending.pop(), timeout=300)
+        dm.load_data("Tasks")
+        edits["df"] = edit_page(dm, project_id, value=f"{value} {next(runs)}")
+
+    case("editor_write_back", lambda: pending.append(dm.queue_task_updates(edits["df"])), setup=lambda: prepare("Queued"))
+    case("save_task_updates", lambda: dm.save_task_updates(edits["df"]), setup=lambda: prepare("Saved"))
+    return results
+
+
+def run_size(size, source, repeat, workdir):
+    from data_manager import DataManager
+
+    sheets = dataset(size)
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    if source == "sheets":
+        from fake_sheets import FakeSheetsServer
+        from sheets_api import SheetsValuesClient
+
+        with FakeSheetsServer(sheets) as server:
+            dm = DataManager(sheets_api=SheetsValuesClient("benchmark", base_url=server.base_url))
+            return run_cases(dm, sheets, repeat, source)
+    path = os.path.join(workdir, f"synthetic_{size}.xlsx")
+    # The edits made by a previous run stay in the workbook: start from fresh data
+    write_workbook(sheets, path)
+    dm = DataManager(file_path=path)
+    return run_cases(dm, sheets, repeat, source)
+
+
+# --- Results ---
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous_results(history, revision, source):
+    """{(size, case): record} of the latest run of another revision"""
+    others = [r for r in history if r["revision"] != revision and r["source"] == source]
+    if not others:
+        return {}
+    latest = max(r["run"] for r in others)
+    return {(r["size"], r["case"]): r for r in others if r["run"] == latest}
+
+
+def report(records, previous, threshold, columns=("median_ms", "min_ms"), compared=("median_ms",)):
+    """Prints the results table; returns the (record, previous record) pairs where a
+    `compared` value grew past `threshold` x the previous run"""
+    regressions = []
+    print(f"{'size':>8}  {'case':<34}" + "".join(f"{c:>12}" for c in columns) + f"{'previous':>12}")
+    for r in records:
+        before = previous.get((r["size"], r["case"]))
+        change = ""
+        if before is not None:
+            ratios = [r[c] / before[c] for c in compared if before.get(c)]
+            if ratios:
+                change = f"{max(ratios):>10.2f}x"
+                if max(ratios) > threshold:
+                    regressions.append((r, before))
+                    change += " !"
+        print(f"{r['size']:>8}  {r['case']:<34}" + "".join(f"{r[c]:>12.1f}" for c in columns) + f"{change:>12}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="task counts")
+    parser.add_argument("--source", choices=["excel", "sheets"], default="excel")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".benchmark"))
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    results_path = os.path.abspath(args.results)
+    workdir = os.path.abspath(args.workdir)
+    revision = git_revision()
+    run_id = datetime.now().isoformat(timespec="seconds")
+    records = []
+    for size in args.sizes:
+        for case, (median, fastest) in run_size(size, args.source, args.repeat, workdir).items():
+            records.append({
+                "run": run_id, "revision": revision, "source": args.source, "size": size, "case": case,
+                "median_ms": round(median * 1000, 2), "min_ms": round(fastest * 1000, 2), "repeat": args.repeat,
+                "python": sys.version.split()[0], "pandas": pd.__version__,
+            })
+
+    previous = previous_results(load_results(results_path), revision, args.source)
+    regressions = report(records, previous, args.threshold)
+    with open(results_path, "a", encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    if previous:
+        print(f"\nCompared with revision {next(iter(previous.values()))['revision']}: {len(regressions)} regression(s)")
+    if regressions and args.fail_on_regression:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
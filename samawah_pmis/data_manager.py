@@ -1,14 +1,56 @@
+import threading
+import time
+
 import streamlit as st
 import pandas as pd
-from streamlit_gsheets import GSheetsConnection
+from snapshot import load_workbook_snapshot, file_signature
+from shared_cache import get_shared_cache
+from sheets_api import SheetsValuesClient, DEFAULT_BASE_URL, column_letter, to_cell, frame_to_values, values_to_frame, is_transient_error
+from mirror import get_local_mirror
+from storage import get_backend
+from write_queue import get_write_queue
+from delta import CellChange, diff_frames, apply_changes, row_blocks, to_batch_update, layout_from_values, add_missing_columns, patch_workbook, cells_equal, layout_rows, append_workbook_rows, replace_workbook_sheet
+from sync import get_incremental_sync, stamp_rows, now_stamp, STAMP_COLUMN, STAMPED_SHEETS
+from aggregates import get_aggregate_store, portfolio_aggregate, portfolio_frame
+from status import get_vocabulary, encode_status, ALIAS_CONFIG_TYPE, STATUS_OTHER
+from schema import apply_schema
+from figure_cache import get_figure_cache, get_result_cache
+from search import get_search_index
+from schedule import get_schedule_store, schedule_frame
+from metrics import get_metrics
+
+# Map common variations to standard internal names
+COLUMN_MAP = {
+    "Task_Name": "Task",
+    "القسم": "Task",
+    "المهمة": "Sub_Task",
+    "Task_Category": "Category", # Optional, but good for consistency
+}
+
+# Base value of a journaled cell edit that didn't record one
+_NO_BASE = object()
+
+# Appends read the shared cached frame and put it back one row longer; this
+# keeps two sessions appending at once from dropping each other's rows
+_append_lock = threading.Lock()
+
+# Worksheets the app reads; prefetch() loads them together
+APP_SHEETS = ("Config", "Projects", "Tasks", "Challenges", "Documents", "MeetingRecommendations")
 
 class DataManager:
-    def __init__(self):
+    def __init__(self, sheets_api=None, file_path="mock_data.xlsx"):
         self.sheet_url = ""
+        self.conn = None
+        # Values-API client used for partial (cell/range) writes
+        self.api = sheets_api
         # We will try to use the Google Sheets connection if configured
         try:
             # Check if spreadsheet is configured in secrets
-            if "connections" in st.secrets and "gsheets" in st.secrets.connections:
+            if sheets_api is not None:
+                self.use_gsheets = True
+            elif "connections" in st.secrets and "gsheets" in st.secrets.connections:
+                # Imported only when configured: the connector pulls in the whole Google client stack
+                from streamlit_gsheets import GSheetsConnection
                 self.conn = st.connection("gsheets", type=GSheetsConnection)
                 self.use_gsheets = True
                 # Store the sheet URL for display
@@ -17,121 +59,667 @@ class DataManager:
                 self.use_gsheets = False
         except Exception:
             self.use_gsheets = False
+
+        if self.use_gsheets and self.api is None:
+            try:
+                base_url = self._setting("sheets_api", "base_url", DEFAULT_BASE_URL)
+                self.api = SheetsValuesClient.from_connection(self.conn, self.sheet_url, base_url=base_url)
+            except Exception:
+                # Connector without an authorized session (e.g. public sheet): full writes only
+                self.api = None
+        # Row-stamp based incremental refresh (needs the values API)
+        self.sync = None
+        if self.use_gsheets and self.api is not None:
+            self.sync = get_incremental_sync(self.api, full_every=self._setting("sync", "full_every_seconds", 1800))
+        # Last data seen from / saved to Sheets, served when Sheets can't be reached
+        self.mirror = get_local_mirror(self._setting("mirror", "path", "sheets_mirror.sqlite"), COLUMN_MAP) if self.use_gsheets else None
             
-        self.file_path = "mock_data.xlsx"
+        self.file_path = file_path
+        # Frames this session was served; full-sheet saves stamp the rows that differ
+        self._loaded = {}
+        # Indexed query store fed from the shared cache ("sqlite" or "frames")
+        self.backend = get_backend(
+            self._setting("storage", "backend", "sqlite"),
+            self._frame_source,
+            path=self._setting("storage", "sqlite_path", ":memory:"),
+        )
+        # One cache shared by every session; writes bump its version. Past the soft
+        # TTL a sheet is still served and reloaded in the background; past the hard
+        # TTL a rerun waits for the reload.
+        self.cache = get_shared_cache(
+            ttl=self._setting("cache", "ttl_seconds", 300),
+            soft_ttl=self._setting("cache", "soft_ttl_seconds", 30),
+        )
+        # Per-project KPI aggregates, rebuilt per Tasks generation and patched on cell saves
+        self.aggregates = get_aggregate_store()
+        # Built Plotly figures, keyed on snapshot_version() + view/filter state
+        self.figures = get_figure_cache(self._setting("figures", "max_mb", 64))
+        # Derived frames (portfolio stats, schedules, Gantt lanes), keyed the same way
+        self.results = get_result_cache(self._setting("figures", "results_max_mb", 64))
+        # Full-text index over tasks/challenges/recommendations, built on first search
+        self.search_index = get_search_index()
+        # Depends_On graph and critical path per project, patched on cell saves like the aggregates
+        self.schedules = get_schedule_store()
+        # Load/save latencies, bytes, fallbacks and view render times (Settings > performance)
+        self.metrics = get_metrics()
+        self.metrics.enabled = bool(self._setting("metrics", "enabled", True))
+        self.metrics.register_collector("data_manager", self._collect_metrics)
+
+    def _setting(self, section, key, default):
+        """Reads an optional value from st.secrets[section][key]"""
+        try:
+            return st.secrets[section].get(key, default)
+        except Exception:
+            return default
+
+    @property
+    def status_vocabulary(self):
+        """Status aliases -> canonical codes, rebuilt when the Config sheet changes"""
+        config = self.cache.get("Config", self._load_sheet, self._sheet_source)
+        return get_vocabulary(self.cache.sheet_version("Config"), config)
+
+    @property
+    def data_version(self):
+        return self.cache.version
+
+    def snapshot_age(self, sheet_names=APP_SHEETS):
+        """Seconds since the oldest of the cached sheets was loaded (None if none is cached)"""
+        ages = [a for a in (self.cache.age(name) for name in sheet_names) if a is not None]
+        return max(ages) if ages else None
+
+    def snapshot_version(self, *sheet_names):
+        """Generations of the given cached sheets (None for a sheet not loaded yet);
+        derived results keyed on this stay valid until one of those sheets changes"""
+        return tuple(self.cache.sheet_version(name) for name in sheet_names)
+
+    def is_loaded(self, sheet_name):
+        """True if `sheet_name` is cached, i.e. reading it costs no download or parse"""
+        return self.cache.sheet_version(sheet_name) is not None
 
     def load_data(self, sheet_name):
-        df = pd.DataFrame()
+        if not self.use_gsheets:
+            self._sync_local_source()
+        df = self.cache.get(sheet_name, self._load_sheet, self._sheet_source)
+        self._loaded[sheet_name] = df
+        # Cached frames are shared across sessions; a shallow copy-on-write view
+        # costs nothing and any change made to it copies the touched columns
+        return df.copy(deep=False)
+
+    def _frame_source(self, sheet_name):
+        """(generation, shared frame) pair the query backend imports from"""
+        if not self.use_gsheets:
+            self._sync_local_source()
+        df = self.cache.get(sheet_name, self._load_sheet, self._sheet_source)
+        return self.cache.sheet_version(sheet_name), df
+
+    # --- Indexed queries (only the rows/aggregates a view needs) ---
+    def query(self, sheet_name, columns=None, order_by=None, limit=None, offset=0, **filters):
+        """Rows of `sheet_name` matching `column=value` / `column=[values]` filters"""
+        return self.backend.query(sheet_name, columns=columns, order_by=order_by, limit=limit, offset=offset, **filters)
+
+    def count(self, sheet_name, **filters):
+        return self.backend.count(sheet_name, **filters)
+
+    def group_counts(self, sheet_name, column, **filters):
+        return self.backend.group_counts(sheet_name, column, **filters)
+
+    def distinct(self, sheet_name, column, **filters):
+        return self.backend.distinct(sheet_name, column, **filters)
+
+    def refresh(self):
+        """Forces every session to re-read the data on its next rerun"""
+        if self.sync is not None:
+            self.sync.reset()
+        return self.cache.bump()
+
+    def _sync_local_source(self):
+        try:
+            self.cache.sync_source(file_signature(self.file_path))
+        except OSError:
+            pass
+
+    def _after_write(self, sheet_name, df, values=None, mirrored=False):
+        """Bumps the shared version and writes the saved frame through to the cache.
+        `values` is frame_to_values(df) if the caller has it; `mirrored` when the
+        caller already logged the change in the mirror (cell edits, appends)."""
+        source_key = None
+        if not self.use_gsheets:
+            try:
+                source_key = file_signature(self.file_path)
+            except OSError:
+                pass
+        self.cache.bump(sheet_name, source_key)
+        if self.mirror is not None and not mirrored:
+            self.mirror.save(sheet_name, df, values)
+        df = apply_schema(sheet_name, df)
+        if sheet_name == "Tasks":
+            df = encode_status(df, self.status_vocabulary)
+        self.cache.put(sheet_name, df.copy(deep=False), source=source_key)
+
+    def _sheet_source(self, sheet_name, raw=None):
+        """What a load of `sheet_name` reads (see SharedDataCache): the downloaded
+        frame - the incremental sync hands back the same one while nothing
+        changed - or the local workbook's mtime/size; None if unknown"""
+        if raw is not None:
+            return raw
         if self.use_gsheets:
+            return None
+        try:
+            return file_signature(self.file_path)
+        except OSError:
+            return None
+
+    def prefetch(self, sheet_names=APP_SHEETS):
+        """Loads every stale sheet of `sheet_names` with one batched request (Google
+        Sheets mode); local workbook sheets are parsed lazily on first read"""
+        if not self.use_gsheets:
+            return
+        # Config first: Tasks statuses are encoded with its vocabulary
+        ordered = sorted(sheet_names, key=lambda name: name != "Config")
+        # Cold start: serve the local mirror now, the download happens in the background
+        for name in ordered:
+            if self.cache.sheet_version(name) is None:
+                mirrored = self.mirror.load(name)
+                if mirrored is not None:
+                    self.cache.put(name, self._load_sheet(name, raw=mirrored), stale=True)
+        self.cache.get_many(ordered, self._fetch_sheets, self._load_sheet, self._sheet_source)
+
+    def _fetch_sheets(self, sheet_names):
+        """{sheet_name: raw frame} in one round trip; {} when it can't be batched
+        (each sheet is then loaded on its own, with the usual fallbacks)"""
+        if self.sync is None and self.api is None:
+            return {}
+        try:
+            with self.metrics.timer("sheet_batch_load_seconds"):
+                if self.sync is not None:
+                    frames = self.sync.load_many(sheet_names)
+                else:
+                    frames = self.api.read_frames(sheet_names)
+        except Exception as e:
+            if is_transient_error(e):
+                # Sheets unreachable: the mirror is the latest data we have
+                frames = {name: self.mirror.load(name) for name in sheet_names}
+                frames = {name: df for name, df in frames.items() if df is not None}
+                for name in frames:
+                    self.metrics.incr("sheet_fallbacks_total", sheet=name, to="mirror")
+                return frames
+            # e.g. a worksheet missing from the spreadsheet fails the whole batch
+            self.metrics.incr("sheet_fallbacks_total", sheet="*", to="single_loads")
+            return {}
+        for name, df in frames.items():
+            self.metrics.incr("sheet_rows_loaded_total", len(df), sheet=name, source="sheets")
+        self._reached_sheets(frames)
+        return frames
+
+    def _reached_sheets(self, frames):
+        """Mirrors freshly downloaded sheets and replays the journal if it was waiting"""
+        for name, df in frames.items():
+            self.mirror.save(name, df)
+        if self.write_queue.pending_count():
+            self.write_queue.retry_now()
+
+    def _load_sheet(self, sheet_name, raw=None):
+        """`raw` is the sheet as already downloaded by a batch (see prefetch)"""
+        df = pd.DataFrame()
+        if raw is not None:
+            df = raw
+        elif self.use_gsheets:
             try:
-                # read() with worksheet name, ttl=5 to avoid stale cached data
-                df = self.conn.read(worksheet=sheet_name, ttl=5)
+                with self.metrics.timer("sheet_load_seconds", sheet=sheet_name, source="sheets"):
+                    if self.sync is not None:
+                        # Only rows whose Updated_At changed are downloaded
+                        df = self.sync.load(sheet_name)
+                    else:
+                        # The shared cache owns freshness, so bypass the connector's own cache
+                        df = self.conn.read(worksheet=sheet_name, ttl=0)
+                self.metrics.incr("sheet_rows_loaded_total", len(df), sheet=sheet_name, source="sheets")
+                self._reached_sheets({sheet_name: df})
             except Exception as e:
-                # Fallback to local if Google Sheets fail
-                try:
-                    df = pd.read_excel(self.file_path, sheet_name=sheet_name)
-                except:
-                    df = pd.DataFrame()
+                # Sheets unreachable: last mirrored copy, the bundled workbook as a last resort
+                mirrored = self.mirror.load(sheet_name)
+                df = mirrored if mirrored is not None else self._read_local(sheet_name)
+                self.metrics.incr("sheet_fallbacks_total", sheet=sheet_name, to="mirror" if mirrored is not None else "excel")
         else:
-            try:
-                df = pd.read_excel(self.file_path, sheet_name=sheet_name)
-            except:
-                df = pd.DataFrame()
-        
+            with self.metrics.timer("sheet_load_seconds", sheet=sheet_name, source="excel"):
+                df = self._read_local(sheet_name)
+            self.metrics.incr("sheet_rows_loaded_total", len(df), sheet=sheet_name, source="excel")
+
         # --- Normalize Columns ---
-        # Map common variations to standard internal names
-        column_map = {
-            "Task_Name": "Task",
-            "القسم": "Task",
-            "المهمة": "Sub_Task",
-            "Task_Category": "Category", # Optional, but good for consistency
-        }
         if not df.empty:
-            df = df.rename(columns=column_map)
+            df = df.rename(columns=COLUMN_MAP)
+        # Declared dtypes (dates, compact numbers, categoricals) are applied once, here
+        df = apply_schema(sheet_name, df)
+        # Status aliases are resolved once here; the column is categorical from now on
+        if sheet_name == "Tasks":
+            df = encode_status(df, self.status_vocabulary)
             
         return df
 
+    def _read_local(self, sheet_name):
+        """Serves a sheet from the in-memory workbook snapshot (each sheet parsed on first use per file change)"""
+        try:
+            return load_workbook_snapshot(self.file_path).get(sheet_name)
+        except Exception:
+            return pd.DataFrame()
+
+    # --- Precomputed per-project aggregates ---
+    def project_aggregates(self):
+        """{Project_ID: ProjectAggregate} for the current Tasks snapshot"""
+        return self.aggregates.get(self._frame_source, self.status_vocabulary)
+
+    def project_aggregate(self, project_id=None):
+        """Aggregate of one project, or of the whole portfolio when project_id is None"""
+        aggregates = self.project_aggregates()
+        if project_id is None:
+            return portfolio_aggregate(aggregates)
+        return aggregates.get(project_id) or portfolio_aggregate({})
+
+    # --- Search ---
+    def search(self, text, project_id=None, limit=20):
+        """Ranked hits for `text` (see search.py); sheets are re-indexed only when they changed"""
+        self.search_index.sync(self._frame_source)
+        return self.search_index.search(text, project_id=project_id, limit=limit)
+
+    # --- Dependencies and critical path ---
+    def project_schedules(self):
+        """{Project_ID: schedule.ProjectSchedule} for the current Tasks snapshot"""
+        return self.schedules.get(self._frame_source, self.status_vocabulary)
+
+    def task_schedule(self, project_id=None):
+        """Early/late dates, float and critical flag per task (see schedule.py)"""
+        today = pd.Timestamp.now().normalize()
+        frame = self.results.get_or_build(
+            ("task_schedule", project_id, today),
+            lambda: schedule_frame(self.project_schedules(), project_id),
+            versions=self.snapshot_version("Tasks", "Config"),
+        )
+        return frame.copy(deep=False)
+
     def get_project_stats(self, project_id):
-        tasks_df = self.load_data("Tasks")
-        if tasks_df.empty:
-            return 0, 0, 0
-            
-        p_tasks = tasks_df[tasks_df['Project_ID'] == project_id]
-        
-        if p_tasks.empty:
-            return 0, 0, 0
-            
-        total_qty = p_tasks['Quantity_Total'].sum()
-        done_qty = p_tasks['Quantity_Done'].sum()
-        
-        progress = (done_qty / total_qty * 100) if total_qty > 0 else 0
-        remaining_qty = total_qty - done_qty
-        
-        return round(progress, 1), int(total_qty), int(remaining_qty)
-
-    def save_task_updates(self, df):
+        agg = self.project_aggregate(project_id)
+        return agg.progress, int(agg.quantity_total), int(agg.quantity_total - agg.quantity_done)
+
+    def get_portfolio_stats(self):
+        """Per-project progress, totals, remaining quantity, cost vs Total_Budget and
+        days left for every project, from the shared aggregates (one Tasks groupby)"""
+        today = pd.Timestamp.now().normalize()
+        stats = self.results.get_or_build(
+            ("portfolio_stats", today),
+            lambda: portfolio_frame(self.project_aggregates(), self.load_data("Projects"), today),
+            versions=self.snapshot_version("Tasks", "Projects", "Config"),
+        )
+        # Shared between sessions: hand out a copy-on-write view
+        return stats.copy(deep=False)
+
+    def _write_sheet(self, sheet_name, df):
+        """Rewrites a whole worksheet (raises on failure)"""
+        with self.metrics.timer("sheet_save_seconds", sheet=sheet_name, mode="sheet"):
+            self._write_whole_sheet(sheet_name, df)
+        self.metrics.incr("sheet_rows_saved_total", len(df), sheet=sheet_name, mode="sheet")
+
+    def _write_whole_sheet(self, sheet_name, df):
         if self.use_gsheets:
-            try:
+            if self.conn is not None:
                 # update() expects worksheet name and the dataframe
-                self.conn.update(worksheet="Tasks", data=df)
+                self.conn.update(worksheet=sheet_name, data=df)
+            else:
+                self.api.write_frame(sheet_name, df)
+        else:
+            # Under the same lock as cell patches and appends to the workbook
+            replace_workbook_sheet(self.file_path, sheet_name, df)
+
+    def _write_cells(self, sheet_name, changes, key, check_conflicts=False):
+        """Writes only the changed cells: one batched range update on Sheets, a cell patch locally.
+        With `check_conflicts`, cells whose sheet value is no longer the one the edit
+        started from (someone else changed it, or the row is gone) are skipped and
+        returned as conflicts."""
+        with self.metrics.timer("sheet_save_seconds", sheet=sheet_name, mode="cells"):
+            conflicts = self._write_changed_cells(sheet_name, changes, key, check_conflicts)
+        self.metrics.incr("sheet_cells_saved_total", len(changes) - len(conflicts), sheet=sheet_name)
+        if conflicts:
+            self.metrics.incr("write_conflicts_total", len(conflicts), sheet=sheet_name)
+        return conflicts
+
+    def _write_changed_cells(self, sheet_name, changes, key, check_conflicts):
+        conflicts = []
+        if self.use_gsheets:
+            header = (self.api.get(f"'{sheet_name}'!1:1") or [[]])[0]
+            _, col_of_column = layout_from_values(header, [], key, COLUMN_MAP)
+            key_letter = column_letter(col_of_column[key])
+            key_values = [r[0] if r else None for r in self.api.get(f"'{sheet_name}'!{key_letter}2:{key_letter}")]
+            row_of_key, _ = layout_from_values(header, key_values, key, COLUMN_MAP)
+            if check_conflicts:
+                changes, conflicts = self._split_conflicts(sheet_name, changes, row_of_key, col_of_column)
+            # e.g. the first Updated_At stamp on a sheet that has no such column yet
+            header_cells = [
+                {"range": f"'{sheet_name}'!{column_letter(col)}1", "values": [[name]]}
+                for col, name in add_missing_columns(header, changes, col_of_column).items()
+            ]
+            self.api.batch_update(header_cells + to_batch_update(sheet_name, row_blocks(changes, row_of_key, col_of_column)))
+        else:
+            patch_workbook(self.file_path, sheet_name, changes, key=key, column_map=COLUMN_MAP)
+        return conflicts
+
+    def _write_rows(self, sheet_name, columns, rows):
+        """Appends rows (values in `columns` order) to a worksheet (raises on failure)"""
+        with self.metrics.timer("sheet_save_seconds", sheet=sheet_name, mode="rows"):
+            self._append_sheet_rows(sheet_name, columns, rows)
+        self.metrics.incr("sheet_rows_saved_total", len(rows), sheet=sheet_name, mode="rows")
+
+    def _append_sheet_rows(self, sheet_name, columns, rows):
+        if self.use_gsheets:
+            header = (self.api.get(f"'{sheet_name}'!1:1") or [[]])[0]
+            added, values = layout_rows(header, columns, rows, COLUMN_MAP)
+            if added:
+                self.api.batch_update([
+                    {"range": f"'{sheet_name}'!{column_letter(col)}1", "values": [[name]]} for col, name in added.items()
+                ])
+            first_row = self.api.append(sheet_name, values)
+            if self.sync is not None:
+                self.sync.apply_append(sheet_name, [str(h) for h in header] + list(added.values()), values, first_row)
+        else:
+            append_workbook_rows(self.file_path, sheet_name, columns, rows, column_map=COLUMN_MAP)
+
+    def _same_value(self, column, sheet_value, value):
+        """Frames hold canonical statuses, the sheet may hold any alias of them"""
+        if column == "Status":
+            vocab = self.status_vocabulary
+            code = vocab.code(to_cell(sheet_value))
+            if code != STATUS_OTHER and code == vocab.code(to_cell(value)):
                 return True
-            except Exception as e:
+        return cells_equal(sheet_value, value)
+
+    def _split_conflicts(self, sheet_name, changes, row_of_key, col_of_column):
+        """(changes still safe to write, conflicts), comparing each edited cell's
+        current sheet value with the value the edit was based on"""
+        rows = sorted({row_of_key[c.key] for c in changes if c.key in row_of_key})
+        current = dict(zip(rows, self.api.batch_get([f"'{sheet_name}'!{r}:{r}" for r in rows]))) if rows else {}
+        safe, conflicts = [], []
+        for c in changes:
+            if c.key not in row_of_key:
+                conflicts.append({"key": c.key, "column": c.column, "base": c.old, "local": c.new, "remote": None})
+                continue
+            if c.old is _NO_BASE or c.column == STAMP_COLUMN or c.column not in col_of_column:
+                safe.append(c)
+                continue
+            values = (current.get(row_of_key[c.key]) or [[]])[0]
+            col = col_of_column[c.column]
+            remote = values[col] if col < len(values) else ""
+            if self._same_value(c.column, remote, c.old) or self._same_value(c.column, remote, c.new):
+                safe.append(c)
+            else:
+                conflicts.append({"key": c.key, "column": c.column, "base": c.old, "local": c.new, "remote": remote})
+        # Keep the stamp only on rows that still get a real edit
+        edited = {c.key for c in safe if c.column != STAMP_COLUMN}
+        safe = [c for c in safe if c.column != STAMP_COLUMN or c.key in edited]
+        return safe, conflicts
+
+    def _plan_task_save(self, df, base=None, generation=None):
+        """Returns (current, changes) for a cell-level save, or (None, None) when the
+        whole sheet has to be rewritten (added/removed rows, new columns).
+
+        `base` holds the rows as the editor showed them when editing started and
+        `generation` the Tasks generation they were read from. Once Tasks moved on
+        since, the old values of the changes come from `base`, so cells someone
+        else saved meanwhile are caught by the conflict check, not overwritten."""
+        current = self.cache.get("Tasks", self._load_sheet, self._sheet_source)
+        changes = None
+        if base is not None and generation != self.cache.sheet_version("Tasks"):
+            changes = diff_frames(base, df, key="Task_ID")
+        if changes is None:
+            # Matched by Task_ID against the shared frame
+            changes = diff_frames(current, df, key="Task_ID")
+        if changes is None or (self.use_gsheets and self.api is None):
+            return None, None
+        # Stamp every edited row so other processes can sync just these rows
+        stamp = now_stamp()
+        edited_keys = list(dict.fromkeys(c.key for c in changes if c.column != STAMP_COLUMN))
+        changes = [c for c in changes if c.column != STAMP_COLUMN]
+        changes += [CellChange(k, STAMP_COLUMN, None, stamp) for k in edited_keys]
+        return current, changes
+
+    def _commit_cells(self, sheet_name, base, changes, key):
+        """Reflects a cell-level write in the shared cache and the query backend"""
+        generation = self.cache.sheet_version(sheet_name)
+        updated = apply_changes(base, changes, key=key)
+        if self.mirror is not None:
+            self.mirror.save_cells(sheet_name, key, [[to_cell(c.key), c.column, to_cell(c.new)] for c in changes])
+        self._after_write(sheet_name, updated, mirrored=True)
+        new_generation = self.cache.sheet_version(sheet_name)
+        self.backend.apply_changes(sheet_name, changes, key, generation, new_generation)
+        if sheet_name == "Tasks":
+            keys = list({c.key for c in changes})
+            self.aggregates.apply_rows(
+                generation, new_generation, base[base[key].isin(keys)], updated[updated[key].isin(keys)]
+            )
+            self.search_index.apply_rows(sheet_name, generation, new_generation, updated[updated[key].isin(keys)])
+            self.schedules.apply_rows(
+                generation, new_generation, base[base[key].isin(keys)], updated[updated[key].isin(keys)]
+            )
+
+    def _new_rows(self, sheet_name, rows):
+        """Rows to append (a frame or a list of dicts), stamped on stamped sheets"""
+        df = rows.reset_index(drop=True) if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+        if sheet_name in STAMPED_SHEETS and not df.empty:
+            df = stamp_rows(None, df)
+        return df
+
+    def _with_rows(self, sheet_name, df):
+        """(shared frame of `sheet_name`, that frame with `df` appended); call with
+        _append_lock held and before writing, so the base doesn't hold the rows yet"""
+        if not self.use_gsheets:
+            self._sync_local_source()
+        base = self.cache.get(sheet_name, self._load_sheet, self._sheet_source)
+        df = df.rename(columns=COLUMN_MAP)
+        if base.empty:
+            return base, df
+        return base, pd.concat([base, df], ignore_index=True)
+
+    def _commit_rows(self, sheet_name, base, updated):
+        """Reflects appended rows in the shared cache, on top of whatever other sessions added"""
+        generation = self.cache.sheet_version(sheet_name)
+        if self.mirror is not None:
+            self.mirror.save_rows(sheet_name, frame_to_values(updated.iloc[len(base):]))
+        self._after_write(sheet_name, updated, mirrored=True)
+        # Sheets without an id column are searched by row position: the new rows come last
+        self.search_index.apply_rows(
+            sheet_name, generation, self.cache.sheet_version(sheet_name), updated.iloc[len(base):]
+        )
+
+    def append_rows(self, sheet_name, rows):
+        """Adds rows at the end of a sheet. Only the new rows are sent (a values
+        append on Sheets, a row append to the local workbook), so rows other
+        sessions added meanwhile are kept and nothing is reloaded."""
+        df = self._new_rows(sheet_name, rows)
+        if df.empty:
+            return True
+        try:
+            with _append_lock:
+                base, updated = self._with_rows(sheet_name, df)
+                if self.use_gsheets and self.api is None:
+                    # The connector alone can only rewrite whole worksheets
+                    self._write_sheet(sheet_name, updated)
+                else:
+                    self._write_rows(sheet_name, list(df.columns), frame_to_values(df)[1:])
+                self._commit_rows(sheet_name, base, updated)
+            return True
+        except Exception as e:
+            if self.use_gsheets:
                 st.error(f"Google Sheets update failed: {e}")
-                return False
-        else:
+            else:
+                st.error(f"Local update failed: {e}")
+            return False
+
+    def save_task_updates(self, df, base=None, generation=None):
+        base, changes = self._plan_task_save(df, base, generation)
+        if changes is not None:
+            if not changes:
+                return True
             try:
-                with pd.ExcelWriter(self.file_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-                    df.to_excel(writer, sheet_name="Tasks", index=False)
+                self._write_cells("Tasks", changes, key="Task_ID")
+                self._commit_cells("Tasks", base, changes, "Task_ID")
                 return True
             except Exception as e:
-                st.error(f"Local update failed: {e}")
+                st.error(f"Task update failed: {e}")
                 return False
 
+        df = stamp_rows(self._loaded.get("Tasks"), df)
+        try:
+            self._write_sheet("Tasks", df)
+            self._after_write("Tasks", df)
+            return True
+        except Exception as e:
+            if self.use_gsheets:
+                st.error(f"Google Sheets update failed: {e}")
+            else:
+                st.error(f"Local update failed: {e}")
+            return False
+
+    # --- Background (write-behind) saves ---
+    @property
+    def write_queue(self):
+        return get_write_queue(
+            self._setting("writes", "queue_path", "pending_writes.sqlite"),
+            self._apply_write,
+            on_failure=self.cache.bump,
+            # Show the sheet's own values where a journaled edit lost a conflict
+            on_conflict=self.cache.bump,
+            transient=is_transient_error,
+        )
+
+    def _apply_write(self, sheet_name, kind, payload):
+        """Runs on the write-behind thread: no st.* calls here"""
+        conflicts = None
+        if kind == "cells":
+            # [key, column, value, base value]; entries journaled without a base aren't checked
+            changes = [CellChange(cell[0], cell[1], cell[3] if len(cell) > 3 else _NO_BASE, cell[2]) for cell in payload["cells"]]
+            conflicts = self._write_cells(sheet_name, changes, key=payload["key"], check_conflicts=True)
+        elif kind == "rows":
+            self._write_rows(sheet_name, payload["columns"], payload["rows"])
+        else:
+            self._write_sheet(sheet_name, values_to_frame(payload["values"]))
+        if not self.use_gsheets:
+            try:
+                # The cache already holds what we just wrote
+                self.cache.adopt_source(file_signature(self.file_path))
+            except OSError:
+                pass
+        return conflicts
+
+    def queue_task_updates(self, df, base=None, generation=None):
+        """Like save_task_updates, but returns immediately with a job id
+        (None if nothing changed). Every session sees the edit right away;
+        the sheet itself is written by the background queue."""
+        base, changes = self._plan_task_save(df, base, generation)
+        if changes is not None:
+            if not changes:
+                return None
+            payload = {"key": "Task_ID", "cells": [[to_cell(c.key), c.column, to_cell(c.new), to_cell(c.old)] for c in changes]}
+            job_id = self.write_queue.enqueue("Tasks", "cells", payload)
+            self._commit_cells("Tasks", base, changes, "Task_ID")
+            return job_id
+        df = stamp_rows(self._loaded.get("Tasks"), df)
+        values = frame_to_values(df)
+        job_id = self.write_queue.enqueue("Tasks", "sheet", {"values": values})
+        self._after_write("Tasks", df, values)
+        return job_id
+
+    def queue_meeting_recommendations(self, df):
+        """Background variant of save_meeting_recommendations; returns a job id"""
+        df = stamp_rows(self._loaded.get("MeetingRecommendations"), df)
+        values = frame_to_values(df)
+        job_id = self.write_queue.enqueue("MeetingRecommendations", "sheet", {"values": values})
+        self._after_write("MeetingRecommendations", df, values)
+        return job_id
+
+    def queue_append_rows(self, sheet_name, rows):
+        """Background variant of append_rows; returns a job id (None without rows)"""
+        df = self._new_rows(sheet_name, rows)
+        if df.empty:
+            return None
+        with _append_lock:
+            base, updated = self._with_rows(sheet_name, df)
+            if self.use_gsheets and self.api is None:
+                job_id = self.write_queue.enqueue(sheet_name, "sheet", {"values": frame_to_values(updated)})
+            else:
+                values = frame_to_values(df)
+                job_id = self.write_queue.enqueue(sheet_name, "rows", {"columns": values[0], "rows": values[1:]})
+            self._commit_rows(sheet_name, base, updated)
+        return job_id
+
+    def write_status(self, job_id):
+        """"pending", "committed" or "failed" for a job returned by queue_*"""
+        return self.write_queue.status(job_id)
+
+    def write_error(self, job_id):
+        return self.write_queue.error(job_id)
+
+    def write_conflicts(self, job_id=None):
+        """Cells a journaled save skipped because the sheet changed underneath it"""
+        return self.write_queue.conflicts(job_id)
+
+    # --- Metrics ---
+    def _collect_metrics(self):
+        """Counters kept by the shared components, read when metrics are exported"""
+        def events(stats):
+            return {(("event", name),): value for name, value in stats.items()}
+        gauges = {
+            "cache_events_total": events(self.cache.stats),
+            "figure_cache_events_total": events(self.figures.stats),
+            "result_cache_events_total": events(self.results.stats),
+            "aggregate_events_total": events(self.aggregates.stats),
+            "search_index_events_total": events(self.search_index.stats),
+            "schedule_events_total": events(self.schedules.stats),
+            "write_queue_pending": self.write_queue.pending_count(),
+        }
+        if self.sync is not None:
+            gauges["sync_events_total"] = events(self.sync.stats)
+        age = self.snapshot_age()
+        if age is not None:
+            gauges["snapshot_age_seconds"] = round(age, 1)
+        return gauges
+
+    def export_metrics(self, min_interval=30):
+        """Writes the metrics to `[metrics] export_path` (if set), at most every `min_interval` seconds"""
+        path = self._setting("metrics", "export_path", "")
+        if not path or not self.metrics.enabled:
+            return False
+        now = time.time()
+        if now - self.metrics.last_export < min_interval:
+            return False
+        self.metrics.last_export = now
+        try:
+            self.metrics.export(path)
+        except OSError:
+            return False
+        return True
+
     def get_config_list(self, config_type):
         """Returns a list of values for a specific type (e.g., Team_Member)"""
         try:
-            config_df = self.load_data("Config")
-            if config_df.empty:
-                return []
-            return config_df[config_df['Type'] == config_type]['Value'].tolist()
-        except:
+            return self.backend.config_list(config_type)
+        except Exception:
             return []
 
     def add_to_config(self, config_type, new_value):
-        """Adds a new value to the config list"""
-        config_df = self.load_data("Config")
-        new_row = pd.DataFrame([{"Type": config_type, "Value": new_value}])
-        updated_df = pd.concat([config_df, new_row], ignore_index=True)
-        
-        if self.use_gsheets:
-            try:
-                self.conn.update(worksheet="Config", data=updated_df)
-                return True
-            except Exception as e:
-                st.error(f"Google Sheets config update failed: {e}")
-                return False
-        else:
-            try:
-                with pd.ExcelWriter(self.file_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-                    updated_df.to_excel(writer, sheet_name="Config", index=False)
-                return True
-            except Exception:
-                return False
+        """Adds a new value to the config list (appends one row to Config)"""
+        if not self.append_rows("Config", [{"Type": config_type, "Value": new_value}]):
+            return False
+        if config_type == ALIAS_CONFIG_TYPE:
+            # Re-encode Tasks with the new alias
+            self.cache.bump("Tasks")
+        return True
 
     def save_meeting_recommendations(self, df):
         """Saves meeting recommendations to the MeetingRecommendations sheet"""
-        if self.use_gsheets:
-            try:
-                self.conn.update(worksheet="MeetingRecommendations", data=df)
-                return True
-            except Exception as e:
+        df = stamp_rows(self._loaded.get("MeetingRecommendations"), df)
+        try:
+            self._write_sheet("MeetingRecommendations", df)
+            self._after_write("MeetingRecommendations", df)
+            return True
+        except Exception as e:
+            if self.use_gsheets:
                 st.error(f"Google Sheets update failed: {e}")
-                return False
-        else:
-            try:
-                with pd.ExcelWriter(self.file_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-                    df.to_excel(writer, sheet_name="MeetingRecommendations", index=False)
-                return True
-            except Exception as e:
+            else:
                 st.error(f"Local update failed: {e}")
-                return False
+            return False
@@ -0,0 +1,276 @@
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+from sheets_api import a1_range, to_cell
+from snapshot import file_signature
+
+# A single edited cell, addressed by the row's key (e.g. Task_ID) and column name
+CellChange = namedtuple("CellChange", ["key", "column", "old", "new"])
+
+# Local workbook writes replace the file; one at a time so none is lost
+_workbook_lock = threading.Lock()
+# (path, sheet, key) -> (file signature, header, row_of_key) after our last cell
+# patch; a patch never moves rows, so the next one can skip reading them again
+_layouts = {}
+
+
+def _same(a, b):
+    """Elementwise equality that treats NaN/None/NaT as equal to each other"""
+    a = a.astype(object)
+    b = b.astype(object)
+    both_na = a.isna().to_numpy() & b.isna().to_numpy()
+    eq = (a.to_numpy() == b.to_numpy())
+    return eq | both_na
+
+
+def cells_equal(a, b):
+    """Compares two cell values the way the sheet shows them ("5" == 5.0, "" == None)"""
+    a, b = to_cell(a), to_cell(b)
+    if a == b:
+        return True
+    try:
+        return float(a) == float(b)
+    except (TypeError, ValueError):
+        return str(a).strip() == str(b).strip()
+
+
+def diff_frames(base, edited, key="Task_ID"):
+    """Returns the list of CellChange needed to turn `base` into `edited`.
+
+    Rows are matched by `key`, so row order doesn't matter and `edited` may be
+    any subset of the rows (e.g. one project's slice). Returns None when the
+    edit is structural - unknown/duplicate keys or columns that don't exist in
+    `base` - and can't be expressed as cell updates.
+    """
+    if key not in base.columns or key not in edited.columns:
+        return None
+    if any(c not in base.columns for c in edited.columns):
+        return None
+    base_keys = pd.Index(base[key])
+    if not base_keys.is_unique or edited[key].duplicated().any():
+        return None
+    positions = base_keys.get_indexer(edited[key])
+    if (positions < 0).any():
+        return None
+
+    keys = edited[key].to_numpy()
+    changes = []
+    for col in edited.columns:
+        if col == key:
+            continue
+        b = base[col].iloc[positions]
+        e = edited[col]
+        same = _same(b, e)
+        if same.all():
+            continue
+        for idx in (~same).nonzero()[0]:
+            changes.append(CellChange(keys[idx], col, b.iat[idx], e.iat[idx]))
+    return changes
+
+
+def apply_changes(df, changes, key="Task_ID"):
+    """Returns a copy of `df` with `changes` applied"""
+    out = df.copy()
+    if not changes:
+        return out
+    positions = pd.Index(out[key]).get_indexer([c.key for c in changes])
+    for pos, change in zip(positions, changes):
+        if pos < 0:
+            continue
+        if change.column not in out.columns:
+            out[change.column] = pd.Series([None] * len(out), index=out.index, dtype=object)
+        col = out.columns.get_loc(change.column)
+        try:
+            out.iat[pos, col] = change.new
+        except (TypeError, ValueError):
+            # e.g. writing text into a numeric column - widen it first
+            out[change.column] = out[change.column].astype(object)
+            out.iat[pos, col] = change.new
+    return out
+
+
+def row_blocks(changes, row_of_key, col_of_column):
+    """Groups changes into (sheet_row, first_col, last_col, values) blocks,
+    merging horizontally adjacent cells of the same row into one range.
+    `row_of_key` maps key -> 1-based sheet row, `col_of_column` maps column
+    name -> 0-based sheet column."""
+    by_row = {}
+    for c in changes:
+        by_row.setdefault(row_of_key[c.key], {})[col_of_column[c.column]] = to_cell(c.new)
+
+    blocks = []
+    for row in sorted(by_row):
+        cells = by_row[row]
+        cols = sorted(cells)
+        start = prev = cols[0]
+        for col in cols[1:] + [None]:
+            if col is not None and col == prev + 1:
+                prev = col
+                continue
+            blocks.append((row, start, prev, [cells[i] for i in range(start, prev + 1)]))
+            if col is not None:
+                start = prev = col
+    return blocks
+
+
+def to_batch_update(sheet_name, blocks):
+    """Blocks -> the `data` payload of a values:batchUpdate request"""
+    return [{"range": a1_range(sheet_name, row, first, last), "values": [values]}
+            for row, first, last, values in blocks]
+
+
+def layout_from_values(header, key_column_values, key, column_map=None):
+    """Builds the (row_of_key, col_of_column) maps from a sheet's header row
+    and its key column as returned by the values API / openpyxl."""
+    column_map = column_map or {}
+    col_of_column = {}
+    for i, name in enumerate(header):
+        if name is None or name == "":
+            continue
+        col_of_column.setdefault(column_map.get(str(name), str(name)), i)
+    row_of_key = {}
+    for offset, value in enumerate(key_column_values):
+        if value not in (None, ""):
+            row_of_key.setdefault(value, offset + 2)
+    return row_of_key, col_of_column
+
+
+def add_missing_columns(header, changes, col_of_column):
+    """Appends columns that changes refer to but the sheet doesn't have yet
+    (e.g. a first Updated_At stamp). Returns the new header cells as
+    {0-based column: name}."""
+    added = {}
+    width = len(header)
+    for c in changes:
+        if c.column not in col_of_column:
+            col_of_column[c.column] = width + len(added)
+            added[col_of_column[c.column]] = c.column
+    return added
+
+
+def patch_workbook(path, sheet_name, changes, key="Task_ID", column_map=None):
+    """Writes only the changed cells into a local .xlsx file.
+
+    The worksheet XML is patched in place (workbook_xml), so the cost is one
+    pass over that sheet's text rather than loading and re-serializing every
+    cell through openpyxl. Workbooks laid out in a way the patch doesn't
+    understand go through openpyxl, which still keeps untouched cells and
+    their formatting as they were.
+    """
+    import workbook_xml
+
+    with _workbook_lock:
+        sheet = workbook_xml.SheetXml(path, sheet_name)
+        try:
+            header, row_of_key = _sheet_layout(sheet, key, column_map)
+            if row_of_key is not None:
+                _, col_of_column = layout_from_values(header, [], key, column_map)
+                added = add_missing_columns(header, changes, col_of_column)
+                cells = {}
+                for row, first, _, values in row_blocks(changes, row_of_key, col_of_column):
+                    for offset, value in enumerate(values):
+                        cells[(row, first + offset)] = value
+                cells.update({(1, col): name for col, name in added.items()})
+                xml = sheet.patched(cells)
+                if xml is not None:
+                    sheet.save(xml)
+                    header = header + [added[col] for col in sorted(added)]
+                    _layouts[(sheet.path, sheet_name, key)] = (file_signature(path), header, row_of_key)
+                    return
+        finally:
+            sheet.close()
+        _layouts.pop((sheet.path, sheet_name, key), None)
+        _patch_with_openpyxl(path, sheet_name, changes, key, column_map)
+
+
+def _sheet_layout(sheet, key, column_map):
+    """(header, row_of_key) of a sheet, (None, None) if it can't be patched as XML.
+    Reused from our previous patch while the file is the one it wrote."""
+    if sheet.xml is None:
+        return None, None
+    cached = _layouts.get((sheet.path, sheet.name, key))
+    if cached is not None and cached[0] == file_signature(sheet.path):
+        return cached[1], cached[2]
+    header = sheet.header()
+    _, col_of_column = layout_from_values(header, [], key, column_map)
+    if key not in col_of_column:
+        return None, None
+    row_of_key, _ = layout_from_values(header, sheet.column(col_of_column[key]), key, column_map)
+    return header, row_of_key
+
+
+def _patch_with_openpyxl(path, sheet_name, changes, key, column_map):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path)
+    ws = wb[sheet_name]
+    header = [c.value for c in next(ws.iter_rows(min_row=1, max_row=1))]
+    _, col_of_column = layout_from_values(header, [], key, column_map)
+    key_col = col_of_column[key] + 1
+    key_values = [r[0] for r in ws.iter_rows(min_row=2, min_col=key_col, max_col=key_col, values_only=True)]
+    row_of_key, _ = layout_from_values(header, key_values, key, column_map)
+    for col, name in add_missing_columns(header, changes, col_of_column).items():
+        ws.cell(row=1, column=col + 1, value=name)
+
+    for row, first, _, values in row_blocks(changes, row_of_key, col_of_column):
+        for offset, value in enumerate(values):
+            ws.cell(row=row, column=first + offset + 1, value=None if value == "" else value)
+    wb.save(path)
+
+
+def layout_rows(header, columns, rows, column_map=None):
+    """Places rows given in `columns` order under a sheet's header row. Columns
+    the sheet doesn't have yet are added after its last one. Returns (new
+    header cells as {0-based column: name}, rows in sheet column order)."""
+    _, col_of_column = layout_from_values(header, [], None, column_map)
+    added = {}
+    width = len(header)
+    for name in columns:
+        if name not in col_of_column:
+            col_of_column[name] = width + len(added)
+            added[col_of_column[name]] = name
+    width += len(added)
+    positions = [col_of_column[name] for name in columns]
+    laid_out = []
+    for row in rows:
+        cells = [""] * width
+        for col, value in zip(positions, row):
+            cells[col] = to_cell(value)
+        laid_out.append(cells)
+    return added, laid_out
+
+
+def append_workbook_rows(path, sheet_name, columns, rows, column_map=None):
+    """Adds rows at the end of a sheet of a local .xlsx file (creating the
+    sheet if needed), leaving the rows already there untouched."""
+    from openpyxl import load_workbook
+
+    with _workbook_lock:
+        _append_with_openpyxl(load_workbook, path, sheet_name, columns, rows, column_map)
+
+
+def replace_workbook_sheet(path, sheet_name, df):
+    """Rewrites one sheet of a local .xlsx file with `df` (other sheets are kept)"""
+    with _workbook_lock:
+        with pd.ExcelWriter(path, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def _append_with_openpyxl(load_workbook, path, sheet_name, columns, rows, column_map):
+    wb = load_workbook(path)
+    if sheet_name in wb.sheetnames:
+        ws = wb[sheet_name]
+        header = [c.value for c in next(ws.iter_rows(min_row=1, max_row=1))]
+        if all(v is None for v in header):
+            header = []
+    else:
+        ws = wb.create_sheet(sheet_name)
+        header = []
+    added, laid_out = layout_rows(header, columns, rows, column_map)
+    for col, name in added.items():
+        ws.cell(row=1, column=col + 1, value=name)
+    for cells in laid_out:
+        ws.append([None if value == "" else value for value in cells])
+    wb.save(path)
@@ -0,0 +1,232 @@
+"""Local stand-in for the Google Sheets `spreadsheets.values` API.
+
+Runs an HTTP server on localhost that understands the subset of calls made
+by `sheets_api.SheetsValuesClient`, so the Sheets code paths can be
+exercised offline:
+
+    with FakeSheetsServer({"Tasks": tasks_df}) as server:
+        api = SheetsValuesClient("test", base_url=server.base_url)
+        dm = DataManager(sheets_api=api)
+
+`server.requests` records every call with its query, body and payload
+sizes, and setting
+`server.offline = True` makes every call fail with 503.
+"""
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from sheets_api import column_letter, frame_to_values, quote_sheet, to_cell
+
+_A1_CELL = re.compile(r"^([A-Z]*)(\d*)$")
+
+
+def _col_index(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - 64)
+    return n - 1
+
+
+def parse_a1(range_):
+    """'Sheet'!B2:D9 -> (sheet, row0, col0, row1, col1); open ends are None (0-based, inclusive)"""
+    if "!" in range_:
+        sheet, cells = range_.rsplit("!", 1)
+    else:
+        sheet, cells = range_, ""
+    if sheet.startswith("'") and sheet.endswith("'"):
+        sheet = sheet[1:-1].replace("''", "'")
+    if not cells:
+        return sheet, None, None, None, None
+    start, _, end = cells.partition(":")
+    end = end or start
+    (c0, r0), (c1, r1) = _A1_CELL.match(start).groups(), _A1_CELL.match(end).groups()
+    return (
+        sheet,
+        int(r0) - 1 if r0 else None,
+        _col_index(c0) if c0 else None,
+        int(r1) - 1 if r1 else None,
+        _col_index(c1) if c1 else None,
+    )
+
+
+class FakeSpreadsheet:
+    """In-memory grid per worksheet, addressed like the real values API"""
+
+    def __init__(self, sheets=None):
+        self.sheets = {}
+        self.lock = threading.Lock()
+        for name, df in (sheets or {}).items():
+            self.sheets[name] = frame_to_values(df)
+
+    def _grid(self, sheet):
+        if sheet not in self.sheets:
+            raise KeyError(sheet)
+        return self.sheets[sheet]
+
+    def get(self, range_):
+        sheet, r0, c0, r1, c1 = parse_a1(range_)
+        grid = self._grid(sheet)
+        r0 = r0 or 0
+        r1 = len(grid) - 1 if r1 is None else r1
+        out = []
+        for row in grid[r0:r1 + 1]:
+            cells = row[(c0 or 0):(None if c1 is None else c1 + 1)]
+            while cells and cells[-1] in ("", None):
+                cells = cells[:-1]
+            out.append(list(cells))
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def update(self, range_, values):
+        sheet, r0, c0, _, _ = parse_a1(range_)
+        grid = self._grid(sheet)
+        r0, c0 = r0 or 0, c0 or 0
+        for i, row in enumerate(values):
+            while len(grid) <= r0 + i:
+                grid.append([])
+            target = grid[r0 + i]
+            while len(target) < c0 + len(row):
+                target.append("")
+            for j, value in enumerate(row):
+                target[c0 + j] = to_cell(value)
+        return sum(len(r) for r in values)
+
+    def append(self, range_, values):
+        """Inserts rows below the last non-empty row; returns the range they landed on"""
+        sheet, _, c0, _, _ = parse_a1(range_)
+        grid = self._grid(sheet)
+        c0 = c0 or 0
+        end = len(grid)
+        while end and not any(cell not in ("", None) for cell in grid[end - 1]):
+            end -= 1
+        rows = [[""] * c0 + [to_cell(v) for v in row] for row in values]
+        grid[end:end] = rows
+        width = max((len(r) for r in rows), default=c0 + 1)
+        return f"{quote_sheet(sheet)}!{column_letter(c0)}{end + 1}:{column_letter(width - 1)}{end + len(rows)}"
+
+    def clear(self, range_):
+        sheet = parse_a1(range_)[0]
+        self.sheets[sheet] = []
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeSheets/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return len(body)
+
+    def _handle(self, method):
+        fake = self.server.fake
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        url = urlparse(self.path)
+        body = json.loads(raw) if raw else {}
+        entry = {
+            "method": method, "path": unquote(url.path), "query": parse_qs(url.query), "body": body,
+            "bytes_in": len(raw), "bytes_out": 0,
+        }
+        fake.requests.append(entry)
+
+        if fake.offline:
+            entry["bytes_out"] = self._send(503, {"error": {"code": 503, "message": "offline"}})
+            return
+        match = re.match(r"^/v4/spreadsheets/([^/]+)/values(.*)$", url.path)
+        if not match:
+            entry["bytes_out"] = self._send(404, {"error": {"code": 404, "message": "not found"}})
+            return
+
+        suffix = unquote(match.group(2))
+        try:
+            with fake.spreadsheet.lock:
+                status, payload = fake.route(method, suffix, parse_qs(url.query), body)
+        except KeyError as e:
+            status, payload = 400, {"error": {"code": 400, "message": f"Unable to parse range: {e}"}}
+        entry["bytes_out"] = self._send(status, payload)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class FakeSheetsServer:
+    def __init__(self, sheets=None, spreadsheet_id="test"):
+        self.spreadsheet = FakeSpreadsheet(sheets)
+        self.spreadsheet_id = spreadsheet_id
+        self.requests = []
+        self.offline = False
+        self._httpd = None
+        self._thread = None
+
+    # --- Routing (called with the spreadsheet lock held) ---
+    def route(self, method, suffix, query, body):
+        ss = self.spreadsheet
+        if method == "GET" and suffix.startswith("/"):
+            range_ = suffix[1:]
+            return 200, {"range": range_, "majorDimension": "ROWS", "values": ss.get(range_)}
+        if method == "GET" and suffix == ":batchGet":
+            ranges = query.get("ranges", [])
+            return 200, {
+                "spreadsheetId": self.spreadsheet_id,
+                "valueRanges": [{"range": r, "majorDimension": "ROWS", "values": ss.get(r)} for r in ranges],
+            }
+        if method == "POST" and suffix == ":batchUpdate":
+            cells = 0
+            for block in body.get("data", []):
+                cells += ss.update(block["range"], block["values"])
+            return 200, {"spreadsheetId": self.spreadsheet_id, "totalUpdatedCells": cells}
+        if method == "POST" and suffix.endswith(":append"):
+            range_ = suffix[1:-len(":append")]
+            updated = ss.append(range_, body.get("values", []))
+            return 200, {
+                "spreadsheetId": self.spreadsheet_id,
+                "updates": {"updatedRange": updated, "updatedRows": len(body.get("values", []))},
+            }
+        if method == "POST" and suffix.endswith(":clear"):
+            range_ = suffix[1:-len(":clear")]
+            ss.clear(range_)
+            return 200, {"clearedRange": range_}
+        return 404, {"error": {"code": 404, "message": f"unsupported call {method} {suffix}"}}
+
+    # --- Lifecycle ---
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v4"
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._httpd.fake = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def bytes_sent(self):
+        """Total request payload received by the fake (i.e. uploaded by the client)"""
+        return sum(r["bytes_in"] for r in self.requests)
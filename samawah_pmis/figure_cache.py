@@ -0,0 +1,115 @@
+"""Process-wide LRU caches for results derived from a data snapshot.
+
+Building a figure (Plotly Express + property validation) is one of the most
+expensive steps of a rerun, and most reruns are caused by widgets that don't
+affect the charts. Results are cached under a key made of the data snapshot
+versions they were built from plus the view and filter state, so a hit is
+only possible while the data is unchanged.
+
+* `FigureCache` keeps figures serialized (`fig.to_json()`): an entry is an
+  immutable string whose size is known exactly, and every hit gets a figure
+  object of its own, rebuilt without re-running property validation, that
+  the session may change freely.
+* `ResultCache` memoizes other derived values (frames, lane tables). These
+  are shared between sessions as they are: treat them as read-only and
+  hand out `df.copy(deep=False)` views.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def estimate_size(value):
+    """Approximate memory footprint in bytes"""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(v) for v in value)
+    return 64
+
+
+class ResultCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=512):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._entries = OrderedDict()  # key -> (size, value)
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, builder, versions=()):
+        """Returns the cached value for (`key`, `versions`), or `builder()`'s result
+        (then cached). Nothing is cached while a version is None (e.g. a sheet that
+        isn't loaded yet)."""
+        if any(v is None for v in versions):
+            return builder()
+        key = (key, tuple(versions))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+        value = builder()
+        size = estimate_size(value)
+        with self._lock:
+            self.stats["misses"] += 1
+            if size > self.max_bytes:
+                return value
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[0]
+            self._entries[key] = (size, value)
+            self.bytes += size
+            while self.bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (old_size, _) = self._entries.popitem(last=False)
+                self.bytes -= old_size
+                self.stats["evictions"] += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FigureCache(ResultCache):
+    def get_or_build(self, key, builder, versions=()):
+        """A new go.Figure equal to the one `builder()` returns, built at most once
+        per (`key`, `versions`)"""
+        if any(v is None for v in versions):
+            return builder()
+        spec = super().get_or_build(key, lambda: builder().to_json(), versions)
+        import plotly.graph_objects as go
+        # The JSON came out of a validated figure: no need to validate it again
+        return go.Figure(json.loads(spec), _validate=False)
+
+
+# --- Process-wide singletons ---
+_figure_cache = None
+_result_cache = None
+_figure_lock = threading.Lock()
+
+
+def get_figure_cache(max_mb=64):
+    global _figure_cache
+    if _figure_cache is None:
+        with _figure_lock:
+            if _figure_cache is None:
+                _figure_cache = FigureCache(max_bytes=int(max_mb * 1024 * 1024))
+    return _figure_cache
+
+
+def get_result_cache(max_mb=64):
+    global _result_cache
+    if _result_cache is None:
+        with _figure_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache(max_bytes=int(max_mb * 1024 * 1024))
+    return _result_cache
@@ -0,0 +1,189 @@
+"""Brand font pipeline.
+
+The TTFs in fonts/ are ~1.5 MB together. Rather than inlining them as
+base64 in the page CSS on every rerun, they are subset to the glyphs the UI
+uses (Arabic + Latin), converted to WOFF2 and written to static/fonts/ under
+content-hashed names, so the CSS only carries short URLs and the browser
+downloads each font once and revalidates it by ETag afterwards. A changed
+TTF gets a new file name, so stale copies are never served.
+
+Static serving needs `server.enableStaticServing = true` (see
+.streamlit/config.toml); without it the inline base64 CSS is used, built
+once per process. Subsetting needs fontTools with brotli
+(`pip install fonttools[woff]`); without it the full TTFs are served as-is.
+
+Assets are built on first use; run `python fonts.py` to build them ahead of
+time, e.g. on a read-only deployment. Subsetting takes seconds, so with
+`wait=False` font_css() builds in the background and returns FALLBACK_CSS
+(Cairo) until the CSS is ready: a fresh container paints at once. A failed
+background build isn't retried by every rerun; font_css() raises its error
+from then on, until the process restarts.
+"""
+import base64
+import hashlib
+import os
+import shutil
+import threading
+
+# Glyphs the UI needs: Latin, Arabic (+ presentation forms), punctuation
+UNICODES = (
+    list(range(0x0020, 0x007F))     # Basic Latin
+    + list(range(0x00A0, 0x0100))   # Latin-1 Supplement
+    + list(range(0x0600, 0x0700))   # Arabic
+    + list(range(0x0750, 0x0780))   # Arabic Supplement
+    + list(range(0x2000, 0x2070))   # General Punctuation (incl. ZWJ/ZWNJ, RLM)
+    + list(range(0xFB50, 0xFE00))   # Arabic Presentation Forms-A
+    + list(range(0xFE70, 0xFF00))   # Arabic Presentation Forms-B
+)
+
+FONT_FACES = {
+    "SamawahBold": "samawah-bold.ttf",
+    "SamawahMedium": "samawah-medium.ttf",
+    "SamawahRegular": "samawah-regular.ttf",
+}
+
+# Where Streamlit serves <app dir>/static/ from
+STATIC_URL = "app/static/fonts"
+
+# Bumped whenever the subsetting options change, so assets get rebuilt
+PIPELINE_VERSION = "1"
+
+# Served while the brand fonts are being built, or if they can't be
+FALLBACK_CSS = "@import url('https://fonts.googleapis.com/css2?family=Cairo:wght@400;600;700&display=swap');"
+
+_lock = threading.Lock()
+_css = {}
+_building = set()
+_failed = {}  # key -> exception of the background build
+
+
+def _digest(path):
+    h = hashlib.sha1(PIPELINE_VERSION.encode())
+    with open(path, "rb") as f:
+        h.update(f.read())
+    return h.hexdigest()[:10]
+
+
+def subset_to_woff2(src, dest):
+    """Writes the UI glyph subset of `src` as WOFF2 (raises ImportError without fontTools)"""
+    from fontTools import subset
+
+    options = subset.Options()
+    options.flavor = "woff2"
+    # Keep every OpenType feature: Arabic shaping lives in GSUB (init/medi/fina/rlig)
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    font = subset.load_font(src, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=UNICODES)
+    subsetter.subset(font)
+    tmp = dest + ".tmp"
+    subset.save_font(font, tmp, options)
+    os.replace(tmp, dest)
+
+
+def build_web_font(src, out_dir):
+    """Returns (file name, css format) of the static asset for `src`, building it if needed"""
+    stem = os.path.splitext(os.path.basename(src))[0]
+    digest = _digest(src)
+    os.makedirs(out_dir, exist_ok=True)
+    woff2 = f"{stem}.{digest}.woff2"
+    if os.path.exists(os.path.join(out_dir, woff2)):
+        return woff2, "woff2"
+    try:
+        subset_to_woff2(src, os.path.join(out_dir, woff2))
+        asset, fmt = woff2, "woff2"
+    except ImportError:
+        asset, fmt = f"{stem}.{digest}.ttf", "truetype"
+        if not os.path.exists(os.path.join(out_dir, asset)):
+            shutil.copyfile(src, os.path.join(out_dir, asset))
+    # Drop assets built from older versions of this font
+    for name in os.listdir(out_dir):
+        if name.startswith(stem + ".") and name != asset and not name.endswith(".tmp"):
+            os.remove(os.path.join(out_dir, name))
+    return asset, fmt
+
+
+def _face(family, src):
+    return f"""
+    @font-face {{
+        font-family: '{family}';
+        src: {src};
+        font-display: swap;
+    }}"""
+
+
+def static_font_css(fonts_dir, static_dir, url=STATIC_URL):
+    faces = []
+    for family, file_name in FONT_FACES.items():
+        asset, fmt = build_web_font(os.path.join(fonts_dir, file_name), static_dir)
+        faces.append(_face(family, f"url('{url}/{asset}') format('{fmt}')"))
+    return "".join(faces)
+
+
+def inline_font_css(fonts_dir):
+    faces = []
+    for family, file_name in FONT_FACES.items():
+        with open(os.path.join(fonts_dir, file_name), "rb") as f:
+            data = base64.b64encode(f.read()).decode()
+        faces.append(_face(family, f"url(data:font/ttf;base64,{data}) format('truetype')"))
+    return "".join(faces)
+
+
+def font_css(fonts_dir, static_dir, static_serving=True, wait=True):
+    """@font-face rules for the brand fonts, built once per process.
+    Uses static URLs when `static_serving`, inline base64 otherwise.
+    With `wait=False`, returns FALLBACK_CSS while the build runs in the
+    background, and raises the error it failed with."""
+    key = (fonts_dir, static_dir, bool(static_serving))
+    css = _css.get(key)
+    if css is not None:
+        return css
+    if not wait:
+        with _lock:
+            if key in _failed:
+                raise _failed[key]
+            if key not in _css and key not in _building:
+                _building.add(key)
+                threading.Thread(target=_build_in_background, args=key, daemon=True).start()
+        return _css.get(key) or FALLBACK_CSS
+    with _lock:
+        css = _css.get(key)
+        if css is None:
+            css = static_font_css(fonts_dir, static_dir) if static_serving else inline_font_css(fonts_dir)
+            _css[key] = css
+    return css
+
+
+def _build_in_background(fonts_dir, static_dir, static_serving):
+    key = (fonts_dir, static_dir, static_serving)
+    try:
+        font_css(fonts_dir, static_dir, static_serving)
+    except Exception as e:
+        # Reported by the next font_css(wait=False) instead of rebuilt on every rerun
+        with _lock:
+            _failed[key] = e
+    finally:
+        with _lock:
+            _building.discard(key)
+
+
+def default_dirs():
+    """(fonts dir, static fonts dir) for this checkout"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    # The fonts are outside the samawah_pmis folder in the root directory
+    fonts_dir = os.path.join(os.path.dirname(current_dir), "fonts")
+    # Fallback in case the structure changes during deployment
+    if not os.path.exists(fonts_dir):
+        fonts_dir = os.path.join(current_dir, "fonts")
+    return fonts_dir, os.path.join(current_dir, "static", "fonts")
+
+
+if __name__ == "__main__":
+    fonts_dir, static_dir = default_dirs()
+    for file_name in FONT_FACES.values():
+        src = os.path.join(fonts_dir, file_name)
+        asset, fmt = build_web_font(src, static_dir)
+        size = os.path.getsize(os.path.join(static_dir, asset))
+        print(f"{file_name}: {os.path.getsize(src) // 1024} KB -> {asset} ({fmt}, {size // 1024} KB)")
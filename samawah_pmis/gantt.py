@@ -0,0 +1,158 @@
+"""Gantt chart engine for the "مخطط جانت" view.
+
+px.timeline draws one bar per task and one trace per status, and the view
+used to size the figure by task count, so a large portfolio produced a
+megabyte figure. Here the level of detail follows what fits on screen:
+
+* tasks are limited to a date window (bars are clipped to it),
+* past `max_bars` task bars the chart collapses to one bar per section
+  (Task) or owner, spanning its tasks; below that, the owner view draws
+  every task's bar in its owner's lane,
+* lanes are paged, `lanes_per_page` at a time,
+* all bars of a page are one go.Bar trace.
+
+So the figure never holds more than `max_bars` bars on `lanes_per_page`
+lanes, whatever the number of tasks. Tasks with a `critical` flag (schedule.py) are outlined;
+a grouped lane is critical when one of its tasks is.
+"""
+import pandas as pd
+
+from status import STATUS_COMPLETED, STATUS_OTHER
+
+MAX_BARS = 200
+LANES_PER_PAGE = 40
+ROW_HEIGHT = 28
+CRITICAL_COLOR = "#e74c3c"
+
+# Level of detail
+LEVEL_TASKS = "tasks"
+LEVEL_SECTIONS = "sections"
+LEVEL_OWNERS = "owners"
+LEVEL_OWNER_SPANS = "owner_spans"
+
+
+def clip_window(tasks, window_start=None, window_end=None):
+    """Tasks overlapping [window_start, window_end], with bars clipped to it"""
+    tasks = tasks.dropna(subset=["start", "end"])
+    if window_start is not None:
+        window_start = pd.Timestamp(window_start)
+        tasks = tasks[tasks["end"] >= window_start]
+        tasks = tasks.assign(start=tasks["start"].clip(lower=window_start))
+    if window_end is not None:
+        window_end = pd.Timestamp(window_end)
+        tasks = tasks[tasks["start"] <= window_end]
+        tasks = tasks.assign(end=tasks["end"].clip(upper=window_end))
+    return tasks
+
+
+def _lane_status(codes):
+    """A lane is done when all its tasks are, otherwise it takes its most common open status"""
+    codes = codes.dropna()
+    if codes.empty:
+        return STATUS_OTHER
+    open_codes = codes[codes != STATUS_COMPLETED]
+    if open_codes.empty:
+        return STATUS_COMPLETED
+    return int(open_codes.value_counts().index[0])
+
+
+def build_lanes(tasks, level, max_bars=MAX_BARS):
+    """Returns (lanes, level). `tasks` needs start/end/Task/Sub_Task/Owner and a
+    `status_code` column; lanes have label/start/end/count/status_code/critical and
+    a hover `detail` (the owner of a task bar, the task of a bar in an owner lane)."""
+    if "critical" not in tasks.columns:
+        tasks = tasks.assign(critical=False)
+    if level == LEVEL_TASKS and len(tasks) > max_bars:
+        # Too many bars to read: one lane per section instead
+        level = LEVEL_SECTIONS
+    elif level == LEVEL_OWNERS and len(tasks) > max_bars:
+        # Same for the owner lanes: one span per owner instead of a bar per task
+        level = LEVEL_OWNER_SPANS
+    if level in (LEVEL_TASKS, LEVEL_OWNERS):
+        task_label = tasks["Task"].astype(str) + " : " + tasks["Sub_Task"].astype(str)
+        owner = tasks["Owner"].astype(str)
+        lanes = pd.DataFrame({
+            # Owner lanes hold every bar of that owner, labelled by task on hover
+            "label": task_label if level == LEVEL_TASKS else owner,
+            "start": tasks["start"],
+            "end": tasks["end"],
+            "count": 1,
+            "status_code": tasks["status_code"],
+            "detail": owner if level == LEVEL_TASKS else task_label,
+            "critical": tasks["critical"].astype(bool),
+        })
+    else:
+        key = "Task" if level == LEVEL_SECTIONS else "Owner"
+        grouped = tasks.groupby(tasks[key].astype(str), sort=False)
+        lanes = grouped.agg(start=("start", "min"), end=("end", "max"), count=("start", "size"), critical=("critical", "any"))
+        lanes["status_code"] = grouped["status_code"].agg(_lane_status)
+        lanes["detail"] = ""
+        lanes = lanes.rename_axis("label").reset_index()
+        lanes["label"] = lanes["label"] + " (" + lanes["count"].astype(str) + ")"
+    return lanes.sort_values(["start", "end"], kind="stable").reset_index(drop=True), level
+
+
+def page_count(lanes, lanes_per_page=LANES_PER_PAGE):
+    return max(1, -(-lanes["label"].nunique() // lanes_per_page))
+
+
+def lane_page(lanes, page, lanes_per_page=LANES_PER_PAGE):
+    """Bars of the lanes on 1-based `page` (a lane may hold several bars); a page
+    past the end gives the last one"""
+    page = min(max(1, page), page_count(lanes, lanes_per_page))
+    first = (page - 1) * lanes_per_page
+    labels = lanes["label"].unique()[first:first + lanes_per_page]
+    if len(labels) == lanes["label"].nunique():
+        return lanes
+    return lanes[lanes["label"].isin(labels)]
+
+
+def gantt_figure(lanes, colors, labels, default_color="#95a5a6", critical_label=None):
+    """One horizontal bar trace for all lanes. `colors`/`labels` map status code -> color/name.
+    Critical lanes get an outline, with a `critical_label` legend entry."""
+    # Imported here so the rest of the app starts without Plotly
+    import plotly.graph_objects as go
+
+    codes = lanes["status_code"].tolist()
+    critical = lanes["critical"].tolist() if "critical" in lanes.columns else [False] * len(lanes)
+    # Same-day tasks still get a visible one-day bar
+    duration = (lanes["end"] - lanes["start"]).clip(lower=pd.Timedelta(days=1))
+    fig = go.Figure(go.Bar(
+        orientation="h",
+        y=lanes["label"],
+        base=lanes["start"],
+        x=duration.dt.total_seconds() * 1000,
+        marker_color=[colors.get(c, default_color) for c in codes],
+        marker_line_color=[CRITICAL_COLOR if c else "rgba(0,0,0,0)" for c in critical],
+        marker_line_width=[2 if c else 0 for c in critical],
+        customdata=list(zip(
+            lanes["start"].dt.strftime("%Y-%m-%d"),
+            lanes["end"].dt.strftime("%Y-%m-%d"),
+            [labels.get(c, "") for c in codes],
+            lanes["count"],
+            lanes["detail"],
+        )),
+        hovertemplate="%{y}<br>%{customdata[0]} → %{customdata[1]}<br>%{customdata[2]}"
+                      "<br>%{customdata[4]}<extra>%{customdata[3]}</extra>",
+        showlegend=False,
+    ))
+    # Legend entries only (no data points)
+    for code in dict.fromkeys(codes):
+        fig.add_trace(go.Scatter(
+            x=[None], y=[None], mode="markers", name=labels.get(code, ""),
+            marker=dict(size=10, symbol="square", color=colors.get(code, default_color)),
+        ))
+    if critical_label and any(critical):
+        fig.add_trace(go.Scatter(
+            x=[None], y=[None], mode="markers", name=critical_label,
+            marker=dict(size=10, symbol="square-open", color=CRITICAL_COLOR, line=dict(width=2)),
+        ))
+    fig.update_layout(
+        template="plotly_white",
+        height=max(300, lanes["label"].nunique() * ROW_HEIGHT + 80),
+        xaxis=dict(type="date", title=None, showgrid=True),
+        # First lane at the top
+        yaxis=dict(autorange="reversed", title=None, type="category"),
+        bargap=0.3,
+    )
+    return fig
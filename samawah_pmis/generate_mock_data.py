@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
@@ -92,15 +93,176 @@ def create_real_data():
     users = pd.DataFrame([{"Username": "admin", "Name": "Awad", "Role": "Admin"}])
     docs = pd.DataFrame([{"Doc_ID": "D1", "Project_ID": "P_REPORTS", "Name": "Design Doc", "Link_URL": "#"}])
 
-    with pd.ExcelWriter("mock_data.xlsx") as writer:
-        projects.to_excel(writer, sheet_name="Projects", index=False)
-        tasks.to_excel(writer, sheet_name="Tasks", index=False)
-        config.to_excel(writer, sheet_name="Config", index=False)
-        challenges.to_excel(writer, sheet_name="Challenges", index=False)
-        users.to_excel(writer, sheet_name="App_Users", index=False)
-        docs.to_excel(writer, sheet_name="Documents", index=False)
+    write_workbook({
+        "Projects": projects,
+        "Tasks": tasks,
+        "Config": config,
+        "Challenges": challenges,
+        "App_Users": users,
+        "Documents": docs,
+    }, "mock_data.xlsx")
 
     print("Successfully updated with Arabic Reporting Platform data!")
 
+
+def write_workbook(sheets, path):
+    """Writes {sheet_name: df} to an xlsx workbook, one worksheet per frame"""
+    with pd.ExcelWriter(path) as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+# --- Synthetic data at scale (benchmarks, load testing) ---
+SECTIONS = ["البحث", "معالجة البيانات", "المحتوى", "التصاميم", "القانون", "البرمجة", "الشراكات", "إدارة المستخدمين", "ما قبل الإطلاق"]
+ACTIONS = ["مراجعة", "تصميم", "كتابة", "برمجة", "التواصل مع", "توقيع", "تجهيز", "اختبار", "نشر", "تحليل"]
+SUBJECTS = ["التقارير", "واجهة المنصة", "المحتوى التسويقي", "الجهة القانونية", "قطاع التعليم", "قطاع الصحة", "وثائق المشروع", "تجربة المستخدم", "قاعدة البيانات", "الهوية"]
+CATEGORIES = ["Content/Writing", "Design/Execution", "General"]
+STATUSES = ["Not Started", "In Progress", "Completed"]
+RECOMMENDATION_STATUSES = ["قيد التنفيذ", "مكتمل", "معلق", "ملغي"]
+
+
+def generate_synthetic_data(projects=10, tasks_per_project=100, owners=20,
+                            recommendations_per_project=5, challenges_per_project=3,
+                            date_spread_days=365, seed=0, start_date="2026-01-01",
+                            dependency_share=0.5):
+    """Returns {sheet_name: df} shaped like the real spreadsheet, at any size.
+
+    Task dates fall within `date_spread_days` of `start_date`; statuses and
+    quantities are consistent with each other (completed tasks are done,
+    not-started ones have nothing done). About `dependency_share` of the
+    tasks depend (Depends_On) on a task of their project that ends before
+    they start. The same seed gives the same data.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start_date)
+    owner_names = [f"عضو {i + 1}" for i in range(owners)]
+    project_ids = [f"P{i + 1:04d}" for i in range(projects)]
+
+    # 1. Projects: each gets a window inside the spread
+    p_offset = rng.integers(0, max(date_spread_days // 2, 1), projects)
+    p_length = rng.integers(30, max(date_spread_days // 2, 31) + 1, projects)
+    project_start = start + pd.to_timedelta(p_offset, unit="D")
+    project_end = project_start + pd.to_timedelta(p_length, unit="D")
+    projects_df = pd.DataFrame({
+        "Project_ID": project_ids,
+        "Name": [f"مشروع {i + 1}" for i in range(projects)],
+        "Manager": rng.choice(owner_names, projects),
+        "Project_Path": "Tech/Media",
+        "Current_Stage": rng.choice(["Planning", "Execution", "Closing"], projects),
+        "Start_Date": project_start.strftime("%Y-%m-%d"),
+        "End_Date": project_end.strftime("%Y-%m-%d"),
+        "Total_Budget": rng.integers(10, 500, projects) * 1000,
+        "Description": [f"وصف المشروع {i + 1}" for i in range(projects)],
+        "Logo_URL": "",
+    })
+
+    # 2. Tasks, laid out inside their project's window
+    n = projects * tasks_per_project
+    project_idx = np.repeat(np.arange(projects), tasks_per_project)
+    offset = (rng.random(n) * p_length[project_idx]).astype(int)
+    length = rng.integers(1, 30, n)
+    task_start = project_start[project_idx] + pd.to_timedelta(offset, unit="D")
+    task_end = task_start + pd.to_timedelta(length, unit="D")
+    status_idx = rng.choice(len(STATUSES), n, p=[0.5, 0.3, 0.2])
+    quantity_total = rng.choice([1, 10, 100, 1000], n, p=[0.2, 0.3, 0.4, 0.1])
+    done_share = np.where(status_idx == 2, 1.0, np.where(status_idx == 1, rng.random(n), 0.0))
+    actions = np.array(ACTIONS)[rng.integers(0, len(ACTIONS), n)]
+    subjects = np.array(SUBJECTS)[rng.integers(0, len(SUBJECTS), n)]
+    task_ids = np.array([f"T{i + 1}" for i in range(n)])
+
+    # Dependencies: one of the last tasks of the same project to end before the task starts
+    days = lambda dates: (dates - start).days.to_numpy()
+    end_key = project_idx * 10 ** 6 + days(task_end)
+    by_end = np.argsort(end_key, kind="stable")
+    first = np.searchsorted(end_key[by_end], project_idx * 10 ** 6)
+    pick = np.searchsorted(end_key[by_end], project_idx * 10 ** 6 + days(task_start)) - rng.integers(1, 10, n)
+    linked = (pick >= first) & (rng.random(n) < dependency_share)
+    depends_on = np.where(linked, task_ids[by_end[np.clip(pick, 0, None)]], "")
+
+    tasks_df = pd.DataFrame({
+        "Task_ID": task_ids,
+        "Project_ID": np.array(project_ids)[project_idx],
+        "Task": np.array(SECTIONS)[rng.integers(0, len(SECTIONS), n)],
+        "Sub_Task": pd.Series(actions) + " " + pd.Series(subjects) + " " + pd.Series(np.arange(1, n + 1)).astype(str),
+        "Task_Category": np.array(CATEGORIES)[rng.integers(0, len(CATEGORIES), n)],
+        "Owner": np.array(owner_names)[rng.integers(0, owners, n)],
+        "Start_Date": task_start.strftime("%Y-%m-%d"),
+        "End_Date": task_end.strftime("%Y-%m-%d"),
+        "Cost": np.where(rng.random(n) < 0.1, rng.integers(1, 50, n) * 500, 0),
+        "Quantity_Total": quantity_total,
+        "Quantity_Done": (quantity_total * done_share).astype(int),
+        "Status": np.array(STATUSES)[status_idx],
+        "Depends_On": depends_on,
+    })
+
+    # 3. Config (Dropdowns)
+    config_df = pd.DataFrame(
+        [["Team_Member", name] for name in owner_names] + [["Task_Category", c] for c in CATEGORIES],
+        columns=["Type", "Value"],
+    )
+
+    # 4. Challenges and meeting recommendations, per project
+    c = projects * challenges_per_project
+    c_project = np.repeat(project_ids, challenges_per_project)
+    challenges_df = pd.DataFrame({
+        "Challenge_ID": [f"C{i + 1}" for i in range(c)],
+        "Project_ID": c_project,
+        "Description": [f"تحدي {i + 1}: تأخر {SUBJECTS[i % len(SUBJECTS)]}" for i in range(c)],
+        "Status": rng.choice(["Open", "Closed"], c),
+        "Owner": rng.choice(owner_names, c),
+        "Resolution_Plan": rng.choice(["تصعيد للادارة", "إعادة جدولة", "زيادة الموارد"], c),
+        "Risk_Impact": rng.choice(["Low", "Medium", "High"], c),
+        "Risk_Type": rng.choice(["Legal", "Technical", "Financial"], c),
+    })
+    r = projects * recommendations_per_project
+    r_dates = start + pd.to_timedelta(rng.integers(0, max(date_spread_days, 1), r), unit="D")
+    recommendations_df = pd.DataFrame({
+        "Project_ID": np.repeat(project_ids, recommendations_per_project),
+        "Date": r_dates.strftime("%Y-%m-%d"),
+        "Recommendation": [f"توصية {i + 1}: {ACTIONS[i % len(ACTIONS)]} {SUBJECTS[i % len(SUBJECTS)]}" for i in range(r)],
+        "Owner": rng.choice(owner_names, r),
+        "Status": rng.choice(RECOMMENDATION_STATUSES, r),
+        "Created_At": r_dates.strftime("%Y-%m-%d 09:00"),
+    })
+
+    return {
+        "Projects": projects_df,
+        "Tasks": tasks_df,
+        "Config": config_df,
+        "Challenges": challenges_df,
+        "App_Users": pd.DataFrame([{"Username": "admin", "Name": "Awad", "Role": "Admin"}]),
+        "Documents": pd.DataFrame({
+            "Doc_ID": [f"D{i + 1}" for i in range(projects)],
+            "Project_ID": project_ids,
+            "Name": "Design Doc",
+            "Link_URL": "#",
+        }),
+        "MeetingRecommendations": recommendations_df,
+    }
+
+
 if __name__ == "__main__":
-    create_real_data()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Writes mock_data.xlsx, or a synthetic workbook of any size")
+    parser.add_argument("--synthetic", action="store_true", help="generate synthetic data instead of the real project")
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--tasks-per-project", type=int, default=100)
+    parser.add_argument("--owners", type=int, default=20)
+    parser.add_argument("--recommendations", type=int, default=5, help="meeting recommendations per project")
+    parser.add_argument("--challenges", type=int, default=3, help="challenges per project")
+    parser.add_argument("--date-spread", type=int, default=365, help="days the task dates spread over")
+    parser.add_argument("--dependencies", type=float, default=0.5, help="share of tasks with a Depends_On link")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="mock_data.xlsx")
+    args = parser.parse_args()
+    if args.synthetic:
+        sheets = generate_synthetic_data(
+            projects=args.projects, tasks_per_project=args.tasks_per_project, owners=args.owners,
+            recommendations_per_project=args.recommendations, challenges_per_project=args.challenges,
+            date_spread_days=args.date_spread, seed=args.seed, dependency_share=args.dependencies,
+        )
+        write_workbook(sheets, args.out)
+        print(f"Wrote {len(sheets['Tasks'])} tasks in {len(sheets['Projects'])} projects to {args.out}")
+    else:
+        create_real_data()
@@ -0,0 +1,214 @@
+"""In-process metrics for the data layer and the views.
+
+Counters and latency histograms are kept per (name, labels) in one
+process-wide registry:
+
+    with get_metrics().timer("sheet_load_seconds", sheet="Tasks", source="sheets"):
+        ...
+    get_metrics().incr("sheet_fallbacks_total", sheet="Tasks", to="mirror")
+
+The Settings view renders a summary; `to_prometheus()` / `export()` give
+the Prometheus text format for scraping from a file (`[metrics] export_path`
+in secrets). Values that already live elsewhere (cache hit counts, queue
+length) are pulled in at export time through `register_collector`.
+
+With `enabled = False` every call returns straight away and `timer()`
+hands back a shared no-op context manager, so instrumented code pays one
+attribute check.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Latency buckets (seconds), upper bounds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (capped at the max seen)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+class _Timer:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        if exc_type is not None:
+            self.registry.incr("errors_total", **{**self.labels, "timer": self.name})
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.collectors = []
+        self.started_at = time.time()
+        self.last_export = 0.0
+
+    def incr(self, name, n=1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(value)
+
+    def timer(self, name, **labels):
+        """Context manager observing the block's duration (and counting errors it raises)"""
+        if not self.enabled:
+            return _NOOP
+        return _Timer(self, name, labels)
+
+    def register_collector(self, name, collector):
+        """`collector() -> {metric name: value or {labels tuple: value}}`, read at export time"""
+        with self.lock:
+            self.collectors = [(n, c) for n, c in self.collectors if n != name] + [(name, collector)]
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started_at = time.time()
+
+    # --- Reading ---
+    def gauges(self):
+        out = {}
+        for _, collector in list(self.collectors):
+            try:
+                out.update(collector())
+            except Exception:
+                pass
+        return out
+
+    def summary(self):
+        """Rows for display: one per histogram series"""
+        with self.lock:
+            items = list(self.histograms.items())
+        rows = []
+        for (name, labels), hist in sorted(items):
+            rows.append({
+                "metric": name,
+                **dict(labels),
+                "count": hist.count,
+                "avg_ms": round(hist.sum / hist.count * 1000, 1) if hist.count else None,
+                "p50_ms": round(hist.quantile(0.5) * 1000, 1),
+                "p95_ms": round(hist.quantile(0.95) * 1000, 1),
+                "max_ms": round(hist.max * 1000, 1),
+            })
+        return rows
+
+    def counter_rows(self):
+        with self.lock:
+            items = list(self.counters.items())
+        return [{"metric": name, **dict(labels), "value": value} for (name, labels), value in sorted(items)]
+
+    def to_prometheus(self, prefix="samawah_"):
+        lines = []
+
+        def labels_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in pairs) + "}"
+
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+        for (name, labels), value in counters:
+            lines.append(f"{prefix}{name}{labels_text(labels)} {value}")
+        for (name, labels), hist in histograms:
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), hist.counts):
+                cumulative += n
+                lines.append(f"{prefix}{name}_bucket{labels_text(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{prefix}{name}_sum{labels_text(labels)} {hist.sum}")
+            lines.append(f"{prefix}{name}_count{labels_text(labels)} {hist.count}")
+        for name, value in sorted(self.gauges().items()):
+            if isinstance(value, dict):
+                for labels, v in value.items():
+                    lines.append(f"{prefix}{name}{labels_text(labels)} {v}")
+            else:
+                lines.append(f"{prefix}{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        return json.dumps({
+            "started_at": self.started_at,
+            "counters": self.counter_rows(),
+            "latency": self.summary(),
+            "gauges": {k: v for k, v in self.gauges().items() if not isinstance(v, dict)},
+        }, ensure_ascii=False, default=str)
+
+    def export(self, path):
+        """Writes the Prometheus text (or JSON for a .json path) atomically"""
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+# --- Process-wide registry ---
+_metrics = Metrics()
+
+
+def get_metrics():
+    return _metrics
@@ -0,0 +1,171 @@
+"""Local mirror of the Google Sheets data.
+
+Every sheet successfully downloaded from Sheets, and every sheet the app
+saves, is copied into a small SQLite file. When Sheets can't be reached the
+app reads the mirror - the last data it actually saw - instead of the
+bundled mock_data.xlsx, and a cold start serves the mirror at once while the
+real data is fetched in the background.
+
+Sheets are stored as values (header row first, see sheets_api), exactly as
+the values API returns them, so a mirrored sheet goes through the same
+normalization as a downloaded one.
+
+Cell-level saves and appended rows don't re-encode the whole sheet: they are
+added to a patch log next to the last full snapshot (save_cells/save_rows)
+and applied when the sheet is read back. The next full save of the sheet,
+or reading it, folds the log into the snapshot. Patches name columns the
+way the app does; `column_map` (sheet header -> app name) finds them in a
+downloaded sheet that kept its own headers (e.g. "القسم" for "Task").
+"""
+import json
+import sqlite3
+import threading
+import time
+
+from sheets_api import frame_to_values, values_to_frame
+
+
+class LocalMirror:
+    def __init__(self, path, column_map=None):
+        self.path = path
+        self.column_map = dict(column_map or {})
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self._saved = {}  # sheet_name -> frame last written
+        with self.lock:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS sheets (
+                    sheet TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    saved_at REAL NOT NULL
+                )""")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS patches (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sheet TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL
+                )""")
+            self.conn.commit()
+
+    def save(self, sheet_name, df, values=None):
+        """Full snapshot of a sheet; `values` is frame_to_values(df) if the caller
+        already has it"""
+        # An unchanged incremental refresh hands back the same frame: nothing to write
+        if self._saved.get(sheet_name) is df:
+            return
+        self._saved[sheet_name] = df
+        payload = json.dumps(values if values is not None else frame_to_values(df), ensure_ascii=False, default=str)
+        with self.lock:
+            self._write_snapshot(sheet_name, payload)
+            self.conn.commit()
+
+    def _write_snapshot(self, sheet_name, payload):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sheets (sheet, payload, saved_at) VALUES (?, ?, ?)",
+            (sheet_name, payload, time.time()),
+        )
+        self.conn.execute("DELETE FROM patches WHERE sheet = ?", (sheet_name,))
+
+    def save_cells(self, sheet_name, key, cells):
+        """Logs edited cells, `cells` being [[key, column, value], ...] as sent to Sheets"""
+        self._log(sheet_name, "cells", {"key": key, "cells": cells})
+
+    def save_rows(self, sheet_name, values):
+        """Logs appended rows, `values` being their header row first"""
+        self._log(sheet_name, "rows", values)
+
+    def _log(self, sheet_name, kind, patch):
+        self._saved.pop(sheet_name, None)
+        payload = json.dumps(patch, ensure_ascii=False, default=str)
+        with self.lock:
+            # Without a snapshot there is nothing to patch
+            self.conn.execute(
+                "INSERT INTO patches (sheet, kind, payload) SELECT ?, ?, ? WHERE EXISTS "
+                "(SELECT 1 FROM sheets WHERE sheet = ?)",
+                (sheet_name, kind, payload, sheet_name),
+            )
+            self.conn.execute("UPDATE sheets SET saved_at = ? WHERE sheet = ?", (time.time(), sheet_name))
+            self.conn.commit()
+
+    def load(self, sheet_name):
+        """The mirrored frame, or None if the sheet was never mirrored"""
+        with self.lock:
+            row = self.conn.execute("SELECT payload FROM sheets WHERE sheet = ?", (sheet_name,)).fetchone()
+            if row is None:
+                return None
+            values = json.loads(row[0])
+            patches = self.conn.execute(
+                "SELECT kind, payload FROM patches WHERE sheet = ? ORDER BY id", (sheet_name,)
+            ).fetchall()
+            if patches:
+                values = _apply_patches(
+                    values, [(kind, json.loads(payload)) for kind, payload in patches], self.column_map
+                )
+                self._write_snapshot(sheet_name, json.dumps(values, ensure_ascii=False, default=str))
+                self.conn.commit()
+        return values_to_frame(values)
+
+    def saved_at(self, sheet_name):
+        with self.lock:
+            row = self.conn.execute("SELECT saved_at FROM sheets WHERE sheet = ?", (sheet_name,)).fetchone()
+        return None if row is None else row[0]
+
+
+def _apply_patches(values, patches, column_map=None):
+    """`values` (header row first) with logged cell edits and appends applied in order"""
+    header = list(values[0]) if values else []
+    rows = [list(r) for r in values[1:]]
+    positions = {}  # key column -> {str(key): row index}
+    column_map = column_map or {}
+
+    def find(name):
+        if name in header:
+            return header.index(name)
+        return next((i for i, h in enumerate(header) if column_map.get(h) == name), None)
+
+    def column(name):
+        col = find(name)
+        if col is None:
+            header.append(name)
+            col = len(header) - 1
+        return col
+
+    for kind, patch in patches:
+        if kind == "rows":
+            if not patch:
+                continue
+            cols = [column(name) for name in patch[0]]
+            for values_row in patch[1:]:
+                row = [""] * len(header)
+                for col, value in zip(cols, values_row):
+                    row[col] = value
+                rows.append(row)
+            positions.clear()
+            continue
+        key_col = find(patch["key"])
+        if key_col is None:
+            continue
+        if key_col not in positions:
+            positions[key_col] = {str(r[key_col]): i for i, r in enumerate(rows) if key_col < len(r)}
+        for key, name, value in patch["cells"]:
+            i = positions[key_col].get(str(key))
+            if i is None:
+                continue
+            col = column(name)
+            row = rows[i]
+            row.extend([""] * (col + 1 - len(row)))
+            row[col] = value
+    return [header] + rows
+
+
+# --- Process-wide mirror (one per file) ---
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+
+def get_local_mirror(path, column_map=None):
+    with _mirrors_lock:
+        if path not in _mirrors:
+            _mirrors[path] = LocalMirror(path, column_map)
+        return _mirrors[path]
@@ -0,0 +1,209 @@
+"""Headless rerun latency of every view, through Streamlit's app-testing API.
+
+    python rerun_benchmark.py                  # 1k/10k tasks
+    python rerun_benchmark.py --sizes 100000 --repeat 3 --fail-on-regression
+
+Each click in the app reruns app.py top to bottom; this replays the clicks
+a user makes - log in through check_password, switch views with the
+option menu, pick a project, change the Gantt grouping and filters - on a
+synthetic workbook (benchmark.dataset) and records per step:
+
+* median_ms / min_ms: wall-clock time of the rerun (after one warm-up pass),
+* peak_kb: peak Python memory allocated during the rerun (tracemalloc, in a
+  separate pass so it doesn't slow the timed ones),
+* payload_kb: size of the messages the rerun sends to the browser.
+
+Everything runs offline on the local workbook. Results go to
+rerun_results.jsonl and are compared with the latest run of another
+revision, like benchmark.py.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+import streamlit.testing.v1.local_script_runner as local_script_runner
+
+from benchmark import dataset, git_revision, load_results, previous_results, report
+from generate_mock_data import write_workbook
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rerun_results.jsonl")
+DEFAULT_SIZES = (1000, 10000)
+VIEWS = ["لوحة التحكم", "مخطط جانت", "المهام", "التحديات", "المستندات", "الاجتماعات", "الإعدادات"]
+ALL_PROJECTS = "📊 كل المشاريع"
+PASSWORD = "benchmark"
+
+
+@contextmanager
+def payload_meter():
+    """Counts the bytes of the messages each rerun emits (what the browser would receive)"""
+    sizes = []
+    parse = local_script_runner.parse_tree_from_messages
+
+    def measured(messages):
+        sizes.append(sum(m.ByteSize() for m in messages))
+        return parse(messages)
+
+    local_script_runner.parse_tree_from_messages = measured
+    try:
+        yield sizes
+    finally:
+        local_script_runner.parse_tree_from_messages = parse
+
+
+# --- Clicks ---
+def select(key, value):
+    return lambda at: at.selectbox(key=key).select(value)
+
+
+def multiselect_all(key):
+    def change(at):
+        widget = at.multiselect(key=key)
+        widget.set_value(list(widget.options))
+    return change
+
+
+def multiselect_first(key):
+    def change(at):
+        widget = at.multiselect(key=key)
+        widget.set_value(list(widget.options)[:1])
+    return change
+
+
+def steps(project_name):
+    """[(name, view, change)]: `change(at)` sets a widget of the page on screen
+    before the rerun, as a click would"""
+    out = []
+    for view in VIEWS:
+        out.append((f"{view} · all", view, select("project_selector", ALL_PROJECTS)))
+        out.append((f"{view} · project", view, select("project_selector", project_name)))
+        if view == "مخطط جانت":
+            out += [
+                (f"{view} · group=section", view, select("g_group", "القسم")),
+                (f"{view} · group=owner", view, select("g_group", "المسؤول")),
+                (f"{view} · group=tasks", view, select("g_group", "المهام")),
+                (f"{view} · status=all", view, multiselect_all("g_status")),
+                (f"{view} · owner=one", view, multiselect_first("g_owner")),
+            ]
+    return out
+
+
+def login(timeout):
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.secrets["passwords"] = {"benchmark": PASSWORD}
+    at.run()
+    at.text_input(key="password").input(PASSWORD)
+    at.run()
+    if not at.session_state["password_correct"]:
+        raise RuntimeError("login through check_password failed")
+    return at
+
+
+def rerun(at, view, change):
+    if change is not None:
+        change(at)
+    # option_menu has no frontend here: switch views through its manual_select
+    at.session_state["nav_view"] = VIEWS.index(view)
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"{view}: {at.exception[0].value}")
+    return elapsed
+
+
+def use_dataset(size, workdir):
+    """Makes a directory holding a synthetic mock_data.xlsx (which app.py reads
+    from the working directory) the working directory; returns the sheets"""
+    sheets = dataset(size)
+    size_dir = os.path.join(workdir, f"app_{size}")
+    os.makedirs(size_dir, exist_ok=True)
+    os.chdir(size_dir)
+    if not os.path.exists("mock_data.xlsx"):
+        write_workbook(sheets, "mock_data.xlsx")
+    return sheets
+
+
+def run_size(size, repeat, workdir, timeout):
+    sheets = use_dataset(size, workdir)
+    plan = steps(sheets["Projects"]["Name"].iloc[0])
+
+    at = login(timeout)
+    for _, view, change in plan:  # warm-up: first loads, index and figure builds
+        rerun(at, view, change)
+    timings = {name: [] for name, _, _ in plan}
+    with payload_meter() as sizes:
+        for _ in range(repeat):
+            for name, view, change in plan:
+                timings[name].append(rerun(at, view, change))
+        payloads = dict(zip((name for name, _, _ in plan), sizes[-len(plan):]))
+    peaks = {}
+    tracemalloc.start()
+    try:
+        for name, view, change in plan:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            rerun(at, view, change)
+            peaks[name] = max(tracemalloc.get_traced_memory()[1] - base, 0)
+    finally:
+        tracemalloc.stop()
+    return {
+        name: {
+            "median_ms": round(statistics.median(samples) * 1000, 2),
+            "min_ms": round(min(samples) * 1000, 2),
+            "peak_kb": round(peaks[name] / 1024, 1),
+            "payload_kb": round(payloads[name] / 1024, 1),
+        }
+        for name, samples in timings.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="task counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".benchmark"))
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--threshold", type=float, default=1.25, help="growth ratio reported as a regression")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds a single rerun may take")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    results_path = os.path.abspath(args.results)
+    workdir = os.path.abspath(args.workdir)
+    revision = git_revision()
+    run_id = datetime.now().isoformat(timespec="seconds")
+    records = []
+    for size in args.sizes:
+        for case, values in run_size(size, args.repeat, workdir, args.timeout).items():
+            records.append({
+                "run": run_id, "revision": revision, "source": "app", "size": size, "case": case,
+                **values, "repeat": args.repeat, "python": sys.version.split()[0], "pandas": pd.__version__,
+            })
+
+    previous = previous_results(load_results(results_path), revision, "app")
+    regressions = report(
+        records, previous, args.threshold,
+        columns=("median_ms", "min_ms", "peak_kb", "payload_kb"),
+        compared=("median_ms", "peak_kb", "payload_kb"),
+    )
+    with open(results_path, "a", encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    if previous:
+        print(f"\nCompared with revision {next(iter(previous.values()))['revision']}: {len(regressions)} regression(s)")
+    if regressions and args.fail_on_regression:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,427 @@
+"""Task dependencies and the critical path, per project.
+
+Tasks may list the Task_IDs they wait for in an optional `Depends_On`
+column ("T3, T7"; finish-to-start, within the same project). From the
+planned dates and these links every task gets an early start/finish
+(forward pass), a late start/finish (backward pass from the project's
+projected finish) and its total float. Tasks without float are on the
+critical path: each day they slip moves the end of the project.
+
+Dates are whole days. A task keeps its planned duration and starts no
+earlier than its planned Start_Date and than its predecessors' finish.
+Status is taken into account as of `status_date` (today): completed tasks
+keep their dates, a task that hasn't started can't start before today and
+one in progress can't finish before today, so a late task pushes its
+successors and, when it is critical, the project end.
+
+Like aggregates.py the schedule is built once per Tasks generation and
+cell saves patch it: the forward pass is redone downstream of the edited
+tasks only, the backward pass upstream of them (the whole project when its
+finish moves). An edit that changes the links rebuilds that one project.
+Dependency cycles are found while building; the links inside a cycle are
+ignored and its tasks keep their planned dates.
+"""
+import heapq
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from status import STATUS_COMPLETED, STATUS_IN_PROGRESS
+
+DEPENDS_COLUMN = "Depends_On"
+# Task ids in Depends_On: "T3, T7", "T3;T7", "T3 T7", "T3، T7"
+_SEPARATORS = re.compile(r"[,;،\s]+")
+_EPOCH = pd.Timestamp("1970-01-01")
+
+
+def task_key(value):
+    """Task_ID as a graph key: "T3", 3 and 3.0 name the same task"""
+    if value is None:
+        return None
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return None
+        if float(value).is_integer():
+            value = int(value)
+    key = str(value).strip()
+    return key or None
+
+
+def parse_depends(value):
+    """Depends_On cell -> tuple of task keys"""
+    if value is None or (isinstance(value, (float, np.floating)) and np.isnan(value)):
+        return ()
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return (task_key(value),)
+    value = str(value).strip()
+    if not value:
+        return ()
+    if _SEPARATORS.search(value) is None:
+        return (value,)
+    keys = (task_key(part) for part in _SEPARATORS.split(value))
+    return tuple(dict.fromkeys(k for k in keys if k))
+
+
+def to_day(value):
+    """Timestamp -> day number (days since 1970-01-01)"""
+    return (pd.Timestamp(value).normalize() - _EPOCH).days
+
+
+def _days(series):
+    """Day numbers of a date column, with None for missing dates"""
+    dates = pd.to_datetime(series, errors="coerce")
+    days = dates.to_numpy(dtype="datetime64[D]").astype("int64").tolist()
+    for i in np.flatnonzero(dates.isna().to_numpy()):
+        days[i] = None
+    return days
+
+
+def task_rows(df, vocab=None):
+    """(project, key, start day, duration, status code, depends) per dated task of `df`"""
+    if df.empty or "Task_ID" not in df.columns or "Project_ID" not in df.columns:
+        return []
+    statuses = vocab.codes(df["Status"]).tolist() if vocab is not None and "Status" in df.columns else [None] * len(df)
+    depends = df[DEPENDS_COLUMN].tolist() if DEPENDS_COLUMN in df.columns else [None] * len(df)
+    rows = []
+    for pid, key, start, end, status, deps in zip(
+        df["Project_ID"].tolist(), df["Task_ID"].tolist(),
+        _days(df["Start_Date"]) if "Start_Date" in df.columns else [None] * len(df),
+        _days(df["End_Date"]) if "End_Date" in df.columns else [None] * len(df),
+        statuses, depends,
+    ):
+        key = task_key(key)
+        if key is None or start is None or end is None:
+            continue
+        # End_Date is inclusive: a task from the 3rd to the 3rd takes one day
+        rows.append((pid, key, start, max(end - start + 1, 1), status, parse_depends(deps)))
+    return rows
+
+
+def _cycles(nodes, succs):
+    """Nodes on a dependency cycle (strongly connected components of more than
+    one task, or a task depending on itself), by an iterative Tarjan search"""
+    index, low, on_stack, stack, found = {}, {}, set(), [], set()
+    counter = 0
+    for root in nodes:
+        if root in index:
+            continue
+        work = [(root, iter(succs[root]))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(succs[child])))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in succs[node]:
+                    found.update(component)
+    return found
+
+
+class ProjectSchedule:
+    """Dependency graph and CPM dates of one project, in day numbers. Early/late
+    finish are exclusive (the day after the last working day)."""
+
+    def __init__(self, status_date):
+        self.status_date = status_date
+        self.start = {}      # key -> planned start
+        self.duration = {}   # key -> planned duration (days)
+        self.status = {}     # key -> status code
+        self.depends = {}    # key -> task keys as written in Depends_On
+        self.preds = {}      # key -> predecessors used for scheduling
+        self.succs = {}      # key -> successors used for scheduling
+        self.rank = {}       # key -> position in topological order
+        self.cycle = set()
+        self.unknown = 0     # links to tasks that aren't in this project
+        self.es, self.ef, self.ls, self.lf = {}, {}, {}, {}
+        self.finish = None
+
+    def copy(self):
+        """Copy safe to patch while other sessions read the original. The graph
+        (preds/succs/rank/cycle) is shared: build() replaces it, update() doesn't touch it."""
+        other = ProjectSchedule(self.status_date)
+        for name in ("start", "duration", "status", "depends", "es", "ef", "ls", "lf"):
+            setattr(other, name, dict(getattr(self, name)))
+        other.preds, other.succs, other.rank, other.cycle = self.preds, self.succs, self.rank, self.cycle
+        other.unknown = self.unknown
+        other.finish = self.finish
+        return other
+
+    @property
+    def links(self):
+        return sum(len(p) for p in self.preds.values())
+
+    def set_task(self, key, start, duration, status, depends):
+        self.start[key] = start
+        self.duration[key] = duration
+        self.status[key] = status
+        self.depends[key] = depends
+
+    # --- Full build ---
+    def build(self):
+        """Links, cycle check, topological order and both passes over every task"""
+        nodes = list(self.start)
+        succs = {k: set() for k in nodes}
+        self.unknown = 0
+        for k in nodes:
+            for p in self.depends[k]:
+                if p in succs:
+                    succs[p].add(k)
+                else:
+                    self.unknown += 1
+        order = self._topological(nodes, succs)
+        self.cycle = set()
+        if len(order) < len(nodes):
+            # Only tasks Kahn's algorithm couldn't order can be on a cycle
+            ordered = set(order)
+            rest = [k for k in nodes if k not in ordered]
+            self.cycle = _cycles(rest, {k: {c for c in succs[k] if c not in ordered} for k in rest})
+            for k in self.cycle:
+                succs[k] = {c for c in succs[k] if c not in self.cycle}
+            order = self._topological(nodes, succs)
+        self.succs = succs
+        preds = {k: [] for k in nodes}
+        for p in nodes:
+            for c in succs[p]:
+                preds[c].append(p)
+        self.preds = {k: tuple(v) for k, v in preds.items()}
+        self.rank = {k: i for i, k in enumerate(order)}
+
+        self.es, self.ef = {}, {}
+        for k in order:
+            self.es[k], self.ef[k] = self._early(k)
+        self.finish = max(self.ef.values(), default=None)
+        self._backward_all()
+        return len(order)
+
+    @staticmethod
+    def _topological(nodes, succs):
+        """Kahn's algorithm; tasks on (or after) a cycle are left out"""
+        waiting = dict.fromkeys(nodes, 0)
+        for k in nodes:
+            for c in succs[k]:
+                waiting[c] += 1
+        ready = [k for k in nodes if not waiting[k]]
+        order = []
+        while ready:
+            k = ready.pop()
+            order.append(k)
+            for c in succs[k]:
+                waiting[c] -= 1
+                if not waiting[c]:
+                    ready.append(c)
+        return order
+
+    def _early(self, k):
+        start, duration, status = self.start[k], self.duration[k], self.status[k]
+        if status == STATUS_COMPLETED or k in self.cycle:
+            return start, start + duration
+        if status == STATUS_IN_PROGRESS:
+            # Already started; it can still run late
+            return start, max(start + duration, self.status_date + 1)
+        es = max(start, self.status_date)
+        for p in self.preds[k]:
+            es = max(es, self.ef[p])
+        return es, es + duration
+
+    def _late(self, k):
+        lf = self.finish
+        for c in self.succs[k]:
+            lf = min(lf, self.ls[c])
+        return lf - (self.ef[k] - self.es[k]), lf
+
+    def _backward_all(self):
+        self.ls, self.lf = {}, {}
+        for k in sorted(self.rank, key=self.rank.get, reverse=True):
+            self.ls[k], self.lf[k] = self._late(k)
+
+    # --- Incremental update ---
+    def update(self, changed):
+        """Re-schedules after `changed` tasks got new dates/status (set_task
+        already applied). Returns how many tasks were recomputed."""
+        # Forward: downstream of the edited tasks, in topological order
+        heap = [(self.rank[k], k) for k in changed]
+        heapq.heapify(heap)
+        queued = set(changed)
+        touched = 0
+        while heap:
+            _, k = heapq.heappop(heap)
+            touched += 1
+            early = self._early(k)
+            moved = early[1] != self.ef[k]
+            self.es[k], self.ef[k] = early
+            if moved:
+                for c in self.succs[k]:
+                    if c not in queued:
+                        queued.add(c)
+                        heapq.heappush(heap, (self.rank[c], c))
+
+        finish = max(self.ef.values(), default=None)
+        if finish != self.finish:
+            # Every late date hangs off the project finish
+            self.finish = finish
+            self._backward_all()
+            return touched + len(self.rank)
+
+        # Backward: upstream of the edited tasks, in reverse topological order
+        heap = [(-self.rank[k], k) for k in changed]
+        heapq.heapify(heap)
+        queued = set(changed)
+        while heap:
+            _, k = heapq.heappop(heap)
+            touched += 1
+            late = self._late(k)
+            moved = late[0] != self.ls[k]
+            self.ls[k], self.lf[k] = late
+            if moved:
+                for p in self.preds[k]:
+                    if p not in queued:
+                        queued.add(p)
+                        heapq.heappush(heap, (-self.rank[p], p))
+        return touched
+
+    # --- Reading ---
+    def is_critical(self, k):
+        return (
+            self.status[k] != STATUS_COMPLETED
+            and k not in self.cycle
+            and self.ls[k] - self.es[k] <= 0
+        )
+
+    def critical_keys(self):
+        return [k for k in self.rank if self.is_critical(k)]
+
+
+def build_schedules(rows, status_date):
+    """{Project_ID: ProjectSchedule} from task_rows()"""
+    schedules = {}
+    for pid, key, start, duration, status, depends in rows:
+        schedule = schedules.get(pid)
+        if schedule is None:
+            schedule = schedules[pid] = ProjectSchedule(status_date)
+        schedule.set_task(key, start, duration, status, depends)
+    for schedule in schedules.values():
+        schedule.build()
+    return schedules
+
+
+def schedule_frame(schedules, project_id=None):
+    """One row per scheduled task: Task_ID (as a key), Project_ID, early/late
+    start and finish (inclusive dates), total_float (days), critical, in_cycle"""
+    records = []
+    for pid, schedule in schedules.items():
+        if project_id is not None and pid != project_id:
+            continue
+        for k in schedule.rank:
+            records.append((
+                k, pid, schedule.es[k], schedule.ef[k] - 1, schedule.ls[k], schedule.lf[k] - 1,
+                schedule.status[k] == STATUS_COMPLETED, k in schedule.cycle,
+            ))
+    df = pd.DataFrame.from_records(records, columns=[
+        "Task_ID", "Project_ID", "early_start", "early_finish", "late_start", "late_finish", "completed", "in_cycle",
+    ])
+    total_float = df["late_start"] - df["early_start"]
+    df["total_float"] = total_float.where(~(df["completed"] | df["in_cycle"]))
+    df["critical"] = (total_float <= 0) & ~df["completed"] & ~df["in_cycle"]
+    for col in ("early_start", "early_finish", "late_start", "late_finish"):
+        df[col] = _EPOCH + pd.to_timedelta(df[col], unit="D")
+    return df.drop(columns=["completed"])
+
+
+class ScheduleStore:
+    """Process-wide schedules tagged with the Tasks generation (and day) they reflect"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None
+        self.status_date = None
+        self.schedules = {}
+        self.project_of = {}  # task key -> Project_ID
+        self.vocab = None
+        self.stats = {"builds": 0, "incremental_updates": 0, "project_rebuilds": 0, "tasks_recomputed": 0}
+
+    def get(self, source, vocab=None, today=None):
+        """`source("Tasks") -> (generation, df)`; rebuilds for a new generation or day"""
+        status_date = to_day(today if today is not None else pd.Timestamp.now())
+        generation, df = source("Tasks")
+        with self.lock:
+            if generation is not None and generation == self.generation and status_date == self.status_date:
+                return self.schedules
+        # Without a Depends_On column there is no path to compute
+        rows = task_rows(df, vocab) if DEPENDS_COLUMN in df.columns else []
+        schedules = build_schedules(rows, status_date)
+        with self.lock:
+            self.generation, self.status_date, self.schedules, self.vocab = generation, status_date, schedules, vocab
+            self.project_of = {key: pid for pid, key, *_ in rows}
+            self.stats["builds"] += 1
+            self.stats["tasks_recomputed"] += len(rows)
+        return schedules
+
+    def apply_rows(self, from_generation, to_generation, old_rows, new_rows):
+        """Moves the schedules from one Tasks generation to the next given the rows
+        that changed (as they were, and as they are now)."""
+        with self.lock:
+            if self.generation != from_generation or from_generation is None:
+                return False
+            old = {row[1]: row for row in task_rows(old_rows, self.vocab)}
+            new = {row[1]: row for row in task_rows(new_rows, self.vocab)}
+            schedules = dict(self.schedules)
+            edits = {}
+            for key in set(old) | set(new):
+                row = new.get(key)
+                pid = self.project_of.get(key)
+                if row is None or pid is None or row[0] != pid:
+                    # Task gained/lost its dates or moved project: not a cell-level change
+                    return False
+                edits.setdefault(pid, []).append(row)
+            recomputed = 0
+            for pid, rows in edits.items():
+                # Copy before patching: other sessions may be reading the old one
+                schedule = schedules[pid] = schedules[pid].copy()
+                relinked = any(schedule.depends[key] != depends for _, key, _, _, _, depends in rows)
+                for _, key, start, duration, status, depends in rows:
+                    schedule.set_task(key, start, duration, status, depends)
+                if relinked:
+                    recomputed += schedule.build()
+                    self.stats["project_rebuilds"] += 1
+                else:
+                    recomputed += schedule.update({key for _, key, *_ in rows})
+            self.schedules = schedules
+            self.generation = to_generation
+            self.stats["incremental_updates"] += 1
+            self.stats["tasks_recomputed"] += recomputed
+            return True
+
+
+_store = ScheduleStore()
+
+
+def get_schedule_store():
+    return _store
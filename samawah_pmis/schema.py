@@ -0,0 +1,109 @@
+"""Declared column types per sheet, applied once when a sheet is loaded.
+
+Sheets arrive as strings/floats whatever their content. Typing them once at
+load time means views never re-parse dates, quantities take a fraction of
+the memory, and repeated text (owners, sections, project ids) is stored as
+categoricals. Columns not listed here are left as they are. The Tasks
+Status column is encoded separately by status.py.
+
+Frames in the shared cache are handed to sessions as shallow copy-on-write
+views, so reading them costs nothing and a view that modifies its frame
+gets its own copy instead of corrupting the cache.
+"""
+import numpy as np
+import pandas as pd
+
+# Copy-on-write is always on from pandas 3; turn it on for 2.x
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# kind: "date" -> datetime64, "number" -> smallest integer type (float if fractional),
+# "category" -> categorical
+SCHEMAS = {
+    "Projects": {
+        "Project_ID": "category",
+        "Start_Date": "date",
+        "End_Date": "date",
+        "Total_Budget": "number",
+    },
+    "Tasks": {
+        "Project_ID": "category",
+        "Task": "category",
+        "Category": "category",
+        "Owner": "category",
+        "Start_Date": "date",
+        "End_Date": "date",
+        "Cost": "number",
+        "Quantity_Total": "number",
+        "Quantity_Done": "number",
+    },
+    "Challenges": {
+        "Project_ID": "category",
+        "Status": "category",
+        "Owner": "category",
+        "Risk_Impact": "category",
+        "Risk_Type": "category",
+    },
+    "Documents": {"Project_ID": "category"},
+    "MeetingRecommendations": {"Project_ID": "category", "Date": "date"},
+    "Config": {"Type": "category"},
+}
+
+# Free-text columns in the data editors; see editable()
+EDITABLE_TEXT = ("Task", "Owner", "Sub_Task")
+
+
+def to_date(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    parsed = pd.to_datetime(series, errors="coerce")
+    if parsed.isna().sum() > series.isna().sum():
+        # Mixed formats (e.g. typed by hand in the sheet): parse element by element
+        parsed = pd.to_datetime(series, errors="coerce", format="mixed")
+    return parsed
+
+
+def to_number(series):
+    values = pd.to_numeric(series, errors="coerce")
+    present = values.dropna()
+    if present.empty or (present % 1 != 0).any():
+        return values
+    if len(present) == len(values):
+        return pd.to_numeric(values, downcast="integer")
+    # Integral with gaps: smallest nullable integer type that fits
+    for dtype in ("Int8", "Int16", "Int32", "Int64"):
+        info = np.iinfo(dtype.lower())
+        if present.min() >= info.min and present.max() <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+def to_category(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    # Only worth it when values repeat
+    if len(series) > 100 and series.nunique() > len(series) // 2:
+        return series
+    return series.astype("category")
+
+
+_CONVERTERS = {"date": to_date, "number": to_number, "category": to_category}
+
+
+def apply_schema(sheet_name, df):
+    """Returns `df` with the declared types of `sheet_name` applied"""
+    schema = SCHEMAS.get(sheet_name)
+    if not schema or df.empty:
+        return df
+    df = df.copy(deep=False)
+    for col, kind in schema.items():
+        if col in df.columns:
+            df[col] = _CONVERTERS[kind](df[col])
+    return df
+
+
+def editable(df):
+    """Casts categorical free-text columns back to plain text for st.data_editor,
+    which otherwise turns them into dropdowns of the existing values"""
+    cols = {c: object for c in EDITABLE_TEXT if c in df.columns and isinstance(df[c].dtype, pd.CategoricalDtype)}
+    return df.astype(cols) if cols else df
@@ -0,0 +1,231 @@
+"""Full-text search over tasks, challenges and meeting recommendations.
+
+An inverted index (token -> {row key: weight}) is kept per sheet and tagged
+with the sheet generation it was built from, so it is built once per data
+snapshot and only the sheets that changed are re-indexed. Cell-level task
+saves patch the index in place (see SearchIndex.apply_rows).
+
+Arabic text is normalized before tokenizing: tashkeel and tatweel are
+removed, alef/hamza variants fold to their bare letter, taa marbuta to haa
+and alef maqsura to yaa, so "المُهِمّة" and "المهمه" match. English is
+case-folded. Leading articles/conjunctions ("ال", "وال", ...) are stripped
+from query words, and documents are indexed under both forms, so "المراجعة"
+and "مراجعة" find each other. The last query word matches as a prefix
+(search as you type).
+"""
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+import pandas as pd
+
+# sheet -> (key column, {column: weight}, view)
+SEARCH_SOURCES = {
+    "Tasks": ("Task_ID", {"Sub_Task": 2.0, "Task": 1.0}, "المهام"),
+    "Challenges": ("Challenge_ID", {"Description": 2.0, "Resolution_Plan": 1.0}, "التحديات"),
+    "MeetingRecommendations": (None, {"Recommendation": 2.0}, "الاجتماعات"),
+}
+
+_TASHKEEL = re.compile("[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_FOLD = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ؤ": "و", "ئ": "ي", "ى": "ي", "ة": "ه",
+    # Arabic-Indic digits
+    "٠": "0", "١": "1", "٢": "2", "٣": "3", "٤": "4",
+    "٥": "5", "٦": "6", "٧": "7", "٨": "8", "٩": "9",
+})
+_TOKEN = re.compile(r"\w+")
+# Definite article / conjunction prefixes indexed alongside the full word
+_PREFIXES = ("وال", "بال", "كال", "فال", "ال")
+
+
+def normalize(text):
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return ""
+    return _TASHKEEL.sub("", str(text)).translate(_FOLD).casefold()
+
+
+def strip_prefix(token):
+    """`token` without a leading article/conjunction, or itself"""
+    for prefix in _PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+            return token[len(prefix):]
+    return token
+
+
+def tokenize(text):
+    """Normalized tokens of mixed Arabic/English text"""
+    tokens = []
+    for token in _TOKEN.findall(normalize(text)):
+        tokens.append(token)
+        stripped = strip_prefix(token)
+        if stripped != token:
+            tokens.append(stripped)
+    return tokens
+
+
+class SheetIndex:
+    """Inverted index of one sheet"""
+
+    def __init__(self, generation=None):
+        self.generation = generation
+        self.postings = {}  # token -> {key: weight}
+        self.docs = {}      # key -> (project_id, title, detail, Counter of token weights)
+        self._vocabulary = None
+
+    def add(self, key, project_id, fields):
+        """`fields` is [(text, weight), ...]; the first field is the hit's title"""
+        weights = Counter()
+        for text, weight in fields:
+            for token in tokenize(text):
+                weights[token] += weight
+        if not weights:
+            return
+        texts = [str(t) for t, _ in fields if normalize(t)]
+        self.docs[key] = (project_id, texts[0], " · ".join(texts[1:]), weights)
+        for token, weight in weights.items():
+            self.postings.setdefault(token, {})[key] = weight
+        self._vocabulary = None
+
+    def remove(self, key):
+        doc = self.docs.pop(key, None)
+        if doc is None:
+            return
+        for token in doc[3]:
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(key, None)
+                if not posting:
+                    del self.postings[token]
+        self._vocabulary = None
+
+    def expand(self, token, prefix):
+        """Tokens equal to `token`, or starting with it when `prefix`"""
+        if not prefix:
+            return [token] if token in self.postings else []
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        vocabulary = self._vocabulary
+        matches = []
+        i = bisect_left(vocabulary, token)
+        while i < len(vocabulary) and vocabulary[i].startswith(token):
+            matches.append(vocabulary[i])
+            i += 1
+        return matches
+
+    def _matches(self, token, prefix):
+        """{key: score} of the rows containing `token`"""
+        terms = self.expand(token, prefix)
+        n = len(self.docs)
+        matched = {}
+        for term in terms:
+            posting = self.postings[term]
+            idf = math.log(1 + n / len(posting))
+            if len(terms) == 1:
+                return {key: weight * idf for key, weight in posting.items()}
+            for key, weight in posting.items():
+                matched[key] = max(matched.get(key, 0.0), weight * idf)
+        return matched
+
+    def score(self, tokens, project_id=None):
+        """{key: score}; every query token has to match (the last one as a prefix)"""
+        matches = [self._matches(token, i == len(tokens) - 1) for i, token in enumerate(tokens)]
+        # Intersect starting from the rarest token
+        matches.sort(key=len)
+        scores = matches[0]
+        for matched in matches[1:]:
+            if not scores:
+                break
+            scores = {k: s + matched[k] for k, s in scores.items() if k in matched}
+        if project_id is not None:
+            scores = {k: s for k, s in scores.items() if self.docs[k][0] == project_id}
+        return scores
+
+
+def _rows(sheet_name, df):
+    """(key, project_id, fields) for each indexed row of `df`"""
+    key_col, columns, _ = SEARCH_SOURCES[sheet_name]
+    columns = {c: w for c, w in columns.items() if c in df.columns}
+    if df.empty or not columns:
+        return
+    # Sheets without an id column are keyed by row position
+    keys = df[key_col] if key_col in df.columns else pd.Series(df.index, index=df.index)
+    projects = df["Project_ID"] if "Project_ID" in df.columns else pd.Series(None, index=df.index)
+    values = [df[c].tolist() for c in columns]
+    for i, (key, pid) in enumerate(zip(keys.tolist(), projects.tolist())):
+        yield key, pid, [(v[i], w) for v, w in zip(values, columns.values())]
+
+
+def build_sheet_index(sheet_name, df, generation=None):
+    index = SheetIndex(generation)
+    for key, pid, fields in _rows(sheet_name, df):
+        index.add(key, pid, fields)
+    return index
+
+
+class SearchIndex:
+    """Process-wide search index, one SheetIndex per searchable sheet"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sheets = {}
+        self.stats = {"builds": 0, "incremental_updates": 0}
+
+    def sync(self, source):
+        """`source(sheet) -> (generation, df)`; re-indexes only sheets with a new generation"""
+        for sheet_name in SEARCH_SOURCES:
+            generation, df = source(sheet_name)
+            with self.lock:
+                current = self.sheets.get(sheet_name)
+                if current is not None and generation is not None and current.generation == generation:
+                    continue
+            index = build_sheet_index(sheet_name, df, generation)
+            with self.lock:
+                self.sheets[sheet_name] = index
+                self.stats["builds"] += 1
+
+    def apply_rows(self, sheet_name, from_generation, to_generation, rows):
+        """Re-indexes `rows` (as they are now) of a sheet moving between generations"""
+        with self.lock:
+            index = self.sheets.get(sheet_name)
+            if index is None or from_generation is None or index.generation != from_generation:
+                return False
+            for key, pid, fields in _rows(sheet_name, rows):
+                index.remove(key)
+                index.add(key, pid, fields)
+            index.generation = to_generation
+            self.stats["incremental_updates"] += 1
+            return True
+
+    def search(self, text, project_id=None, limit=20):
+        """Ranked hits: dicts with sheet/view/key/project_id/title/detail/score"""
+        # Every document also carries the stripped form of its words, so the
+        # stripped query word finds "مراجعة" and "المراجعة" alike
+        tokens = [strip_prefix(token) for token in _TOKEN.findall(normalize(text))]
+        if not tokens:
+            return []
+        with self.lock:
+            scored = [
+                (score, sheet_name, key)
+                for sheet_name, index in self.sheets.items()
+                for key, score in index.score(tokens, project_id).items()
+            ]
+            # Only the top hits are materialized
+            hits = []
+            for score, sheet_name, key in heapq.nlargest(limit, scored, key=lambda s: s[0]):
+                pid, title, detail, _ = self.sheets[sheet_name].docs[key]
+                hits.append({
+                    "sheet": sheet_name, "view": SEARCH_SOURCES[sheet_name][2], "key": key,
+                    "project_id": pid, "title": title, "detail": detail, "score": score,
+                })
+        return hits
+
+
+_index = SearchIndex()
+
+
+def get_search_index():
+    return _index
@@ -0,0 +1,247 @@
+import itertools
+import threading
+import time
+
+
+class SharedDataCache:
+    """Process-wide sheet cache shared by every Streamlit session.
+
+    `version` is bumped on every write (see `bump()`), which drops the written
+    sheet so all sessions pick up the new data on their next rerun. Each entry
+    also carries its own generation number (`sheet_version()`), so consumers
+    that derive data from one sheet - indexes, aggregates - only rebuild when
+    that sheet changed. Between writes, sessions are served from memory; `ttl`
+    only bounds how long we trust the cache against edits made directly in
+    the spreadsheet.
+
+    Stale-while-revalidate: an entry older than `soft_ttl` is still served at
+    once, and a background thread reloads it (one refresh per sheet at a time,
+    however many sessions ask). Only an entry older than the hard `ttl` - or a
+    missing one - makes a rerun wait for the source.
+
+    Loads can name what they read with a `source(sheet_name, raw)` callable
+    (the workbook's mtime/size, the frame the incremental sync handed back).
+    A reload from the same source keeps the entry and its generation, so a
+    refresh that found nothing new doesn't make consumers rebuild.
+    """
+
+    def __init__(self, ttl=300, soft_ttl=None):
+        self.ttl = ttl
+        self.soft_ttl = soft_ttl
+        self.version = 0
+        self.stats = {
+            "hits": 0, "misses": 0, "invalidations": 0, "background_refreshes": 0,
+            "refresh_errors": 0, "unchanged_reloads": 0,
+        }
+        self._entries = {}       # sheet_name -> (generation, loaded_at, df, source)
+        self._generations = itertools.count(1)
+        self._source_key = None  # e.g. the local workbook's (mtime, size)
+        self._lock = threading.RLock()
+        self._sheet_locks = {}
+        self._refreshing = set()  # sheets with a background refresh in flight
+
+    def _count(self, stat):
+        # Session threads and background refreshes both count: keep increments atomic
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _sheet_lock(self, sheet_name):
+        with self._lock:
+            if sheet_name not in self._sheet_locks:
+                # Re-entrant: a batch load holds several and may read one it holds
+                self._sheet_locks[sheet_name] = threading.RLock()
+            return self._sheet_locks[sheet_name]
+
+    def _fresh(self, entry):
+        if entry is None:
+            return False
+        return self.ttl is None or (time.time() - entry[1]) < self.ttl
+
+    def _needs_refresh(self, entry):
+        """Servable, but past the soft TTL"""
+        return self.soft_ttl is not None and (time.time() - entry[1]) >= self.soft_ttl
+
+    def _load(self, sheet_name, loader, source, *raw):
+        """(df, source) for `sheet_name`; the cached frame itself when `source`
+        says it is still current (the loader isn't called then)"""
+        token = source(sheet_name, *raw) if source is not None else None
+        entry = self._entries.get(sheet_name)
+        if entry is not None and _same_source(entry[3], token):
+            return entry[2], token
+        return loader(sheet_name, *raw), token
+
+    def _store(self, sheet_name, df, token):
+        """Caches a loaded frame (call with _lock held). Reloading the cached frame
+        keeps its generation and only marks it as just loaded."""
+        entry = self._entries.get(sheet_name)
+        if entry is not None and entry[2] is df:
+            self._entries[sheet_name] = (entry[0], time.time(), df, token)
+            self.stats["unchanged_reloads"] += 1
+            return
+        self._entries[sheet_name] = (next(self._generations), time.time(), df, token)
+
+    # --- Background refresh ---
+    def _revalidate(self, sheet_names, fetch, loader, source=None):
+        """Starts one background reload for those of `sheet_names` not already refreshing"""
+        with self._lock:
+            names = [name for name in sheet_names if name not in self._refreshing]
+            if not names:
+                return
+            self._refreshing.update(names)
+        thread = threading.Thread(target=self._refresh, args=(names, fetch, loader, source), daemon=True)
+        thread.start()
+
+    def _refresh(self, sheet_names, fetch, loader, source=None):
+        try:
+            version = self.version
+            raw = fetch(sheet_names) if fetch is not None else {}
+            for name in sheet_names:
+                if fetch is not None and raw.get(name) is None:
+                    # Fetch failed: keep serving the last good snapshot
+                    self._count("refresh_errors")
+                    continue
+                with self._sheet_lock(name):
+                    df, token = self._load(name, loader, source, *((raw[name],) if fetch is not None else ()))
+                    with self._lock:
+                        # A write since we started wins over what we read
+                        if version == self.version:
+                            self._store(name, df, token)
+                            self.stats["background_refreshes"] += 1
+        except Exception:
+            self._count("refresh_errors")
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(sheet_names)
+
+    def refreshing(self):
+        """Sheets being reloaded in the background right now"""
+        with self._lock:
+            return set(self._refreshing)
+
+    def get(self, sheet_name, loader, source=None):
+        """Returns the cached frame for `sheet_name`, calling `loader(sheet_name)`
+        at most once per invalidation even when many sessions ask concurrently."""
+        entry = self._entries.get(sheet_name)
+        if self._fresh(entry):
+            self._count("hits")
+            if self._needs_refresh(entry):
+                self._revalidate([sheet_name], None, loader, source)
+            return entry[2]
+
+        with self._sheet_lock(sheet_name):
+            entry = self._entries.get(sheet_name)
+            if self._fresh(entry):
+                self._count("hits")
+                return entry[2]
+            version = self.version
+            df, token = self._load(sheet_name, loader, source)
+            self._count("misses")
+            with self._lock:
+                # Don't cache a frame that was read before a concurrent write
+                if version == self.version:
+                    self._store(sheet_name, df, token)
+        return df
+
+    def get_many(self, sheet_names, fetch, loader, source=None):
+        """Loads every stale sheet of `sheet_names` from one `fetch(stale_names) ->
+        {sheet_name: raw}` call, then `loader(sheet_name, raw)` per sheet in the
+        given order (so a sheet can read the ones cached before it).
+        Sheets past the soft TTL only are refreshed in the background, in one batch."""
+        entries = {name: self._entries.get(name) for name in sheet_names}
+        revalidate = [name for name, e in entries.items() if self._fresh(e) and self._needs_refresh(e)]
+        if revalidate:
+            self._revalidate(revalidate, fetch, loader, source)
+        stale = [name for name, e in entries.items() if not self._fresh(e)]
+        if not stale:
+            return
+        # Fixed lock order so two batches can't deadlock
+        locks = [self._sheet_lock(name) for name in sorted(set(stale))]
+        for lock in locks:
+            lock.acquire()
+        try:
+            stale = [name for name in stale if not self._fresh(self._entries.get(name))]
+            if not stale:
+                return
+            version = self.version
+            raw = fetch(stale)
+            for name in stale:
+                df, token = self._load(name, loader, source, raw.get(name))
+                self._count("misses")
+                with self._lock:
+                    if version == self.version:
+                        self._store(name, df, token)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def put(self, sheet_name, df, stale=False, source=None):
+        """Write-through: stores a frame we just wrote as the current value.
+        A `stale` frame (e.g. from the local mirror) is served but reloaded on first use."""
+        loaded_at = time.time()
+        if stale and self.soft_ttl is not None:
+            loaded_at -= self.soft_ttl
+        with self._lock:
+            self._entries[sheet_name] = (next(self._generations), loaded_at, df, source)
+
+    def bump(self, sheet_name=None, source_key=None):
+        """Invalidates `sheet_name` (or every sheet) and returns the new version."""
+        with self._lock:
+            self.version += 1
+            if sheet_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(sheet_name, None)
+            self.stats["invalidations"] += 1
+            if source_key is not None:
+                self._source_key = source_key
+            return self.version
+
+    def sync_source(self, source_key):
+        """Bumps the version if the underlying source changed outside the app
+        (e.g. someone edited mock_data.xlsx by hand)."""
+        with self._lock:
+            if self._source_key is None:
+                self._source_key = source_key
+            elif source_key != self._source_key:
+                self.bump(source_key=source_key)
+        return self.version
+
+    def adopt_source(self, source_key):
+        """Records a source change we made ourselves (already reflected in the cache)"""
+        with self._lock:
+            self._source_key = source_key
+
+    def sheet_version(self, sheet_name):
+        """Generation of the cached frame, or None if it isn't cached"""
+        entry = self._entries.get(sheet_name)
+        return None if entry is None else entry[0]
+
+    def age(self, sheet_name):
+        entry = self._entries.get(sheet_name)
+        return None if entry is None else time.time() - entry[1]
+
+
+def _same_source(old, new):
+    """True if two load sources name the same data (None: unknown)"""
+    if old is None or new is None:
+        return False
+    if old is new:
+        return True
+    if type(old) is not type(new):
+        return False
+    equals = getattr(old, "equals", None)
+    return bool(equals(new)) if equals is not None else old == new
+
+
+# --- Process-wide singleton ---
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache(ttl=300, soft_ttl=None):
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = SharedDataCache(ttl=ttl, soft_ttl=soft_ttl)
+    return _shared_cache
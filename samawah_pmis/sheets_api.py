@@ -0,0 +1,195 @@
+import re
+from datetime import date, datetime
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import requests
+
+from metrics import get_metrics
+
+DEFAULT_BASE_URL = "https://sheets.googleapis.com/v4"
+
+
+# --- A1 notation helpers ---
+def column_letter(col_idx):
+    """0-based column index -> A1 column letters (0 -> A, 26 -> AA)"""
+    letters = ""
+    n = col_idx + 1
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def quote_sheet(sheet_name):
+    return "'" + sheet_name.replace("'", "''") + "'"
+
+
+def a1_range(sheet_name, row, first_col, last_col=None):
+    """1-based sheet row and 0-based columns -> 'Sheet'!B5:D5"""
+    start = f"{column_letter(first_col)}{row}"
+    if last_col is None or last_col == first_col:
+        return f"{quote_sheet(sheet_name)}!{start}"
+    return f"{quote_sheet(sheet_name)}!{start}:{column_letter(last_col)}{row}"
+
+
+def to_cell(value):
+    """Converts a pandas/numpy value into something the values API accepts"""
+    if value is None:
+        return ""
+    if isinstance(value, (pd.Timestamp, datetime)):
+        if pd.isna(value):
+            return ""
+        if value.hour == 0 and value.minute == 0 and value.second == 0:
+            return value.strftime("%Y-%m-%d")
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return ""
+    try:
+        if pd.isna(value):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    return value
+
+
+def values_to_frame(values):
+    """First row is the header; short rows are padded with empty cells"""
+    if not values:
+        return pd.DataFrame()
+    header = [str(h) for h in values[0]]
+    width = len(header)
+    rows = [list(r[:width]) + [None] * (width - len(r)) for r in values[1:]]
+    df = pd.DataFrame(rows, columns=header)
+    return df.replace("", np.nan)
+
+
+def frame_to_values(df):
+    return [list(df.columns)] + [[to_cell(v) for v in row] for row in df.itertuples(index=False, name=None)]
+
+
+def is_transient_error(exc):
+    """True for failures that mean "Sheets unreachable right now" (network, 429, 5xx)"""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return False
+
+
+def _operation(suffix):
+    """Metrics label of a values API call: get, batchGet, batchUpdate, clear, append"""
+    if suffix.startswith(":"):
+        return suffix[1:]
+    for operation in ("clear", "append"):
+        if suffix.endswith(":" + operation):
+            return operation
+    return "get"
+
+
+def first_row(range_):
+    """1-based first row of an A1 range ('Sheet'!A12:F13 -> 12), None without one"""
+    match = re.search(r"!\$?[A-Z]*\$?(\d+)", range_ or "")
+    return int(match.group(1)) if match else None
+
+
+def spreadsheet_id_from_url(url):
+    match = re.search(r"/spreadsheets/d/([a-zA-Z0-9-_]+)", url or "")
+    return match.group(1) if match else url
+
+
+class SheetsValuesClient:
+    """Thin client for the Sheets v4 `spreadsheets.values` REST API.
+
+    Unlike the gsheets connector (which only reads and rewrites whole
+    worksheets), this exposes the batched range calls we need for partial
+    updates. `base_url` can point at `fake_sheets.FakeSheetsServer` to run
+    offline.
+    """
+
+    def __init__(self, spreadsheet_id, session=None, base_url=DEFAULT_BASE_URL, timeout=30):
+        self.spreadsheet_id = spreadsheet_id
+        self.session = session or requests.Session()
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    @classmethod
+    def from_connection(cls, conn, spreadsheet, base_url=DEFAULT_BASE_URL):
+        """Reuses the authorized session of a streamlit-gsheets connection"""
+        session = conn.client._client.session
+        return cls(spreadsheet_id_from_url(spreadsheet), session=session, base_url=base_url)
+
+    def _url(self, suffix):
+        return f"{self.base_url}/spreadsheets/{self.spreadsheet_id}/values{suffix}"
+
+    def _request(self, method, suffix, params=None, json=None):
+        metrics = get_metrics()
+        operation = _operation(suffix)
+        with metrics.timer("sheets_request_seconds", operation=operation):
+            resp = self.session.request(method, self._url(suffix), params=params, json=json, timeout=self.timeout)
+            if metrics.enabled:
+                metrics.incr("sheets_requests_total", operation=operation, status=resp.status_code)
+                metrics.incr("sheets_bytes_received_total", len(resp.content), operation=operation)
+                body = getattr(resp.request, "body", None) if resp.request is not None else None
+                metrics.incr("sheets_bytes_sent_total", len(body or b""), operation=operation)
+            resp.raise_for_status()
+            return resp.json()
+
+    def get(self, range_):
+        data = self._request("GET", "/" + quote(range_, safe=""), params={
+            "valueRenderOption": "UNFORMATTED_VALUE",
+            "dateTimeRenderOption": "FORMATTED_STRING",
+        })
+        return data.get("values", [])
+
+    def batch_get(self, ranges):
+        """Reads several ranges in one request; returns one values list per range"""
+        if not ranges:
+            return []
+        data = self._request("GET", ":batchGet", params={
+            "ranges": list(ranges),
+            "valueRenderOption": "UNFORMATTED_VALUE",
+            "dateTimeRenderOption": "FORMATTED_STRING",
+        })
+        return [vr.get("values", []) for vr in data.get("valueRanges", [])]
+
+    def batch_update(self, data):
+        """`data` is a list of {"range": A1, "values": [[...]]} blocks, sent in one request"""
+        if not data:
+            return {}
+        return self._request("POST", ":batchUpdate", json={
+            "valueInputOption": "USER_ENTERED",
+            "data": data,
+        })
+
+    def append(self, sheet_name, values):
+        """Adds rows after the last row of the sheet's table, in one request; Sheets
+        places concurrent appends one after the other. Returns the 1-based row
+        the first of them landed on (None if the response doesn't say)."""
+        if not values:
+            return None
+        data = self._request("POST", "/" + quote(f"{quote_sheet(sheet_name)}!A1", safe="") + ":append", params={
+            "valueInputOption": "USER_ENTERED",
+            "insertDataOption": "INSERT_ROWS",
+        }, json={"values": values})
+        return first_row(data.get("updates", {}).get("updatedRange"))
+
+    def read_frame(self, sheet_name):
+        return values_to_frame(self.get(quote_sheet(sheet_name)))
+
+    def read_frames(self, sheet_names):
+        """Whole worksheets in one batchGet request; returns {sheet_name: df}"""
+        sheet_names = list(sheet_names)
+        blocks = self.batch_get([quote_sheet(name) for name in sheet_names])
+        return {name: values_to_frame(values) for name, values in zip(sheet_names, blocks)}
+
+    def write_frame(self, sheet_name, df):
+        """Full-sheet rewrite, used when a delta can't describe the change"""
+        values = frame_to_values(df)
+        self._request("POST", "/" + quote(quote_sheet(sheet_name), safe="") + ":clear", json={})
+        return self.batch_update([{"range": f"{quote_sheet(sheet_name)}!A1", "values": values}])
@@ -0,0 +1,134 @@
+import io
+import os
+import threading
+import time
+from types import MappingProxyType
+
+import pandas as pd
+
+
+class WorkbookSnapshot:
+    """An immutable, in-memory copy of the sheets of a workbook.
+
+    The snapshot is identified by `key` (the file's mtime and size). Sheets
+    are parsed on first use, one at a time: a view that needs Documents
+    doesn't pay for parsing tens of thousands of task rows. The workbook
+    itself is opened once per snapshot and every sheet is parsed from that
+    handle, so the zip directory and shared strings are read only once.
+    Frames handed out by `get()` are shallow copy-on-write copies, so callers
+    are free to mutate them without corrupting the shared snapshot.
+    """
+
+    def __init__(self, path, key):
+        self.path = path
+        self.key = key
+        self._sheets = {}
+        self._names = None
+        self._book = None
+        self._current = False
+        self._lock = threading.Lock()
+        self.loaded_at = time.time()
+
+    def _open(self):
+        """The snapshot's workbook (call with _lock held). Its bytes are read into
+        memory: every sheet comes from the same version of the file, and no open
+        handle stands in the way of a save replacing it."""
+        if self._book is None:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            # Written meanwhile: these bytes may not be the version `key` names
+            self._current = file_signature(self.path) == self.key
+            self._book = pd.ExcelFile(io.BytesIO(data))
+        return self._book
+
+    def close(self):
+        with self._lock:
+            if self._book is not None:
+                self._book.close()
+                self._book = None
+
+    def sheet_names(self):
+        if self._names is None:
+            with self._lock:
+                self._names = list(self._open().sheet_names)
+        return list(self._names)
+
+    def has_sheet(self, sheet_name):
+        return sheet_name in self.sheet_names()
+
+    @property
+    def sheets(self):
+        """The sheets parsed so far"""
+        return MappingProxyType(dict(self._sheets))
+
+    def get(self, sheet_name):
+        df = self._sheets.get(sheet_name)
+        if df is None:
+            df = self._parse(sheet_name)
+        if df is None:
+            return pd.DataFrame()
+        return df.copy(deep=False)
+
+    def _parse(self, sheet_name):
+        with self._lock:
+            if sheet_name in self._sheets:
+                return self._sheets[sheet_name]
+            try:
+                df = self._open().parse(sheet_name)
+            except ValueError:
+                # No such worksheet
+                return None
+            # Don't cache a sheet of another file version under this key
+            if self._current:
+                self._sheets[sheet_name] = df
+                # Every sheet parsed: the workbook isn't needed any more
+                if self._names is not None and set(self._names) <= set(self._sheets):
+                    self._book.close()
+                    self._book = None
+            return df
+
+
+def file_signature(path):
+    """Returns the (mtime_ns, size) pair used to detect workbook changes."""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# --- Process-wide snapshot registry (one entry per workbook path) ---
+_snapshots = {}
+_lock = threading.Lock()
+
+
+def load_workbook_snapshot(path):
+    """Returns the current snapshot of `path`, a new one whenever its mtime/size
+    changed; its sheets are parsed as they are first requested."""
+    path = os.path.abspath(path)
+    key = file_signature(path)
+
+    snap = _snapshots.get(path)
+    if snap is not None and snap.key == key:
+        return snap
+
+    with _lock:
+        # Another thread may have replaced it while we were waiting
+        snap = _snapshots.get(path)
+        if snap is not None and snap.key == key:
+            return snap
+        old, snap = snap, WorkbookSnapshot(path, key)
+        _snapshots[path] = snap
+    if old is not None:
+        old.close()
+    return snap
+
+
+def invalidate_snapshot(path=None):
+    """Drops the cached snapshot for `path` (or all snapshots)."""
+    with _lock:
+        if path is None:
+            dropped = list(_snapshots.values())
+            _snapshots.clear()
+        else:
+            dropped = [_snapshots.pop(os.path.abspath(path), None)]
+    for snap in dropped:
+        if snap is not None:
+            snap.close()
@@ -0,0 +1,151 @@
+"""Cold-start profile of app.py: import and initialization time per module.
+
+    python startup_profile.py                       # Dashboard, 1k-task synthetic workbook
+    python startup_profile.py --view المستندات --size 10000
+    python startup_profile.py --max-first-render 3  # exit 1 when slower (CI)
+
+Starts a fresh interpreter with `-X importtime`, so nothing is imported or
+cached yet, and runs app.py headless (streamlit.testing.v1.AppTest) the way
+a new container serves its first visitor: the login page, then the first
+view after logging in, then one warm rerun. Reported:
+
+* time of each of those runs (the first two are what a cold start costs),
+* the app's phases (fonts, data_init, view_data, view render) from metrics,
+* import time of every module app.py pulls in, by top-level package and for
+  the slowest modules. Streamlit itself and the harness are imported before
+  the app runs and aren't counted, as under `streamlit run`.
+
+For a deployed app, `PYTHONPROFILEIMPORTTIME=1 streamlit run app.py` prints
+the same import lines to stderr; the phases are on the Settings performance
+panel.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+START = "--- startup_profile: app ---"
+END = "--- startup_profile: done ---"
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+# --- Child: one cold run of the app ---
+def child(view, size, workdir, timeout):
+    from streamlit.testing.v1 import AppTest
+    from rerun_benchmark import APP_PATH, PASSWORD, VIEWS, use_dataset
+
+    use_dataset(size, workdir)
+    runs = {}
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.secrets["passwords"] = {"profile": PASSWORD}
+    print(START, file=sys.stderr, flush=True)
+
+    start = time.perf_counter()
+    at.run()
+    runs["login_page"] = time.perf_counter() - start
+    at.text_input(key="password").input(PASSWORD)
+    for name in ("first_view", "warm_rerun"):
+        at.session_state["nav_view"] = VIEWS.index(view)
+        start = time.perf_counter()
+        at.run()
+        runs[name] = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    print(END, file=sys.stderr, flush=True)
+
+    from metrics import get_metrics
+    phases = [r for r in get_metrics().summary() if r["metric"] in ("app_phase_seconds", "view_render_seconds")]
+    print(json.dumps({"runs": runs, "phases": phases}, ensure_ascii=False))
+
+
+# --- Parent: run the child, parse its import log ---
+def parse_imports(stderr):
+    """[(module, self_us, cumulative_us, depth)] of the imports between the markers"""
+    imports, active = [], False
+    for line in stderr.splitlines():
+        if line.startswith(START):
+            active = True
+        elif line.startswith(END):
+            break
+        elif active:
+            match = _IMPORT_LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, module = match.groups()
+                imports.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return imports
+
+
+def summarize(imports, top=15):
+    packages = defaultdict(int)
+    for module, self_us, _, _ in imports:
+        packages[module.split(".")[0]] += self_us
+    return {
+        "total_s": sum(self_us for _, self_us, _, _ in imports) / 1e6,
+        "modules": len(imports),
+        "by_package": sorted(((p, us / 1e6) for p, us in packages.items()), key=lambda x: -x[1])[:top],
+        "slowest": sorted(((m, c / 1e6) for m, _, c, _ in imports), key=lambda x: -x[1])[:top],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--view", default="لوحة التحكم")
+    parser.add_argument("--size", type=int, default=1000, help="tasks in the synthetic workbook")
+    parser.add_argument("--workdir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".benchmark"))
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--max-first-render", type=float, help="seconds; exit 1 when login page + first view take longer")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    workdir = os.path.abspath(args.workdir)
+    if args.child:
+        child(args.view, args.size, workdir, args.timeout)
+        return 0
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child",
+         "--view", args.view, "--size", str(args.size), "--workdir", workdir, "--timeout", str(args.timeout)],
+        capture_output=True, text=True, cwd=here, env={**os.environ, "PYTHONPATH": here},
+    )
+    if proc.returncode != 0:
+        sys.stderr.write("\n".join(l for l in proc.stderr.splitlines() if not l.startswith("import time:")))
+        return proc.returncode
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    imports = summarize(parse_imports(proc.stderr), args.top)
+    runs = result["runs"]
+    first_render = runs["login_page"] + runs["first_view"]
+
+    print(f"Cold start of {args.view} ({args.size} tasks)")
+    for name, seconds in runs.items():
+        print(f"  {name:<24}{seconds * 1000:>10.0f} ms")
+    print(f"  {'time to first view':<24}{first_render * 1000:>10.0f} ms")
+    print("\nPhases (first run / warm)")
+    for row in result["phases"]:
+        label = row.get("phase") or row.get("view")
+        print(f"  {row['metric']:<22}{label:<14}{row['count']:>4}x  max {row['max_ms']:>8.1f} ms")
+    print(f"\nImports by the app: {imports['modules']} modules, {imports['total_s'] * 1000:.0f} ms")
+    for package, seconds in imports["by_package"]:
+        print(f"  {package:<40}{seconds * 1000:>10.1f} ms")
+    print("\nSlowest imports (cumulative)")
+    for module, seconds in imports["slowest"]:
+        print(f"  {module:<40}{seconds * 1000:>10.1f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"view": args.view, "size": args.size, "runs": runs, "first_render_s": first_render,
+                       "phases": result["phases"], "imports": imports}, f, ensure_ascii=False, indent=2)
+    if args.max_first_render is not None and first_render > args.max_first_render:
+        print(f"\nTime to first view {first_render:.2f} s exceeds {args.max_first_render} s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Canonical task status vocabulary.
+
+Every spelling of a status found in the sheet ("Completed", "مكتمل", " completed ",
+...) is mapped once, at load time, to one of a few canonical statuses. The
+Tasks Status column is then a pandas categorical whose first categories are
+the canonical labels, so KPI, chart and filter code works on small integer
+codes instead of comparing strings.
+
+Extra spellings are added from the Config sheet without touching code:
+
+    Type            Value
+    Status_Alias    قيد المراجعة=In Progress
+
+The right-hand side may be any spelling the vocabulary already knows.
+Values that match no alias are kept as they are (so nothing is lost on
+write-back) and are counted under STATUS_OTHER.
+"""
+import threading
+
+import pandas as pd
+
+# --- Canonical codes (stable; also the categorical codes of the Status column) ---
+STATUS_NOT_STARTED = 0
+STATUS_IN_PROGRESS = 1
+STATUS_COMPLETED = 2
+STATUS_OTHER = 3
+
+# Label written back to the sheet for each canonical status
+STATUS_LABELS = {
+    STATUS_NOT_STARTED: "لم يبدأ",
+    STATUS_IN_PROGRESS: "جاري التنفيذ",
+    STATUS_COMPLETED: "مكتمل",
+    STATUS_OTHER: "أخرى",
+}
+
+DEFAULT_ALIASES = {
+    "لم يبدأ": STATUS_NOT_STARTED,
+    "Not Started": STATUS_NOT_STARTED,
+    "جاري التنفيذ": STATUS_IN_PROGRESS,
+    "قيد التنفيذ": STATUS_IN_PROGRESS,
+    "قيد الإنجاز": STATUS_IN_PROGRESS,
+    "In Progress": STATUS_IN_PROGRESS,
+    "مكتمل": STATUS_COMPLETED,
+    "Completed": STATUS_COMPLETED,
+}
+
+ALIAS_CONFIG_TYPE = "Status_Alias"
+
+
+def normalize_key(value):
+    """Alias lookup key: trimmed, case-folded, single-spaced"""
+    return " ".join(str(value).split()).casefold()
+
+
+class StatusVocabulary:
+    def __init__(self, aliases=None):
+        self.aliases = {}
+        for alias, code in (aliases or DEFAULT_ALIASES).items():
+            self.aliases[normalize_key(alias)] = code
+        self.unknown = set()
+
+    @classmethod
+    def from_config(cls, config_df):
+        """Default aliases plus `Status_Alias` rows ("alias=Status") from the Config sheet"""
+        vocab = cls()
+        if config_df is None or config_df.empty or not {"Type", "Value"} <= set(config_df.columns):
+            return vocab
+        for value in config_df.loc[config_df["Type"] == ALIAS_CONFIG_TYPE, "Value"].dropna():
+            alias, sep, target = str(value).partition("=")
+            code = vocab.aliases.get(normalize_key(target))
+            if sep and alias.strip() and code is not None:
+                vocab.aliases[normalize_key(alias)] = code
+        return vocab
+
+    @property
+    def labels(self):
+        """Canonical labels in code order (what the editor offers)"""
+        return [STATUS_LABELS[c] for c in (STATUS_NOT_STARTED, STATUS_IN_PROGRESS, STATUS_COMPLETED)]
+
+    def label(self, code):
+        return STATUS_LABELS.get(code, STATUS_LABELS[STATUS_OTHER])
+
+    def code(self, value):
+        """Canonical code of one status value (None for a missing value)"""
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            return None
+        return self.aliases.get(normalize_key(value), STATUS_OTHER)
+
+    def encode(self, series):
+        """Status values -> categorical of canonical labels (unknown spellings kept as-is)"""
+        raw = series.astype(object)
+        uniques = pd.unique(raw.dropna())
+        mapping, unknown = {}, []
+        for value in uniques:
+            code = self.code(value)
+            if code == STATUS_OTHER:
+                mapping[value] = value
+                unknown.append(value)
+            else:
+                mapping[value] = STATUS_LABELS[code]
+        unknown.sort(key=str)
+        self.unknown.update(str(u) for u in unknown)
+        return pd.Categorical(raw.map(mapping), categories=self.labels + unknown)
+
+    def codes(self, series):
+        """Canonical codes as a nullable Int64 series (anything unrecognised -> STATUS_OTHER)"""
+        if isinstance(series.dtype, pd.CategoricalDtype) and list(series.cat.categories[:3]) == self.labels:
+            codes = series.cat.codes.clip(upper=STATUS_OTHER)
+            return codes.astype("Int64").mask(codes < 0)
+        return series.map(self.code).astype("Int64")
+
+    def color_map(self, colors):
+        """{code: color} -> plotly color_discrete_map keyed by label"""
+        return {self.label(code): color for code, color in colors.items()}
+
+
+def encode_status(df, vocab, column="Status"):
+    """Returns `df` with its status column encoded (unchanged if there is none)"""
+    if df.empty or column not in df.columns:
+        return df
+    df = df.copy()
+    df[column] = vocab.encode(df[column])
+    return df
+
+
+# --- One vocabulary per Config generation, shared by every session ---
+_vocab = (None, None)
+_vocab_lock = threading.Lock()
+
+
+def get_vocabulary(config_generation, config_df):
+    global _vocab
+    with _vocab_lock:
+        generation, vocab = _vocab
+        if vocab is None or generation is None or generation != config_generation:
+            vocab = StatusVocabulary.from_config(config_df)
+            _vocab = (config_generation, vocab)
+        return vocab
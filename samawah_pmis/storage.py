@@ -0,0 +1,318 @@
+"""Query backends behind DataManager.
+
+Google Sheets (or mock_data.xlsx) stays the system of record; a backend holds
+a queryable copy of the sheets so views can ask for just the rows and
+aggregates they need instead of scanning freshly loaded frames.
+
+Every backend pulls frames through `source(sheet_name) -> (generation, df)`
+(the shared cache) and re-imports a sheet only when its generation changed.
+"""
+import sqlite3
+import threading
+from datetime import date
+
+import pandas as pd
+
+from sheets_api import to_cell
+
+# Columns that get an index wherever they exist
+INDEXED_COLUMNS = ["Project_ID", "Owner", "Status", "End_Date", "Task_ID", "Type"]
+# Hidden column holding each row's position in the cached frame
+ROW_COLUMN = "_row"
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+# Range filters: End_Date__ge=..., End_Date__le=...
+RANGE_OPERATORS = {"__ge": ">=", "__le": "<="}
+
+
+def split_filter(name):
+    """'End_Date__ge' -> ('End_Date', '>='); 'Owner' -> ('Owner', None)"""
+    for suffix, op in RANGE_OPERATORS.items():
+        if name.endswith(suffix):
+            return name[:-len(suffix)], op
+    return name, None
+
+
+class StorageBackend:
+    """Interface used by DataManager. Filters are `column=value`,
+    `column=[values]` (IN) or `column__ge=value` / `column__le=value` (range);
+    a value of None means "no filter"."""
+
+    name = "base"
+
+    def __init__(self, source):
+        self.source = source
+
+    def query(self, sheet_name, columns=None, order_by=None, limit=None, offset=0, **filters):
+        raise NotImplementedError
+
+    def count(self, sheet_name, **filters):
+        raise NotImplementedError
+
+    def group_counts(self, sheet_name, column, **filters):
+        """Returns a Series of row counts indexed by `column`"""
+        raise NotImplementedError
+
+    def distinct(self, sheet_name, column, **filters):
+        raise NotImplementedError
+
+    def sums(self, sheet_name, columns, **filters):
+        """Returns {column: sum} over the filtered rows"""
+        raise NotImplementedError
+
+    def apply_changes(self, sheet_name, changes, key, from_generation, to_generation):
+        """Applies cell changes in place, if the backend holds `from_generation`"""
+
+    def project_stats(self, project_id):
+        totals = self.sums("Tasks", ["Quantity_Total", "Quantity_Done"], Project_ID=project_id)
+        total_qty = totals.get("Quantity_Total") or 0
+        done_qty = totals.get("Quantity_Done") or 0
+        progress = (done_qty / total_qty * 100) if total_qty > 0 else 0
+        return round(progress, 1), int(total_qty), int(total_qty - done_qty)
+
+    def config_list(self, config_type):
+        df = self.query("Config", columns=["Value"], Type=config_type)
+        return df["Value"].tolist() if "Value" in df.columns else []
+
+
+class FrameBackend(StorageBackend):
+    """Plain pandas masks over the cached frames (no import step)"""
+
+    name = "frames"
+
+    def _filtered(self, sheet_name, filters):
+        _, df = self.source(sheet_name)
+        for name, value in filters.items():
+            if value is None:
+                continue
+            col, op = split_filter(name)
+            if col not in df.columns:
+                return df.iloc[0:0]
+            if op is not None:
+                if pd.api.types.is_datetime64_any_dtype(df[col]):
+                    value = pd.Timestamp(value)
+                df = df[df[col] >= value] if op == ">=" else df[df[col] <= value]
+            elif isinstance(value, (list, tuple, set)):
+                df = df[df[col].isin(list(value))]
+            else:
+                df = df[df[col] == value]
+        return df
+
+    def query(self, sheet_name, columns=None, order_by=None, limit=None, offset=0, **filters):
+        df = self._filtered(sheet_name, filters)
+        if columns is not None:
+            df = df[[c for c in columns if c in df.columns]]
+        if order_by:
+            col, _, direction = order_by.partition(" ")
+            if col in df.columns:
+                df = df.sort_values(col, ascending=direction.upper() != "DESC", kind="stable")
+        if limit is not None:
+            df = df.iloc[offset:offset + limit]
+        return df.reset_index(drop=True)
+
+    def count(self, sheet_name, **filters):
+        return len(self._filtered(sheet_name, filters))
+
+    def group_counts(self, sheet_name, column, **filters):
+        df = self._filtered(sheet_name, filters)
+        if column not in df.columns:
+            return pd.Series(dtype="int64")
+        counts = df[column].value_counts()
+        # Categorical columns also list categories with no rows
+        return counts[counts > 0]
+
+    def distinct(self, sheet_name, column, **filters):
+        df = self._filtered(sheet_name, filters)
+        return df[column].dropna().unique().tolist() if column in df.columns else []
+
+    def sums(self, sheet_name, columns, **filters):
+        df = self._filtered(sheet_name, filters)
+        return {c: df[c].sum() for c in columns if c in df.columns}
+
+
+class SQLiteBackend(StorageBackend):
+    """SQLite copy of the sheets with indexes on the columns views filter by.
+
+    One connection is shared by every session of the process; all access goes
+    through a lock. `path` may be ":memory:" or a file.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, source, path=":memory:"):
+        super().__init__(source)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self._generations = {}  # sheet_name -> generation currently imported
+        self._columns = {}      # sheet_name -> list of column names
+        self._frames = {}       # sheet_name -> typed frame the table mirrors
+
+    # --- Import ---
+    def _ensure(self, sheet_name):
+        """Makes sure the table reflects the current cached frame"""
+        generation, df = self.source(sheet_name)
+        with self.lock:
+            # After apply_changes the table already matches the newer frame
+            self._frames[sheet_name] = df
+            if self._generations.get(sheet_name) == generation and generation is not None:
+                return self._columns[sheet_name]
+            self._import(sheet_name, df)
+            self._generations[sheet_name] = generation
+            return self._columns[sheet_name]
+
+    def _import(self, sheet_name, df):
+        table = _quote(sheet_name)
+        self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        columns = [str(c) for c in df.columns]
+        self._columns[sheet_name] = columns
+        if not columns:
+            return
+        df = df.copy(deep=False)
+        df.columns = columns
+        for col in columns:
+            # sqlite has no datetime type; store ISO strings
+            if pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = df[col].dt.strftime("%Y-%m-%d")
+        # Row position in the typed frame; queries return rows from that frame
+        df[ROW_COLUMN] = range(len(df))
+        df.to_sql(sheet_name, self.conn, index=False)
+        for col in INDEXED_COLUMNS:
+            if col in columns:
+                self.conn.execute(
+                    f"CREATE INDEX {_quote(f'ix_{sheet_name}_{col}')} ON {table} ({_quote(col)})"
+                )
+        self.conn.commit()
+
+    def apply_changes(self, sheet_name, changes, key, from_generation, to_generation):
+        with self.lock:
+            if self._generations.get(sheet_name) != from_generation or key not in self._columns.get(sheet_name, []):
+                return
+            table = _quote(sheet_name)
+            for c in changes:
+                if c.column not in self._columns[sheet_name]:
+                    self._generations.pop(sheet_name, None)
+                    return
+                value = to_cell(c.new)
+                self.conn.execute(
+                    f"UPDATE {table} SET {_quote(c.column)} = ? WHERE {_quote(key)} = ?",
+                    (None if value == "" else value, to_cell(c.key)),
+                )
+            self.conn.commit()
+            self._generations[sheet_name] = to_generation
+
+    # --- Queries ---
+    def _where(self, columns, filters):
+        clauses, params = [], []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            col, op = split_filter(name)
+            if col not in columns:
+                return " WHERE 0", []
+            if op is not None:
+                # Dates are stored as ISO strings, which compare in date order
+                clauses.append(f"{_quote(col)} {op} ?")
+                params.append(to_cell(pd.Timestamp(value)) if isinstance(value, (date, pd.Timestamp)) else value)
+            elif isinstance(value, (list, tuple, set)):
+                value = list(value)
+                if not value:
+                    return " WHERE 0", []
+                clauses.append(f"{_quote(col)} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{_quote(col)} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _read(self, sql, params):
+        with self.lock:
+            return pd.read_sql_query(sql, self.conn, params=params)
+
+    def query(self, sheet_name, columns=None, order_by=None, limit=None, offset=0, **filters):
+        all_columns = self._ensure(sheet_name)
+        if not all_columns:
+            return pd.DataFrame()
+        cols = all_columns if columns is None else [c for c in columns if c in all_columns]
+        where, params = self._where(all_columns, filters)
+        sql = f"SELECT {ROW_COLUMN} FROM {_quote(sheet_name)}{where}"
+        if order_by:
+            col, _, direction = order_by.partition(" ")
+            if col in all_columns:
+                sql += f" ORDER BY {_quote(col)} {'DESC' if direction.upper() == 'DESC' else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [int(limit), int(offset)]
+        with self.lock:
+            positions = [r[0] for r in self.conn.execute(sql, params).fetchall()]
+            frame = self._frames[sheet_name]
+        # Typed rows straight from the cached frame: no dtype round trip through SQL
+        return frame[cols].iloc[positions].reset_index(drop=True)
+
+    def count(self, sheet_name, **filters):
+        all_columns = self._ensure(sheet_name)
+        if not all_columns:
+            return 0
+        where, params = self._where(all_columns, filters)
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {_quote(sheet_name)}{where}", params).fetchone()[0]
+
+    def group_counts(self, sheet_name, column, **filters):
+        all_columns = self._ensure(sheet_name)
+        if column not in all_columns:
+            return pd.Series(dtype="int64")
+        where, params = self._where(all_columns, filters)
+        col = _quote(column)
+        df = self._read(
+            f"SELECT {col} AS k, COUNT(*) AS n FROM {_quote(sheet_name)}{where} "
+            f"GROUP BY {col} HAVING {col} IS NOT NULL ORDER BY n DESC",
+            params,
+        )
+        return pd.Series(df["n"].to_numpy(), index=pd.Index(df["k"], name=column), name="count")
+
+    def distinct(self, sheet_name, column, **filters):
+        all_columns = self._ensure(sheet_name)
+        if column not in all_columns:
+            return []
+        where, params = self._where(all_columns, filters)
+        col = _quote(column)
+        extra = " AND " if where else " WHERE "
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT DISTINCT {col} FROM {_quote(sheet_name)}{where}{extra}{col} IS NOT NULL", params
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def sums(self, sheet_name, columns, **filters):
+        all_columns = self._ensure(sheet_name)
+        cols = [c for c in columns if c in all_columns]
+        if not cols:
+            return {}
+        where, params = self._where(all_columns, filters)
+        select = ", ".join(f"TOTAL({_quote(c)})" for c in cols)
+        with self.lock:
+            row = self.conn.execute(f"SELECT {select} FROM {_quote(sheet_name)}{where}", params).fetchone()
+        return dict(zip(cols, row))
+
+
+# --- Process-wide backend (one per kind/path) ---
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(kind, source, path=":memory:"):
+    key = (kind, path)
+    with _backends_lock:
+        if key not in _backends:
+            if kind == "sqlite":
+                _backends[key] = SQLiteBackend(source, path=path)
+            else:
+                _backends[key] = FrameBackend(source)
+        backend = _backends[key]
+        # Always pull through the latest session's DataManager
+        backend.source = source
+        return backend
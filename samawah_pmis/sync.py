@@ -0,0 +1,216 @@
+"""Incremental refresh of Google Sheets data.
+
+Every row written by the app carries an `Updated_At` stamp. On refresh we
+download only three thin ranges - the header row, column A (row identity)
+and the stamp column - compare them with what we already hold, and fetch
+just the rows whose stamp or identity changed. A changed header or row
+count is a structural change and triggers a full reload.
+
+Edits typed directly into the spreadsheet don't touch `Updated_At` unless
+the sheet has an onEdit trigger that stamps it, so a full reload is still
+forced every `full_every` seconds and by the Settings refresh button.
+"""
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from sheets_api import column_letter, quote_sheet, values_to_frame
+
+STAMP_COLUMN = "Updated_At"
+# Sheets whose save paths stamp rows and that refresh incrementally
+STAMPED_SHEETS = ("Tasks", "MeetingRecommendations")
+
+
+def now_stamp():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def stamp_rows(base, df, column=STAMP_COLUMN, stamp=None):
+    """Returns `df` with `column` set to `stamp` on every row that is new or
+    differs from `base` (rows are compared on their content, so no key column
+    is needed). Unchanged rows keep the stamp they had in `base`."""
+    stamp = stamp or now_stamp()
+    out = df.copy()
+    content = [c for c in out.columns if c != column]
+    if base is None or base.empty or any(c not in base.columns for c in content):
+        out[column] = stamp
+        return out
+
+    base_hashes = pd.util.hash_pandas_object(base[content].astype(str), index=False).to_numpy()
+    if column in base.columns:
+        old_stamps = dict(zip(base_hashes, base[column]))
+    else:
+        # Stamp column is new: leave rows we didn't touch unstamped
+        old_stamps = dict.fromkeys(base_hashes, np.nan)
+    hashes = pd.util.hash_pandas_object(out[content].astype(str), index=False).to_numpy()
+    out[column] = [old_stamps.get(h, stamp) for h in hashes]
+    return out
+
+
+def _row_ranges(sheet_name, rows, last_col):
+    """1-based sheet rows -> A1 ranges, merging consecutive rows"""
+    ranges = []
+    rows = sorted(rows)
+    start = prev = rows[0]
+    for row in rows[1:] + [None]:
+        if row is not None and row == prev + 1:
+            prev = row
+            continue
+        ranges.append(f"{quote_sheet(sheet_name)}!A{start}:{column_letter(last_col)}{prev}")
+        if row is not None:
+            start = prev = row
+    return ranges
+
+
+def _column(values):
+    return [r[0] if r else None for r in values]
+
+
+class _SheetState:
+    def __init__(self, header, ids, stamps, frame):
+        self.header = header
+        self.ids = ids          # column A per data row
+        self.stamps = stamps    # Updated_At per data row
+        self.frame = frame
+        self.full_at = time.time()
+
+
+class IncrementalSync:
+    def __init__(self, api, full_every=1800):
+        self.api = api
+        self.full_every = full_every
+        self.lock = threading.Lock()
+        self.states = {}
+        self.stats = {"full_loads": 0, "incremental_loads": 0, "rows_fetched": 0}
+
+    def reset(self, sheet_name=None):
+        """Forces the next load of `sheet_name` (or every sheet) to be a full reload"""
+        with self.lock:
+            if sheet_name is None:
+                self.states.clear()
+            else:
+                self.states.pop(sheet_name, None)
+
+    def _needs_full(self, sheet_name, state):
+        return (
+            sheet_name not in STAMPED_SHEETS
+            or state is None
+            or STAMP_COLUMN not in state.header
+            or time.time() - state.full_at > self.full_every
+        )
+
+    def load(self, sheet_name):
+        with self.lock:
+            state = self.states.get(sheet_name)
+        if self._needs_full(sheet_name, state):
+            return self._full(sheet_name)
+        return self._incremental(sheet_name, state)
+
+    def load_many(self, sheet_names):
+        """{sheet_name: df}; every sheet that needs a full reload comes from a single
+        batchGet, the others are refreshed incrementally"""
+        full, frames = [], {}
+        for sheet_name in sheet_names:
+            with self.lock:
+                state = self.states.get(sheet_name)
+            if self._needs_full(sheet_name, state):
+                full.append(sheet_name)
+            else:
+                frames[sheet_name] = self._incremental(sheet_name, state)
+        if full:
+            blocks = self.api.batch_get([quote_sheet(name) for name in full])
+            for sheet_name, values in zip(full, blocks):
+                frames[sheet_name] = self._adopt(sheet_name, values)
+        return frames
+
+    def _full(self, sheet_name):
+        return self._adopt(sheet_name, self.api.get(quote_sheet(sheet_name)))
+
+    def _adopt(self, sheet_name, values):
+        """Frame (and incremental state) for a freshly downloaded worksheet"""
+        df = values_to_frame(values)
+        self.stats["full_loads"] += 1
+        self.stats["rows_fetched"] += len(df)
+        if sheet_name in STAMPED_SHEETS and values:
+            header = [str(h) for h in values[0]]
+            ids = [r[0] if r else None for r in values[1:]]
+            stamps = df[STAMP_COLUMN].tolist() if STAMP_COLUMN in df.columns else []
+            with self.lock:
+                self.states[sheet_name] = _SheetState(header, ids, stamps, df)
+        return df
+
+    def apply_append(self, sheet_name, header, rows, first_row):
+        """Adds rows this process appended (at 1-based sheet row `first_row`) to the
+        held state, so the next refresh stays incremental. If other rows got in
+        between, or the header changed, the next load is a full one."""
+        with self.lock:
+            state = self.states.get(sheet_name)
+            if state is None:
+                return
+            if header != state.header or first_row != len(state.ids) + 2:
+                del self.states[sheet_name]
+                return
+            appended = values_to_frame([header] + rows)
+            state.ids = state.ids + _column(rows)
+            if STAMP_COLUMN in appended.columns:
+                state.stamps = state.stamps + appended[STAMP_COLUMN].tolist()
+            state.frame = pd.concat([state.frame, appended], ignore_index=True)
+
+    def _incremental(self, sheet_name, state):
+        stamp_letter = column_letter(state.header.index(STAMP_COLUMN))
+        q = quote_sheet(sheet_name)
+        header_values, id_values, stamp_values = self.api.batch_get(
+            [f"{q}!1:1", f"{q}!A2:A", f"{q}!{stamp_letter}2:{stamp_letter}"]
+        )
+        header = [str(h) for h in (header_values[0] if header_values else [])]
+        ids = _column(id_values)
+        stamps = _column(stamp_values)
+        stamps += [None] * (len(ids) - len(stamps))
+        stamps = [np.nan if s in (None, "") else s for s in stamps]
+
+        # Structural change: re-download everything
+        if header != state.header or len(ids) != len(state.ids):
+            return self._full(sheet_name)
+
+        changed = [
+            i for i, (new_id, old_id, new_st, old_st) in enumerate(zip(ids, state.ids, stamps, state.stamps))
+            if new_id != old_id or not (new_st == old_st or (pd.isna(new_st) and pd.isna(old_st)))
+        ]
+        self.stats["incremental_loads"] += 1
+        if not changed:
+            return state.frame
+
+        rows = self.api.batch_get(_row_ranges(sheet_name, [i + 2 for i in changed], len(header) - 1))
+        fetched = values_to_frame([header] + [row for block in rows for row in block])
+        self.stats["rows_fetched"] += len(fetched)
+
+        frame = state.frame.copy()
+        for j, col in enumerate(header):
+            new_values = fetched[col].to_numpy()
+            try:
+                frame.iloc[changed, j] = new_values
+            except (TypeError, ValueError):
+                frame[col] = frame[col].astype(object)
+                frame.iloc[changed, j] = new_values
+
+        with self.lock:
+            state.ids, state.stamps, state.frame = ids, stamps, frame
+        return frame
+
+
+# --- Process-wide sync state (one per spreadsheet) ---
+_syncs = {}
+_syncs_lock = threading.Lock()
+
+
+def get_incremental_sync(api, full_every=1800):
+    with _syncs_lock:
+        sync = _syncs.get(api.spreadsheet_id)
+        if sync is None:
+            sync = IncrementalSync(api, full_every=full_every)
+            _syncs[api.spreadsheet_id] = sync
+        sync.api = api
+        return sync
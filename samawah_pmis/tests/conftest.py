@@ -0,0 +1,97 @@
+"""Fixtures for running the data layer offline against fake_sheets.
+
+The app's modules are flat (imported by name from samawah_pmis/), and the
+data layer keeps process-wide singletons - the shared cache, the stores fed
+from it, the write queue, the mirror. Every test gets fresh ones and runs
+in its own working directory, so journals and mirrors don't leak between
+tests.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aggregates  # noqa: E402
+import delta  # noqa: E402
+import figure_cache  # noqa: E402
+import fonts  # noqa: E402
+import mirror  # noqa: E402
+import schedule  # noqa: E402
+import search  # noqa: E402
+import shared_cache  # noqa: E402
+import snapshot  # noqa: E402
+import status  # noqa: E402
+import storage  # noqa: E402
+import sync  # noqa: E402
+import write_queue  # noqa: E402
+from data_manager import DataManager  # noqa: E402
+from fake_sheets import FakeSheetsServer  # noqa: E402
+from generate_mock_data import generate_synthetic_data  # noqa: E402
+from sheets_api import SheetsValuesClient  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(shared_cache, "_shared_cache", None)
+    monkeypatch.setattr(figure_cache, "_figure_cache", None)
+    monkeypatch.setattr(figure_cache, "_result_cache", None)
+    monkeypatch.setattr(fonts, "_css", {})
+    monkeypatch.setattr(fonts, "_building", set())
+    monkeypatch.setattr(fonts, "_failed", {})
+    monkeypatch.setattr(aggregates, "_store", aggregates.AggregateStore())
+    monkeypatch.setattr(schedule, "_store", schedule.ScheduleStore())
+    monkeypatch.setattr(search, "_index", search.SearchIndex())
+    monkeypatch.setattr(status, "_vocab", (None, None))
+    monkeypatch.setattr(storage, "_backends", {})
+    monkeypatch.setattr(sync, "_syncs", {})
+    monkeypatch.setattr(mirror, "_mirrors", {})
+    monkeypatch.setattr(snapshot, "_snapshots", {})
+    monkeypatch.setattr(delta, "_layouts", {})
+    monkeypatch.setattr(write_queue, "_queues", {})
+    yield
+    for queue in write_queue._queues.values():
+        queue.stop()
+
+
+@pytest.fixture
+def sheets():
+    """A small workbook shaped like the real spreadsheet: 2 projects x 10 tasks"""
+    return generate_synthetic_data(projects=2, tasks_per_project=10, owners=4, seed=1)
+
+
+@pytest.fixture
+def server(sheets):
+    with FakeSheetsServer(sheets) as server:
+        yield server
+
+
+@pytest.fixture
+def dm(server):
+    """DataManager in Google Sheets mode, talking to the fake server"""
+    manager = DataManager(sheets_api=SheetsValuesClient("test", base_url=server.base_url, timeout=2))
+    # Retry a journaled save quickly instead of backing off for seconds
+    manager.write_queue.base_delay = 0.05
+    manager.write_queue.max_delay = 0.2
+    return manager
+
+
+def sheet_cells(server, sheet_name):
+    """{(key, column): value} of a fake worksheet, keyed by its first column"""
+    header, *rows = server.spreadsheet.sheets[sheet_name]
+    return {
+        (row[0], column): row[i] if i < len(row) else ""
+        for row in rows if row
+        for i, column in enumerate(header)
+    }
+
+
+def edit(dm, rows, **columns):
+    """The Tasks rows at positions `rows` with `columns` set, as the editor hands them to a save"""
+    tasks = dm.load_data("Tasks")
+    edited = tasks.astype({column: object for column in columns}).iloc[rows].copy()
+    for column, value in columns.items():
+        edited[column] = value
+    return edited
@@ -0,0 +1,25 @@
+"""Per-project aggregates (aggregates.py)"""
+import pandas as pd
+
+from aggregates import build_aggregates
+
+
+def test_categorical_columns_count_only_what_each_project_has():
+    tasks = pd.DataFrame({
+        "Project_ID": pd.Categorical(["P1", "P1", "P2"], categories=["P1", "P2", "P3"]),
+        "Owner": pd.Categorical(["Ali", "Sara", "Omar"], categories=["Ali", "Sara", "Omar", "Nobody"]),
+        "Status": ["مكتمل", "جاري", "جاري"],
+        "Start_Date": pd.to_datetime(["2026-01-01", "2026-02-01", "2026-03-01"]),
+        "End_Date": pd.to_datetime(["2026-01-10", "2026-02-10", "2026-03-10"]),
+        "Cost": [1.0, 2.0, 3.0],
+        "Quantity_Total": [1, 1, 1],
+        "Quantity_Done": [1, 0, 0],
+    })
+
+    aggregates = build_aggregates(tasks)
+
+    assert sorted(aggregates) == ["P1", "P2"]
+    assert dict(aggregates["P1"].owner_counts) == {"Ali": 1, "Sara": 1}
+    assert dict(aggregates["P2"].owner_counts) == {"Omar": 1}
+    assert sorted(aggregates["P2"].start_dates) == [pd.Timestamp("2026-03-01")]
+    assert aggregates["P1"].task_count == 2
@@ -0,0 +1,43 @@
+"""Batched sheet loads (DataManager.prefetch): stale sheets come from one batchGet"""
+import time
+
+from data_manager import APP_SHEETS
+from sheets_api import quote_sheet
+
+
+def gets(server):
+    return [r for r in server.requests if r["method"] == "GET"]
+
+
+def test_cold_prefetch_loads_every_sheet_in_one_batch_get(dm, server):
+    dm.prefetch()
+
+    requests = gets(server)
+    assert [r["path"].rsplit("/", 1)[-1] for r in requests] == ["values:batchGet"]
+    assert sorted(requests[0]["query"]["ranges"]) == sorted(quote_sheet(name) for name in APP_SHEETS)
+    assert all(dm.snapshot_version(name)[0] is not None for name in APP_SHEETS)
+
+
+def test_only_the_stale_sheets_are_fetched_again(dm, server):
+    dm.prefetch()
+    server.requests.clear()
+    dm.cache.bump("Projects")
+    dm.cache.bump("Challenges")
+
+    dm.prefetch()
+
+    # The mirror serves them right away and one background batch refreshes both
+    deadline = time.time() + 5
+    while dm.cache.stats["background_refreshes"] < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    requests = gets(server)
+    assert [r["path"].rsplit("/", 1)[-1] for r in requests] == ["values:batchGet"]
+    assert sorted(requests[0]["query"]["ranges"]) == sorted([quote_sheet("Projects"), quote_sheet("Challenges")])
+
+
+def test_fresh_sheets_are_not_requested(dm, server):
+    dm.prefetch()
+    server.requests.clear()
+    dm.prefetch()
+    dm.load_data("Tasks")
+    assert server.requests == []
@@ -0,0 +1,116 @@
+"""Cell-level task saves (delta.py): only the edited cells reach the sheet"""
+import threading
+
+import pandas as pd
+
+import delta
+
+from conftest import edit, sheet_cells
+from data_manager import DataManager
+from generate_mock_data import write_workbook
+from sync import STAMP_COLUMN
+
+
+def changed_cells(before, after):
+    return {cell for cell in set(before) | set(after) if before.get(cell, "") != after.get(cell, "")}
+
+
+def test_save_sends_one_batch_update_with_only_the_changed_cells(dm, server):
+    dm.prefetch()
+    edited = edit(dm, [0, 3], Owner="Someone new")
+    keys = edited["Task_ID"].tolist()
+    before = sheet_cells(server, "Tasks")
+    server.requests.clear()
+
+    assert dm.save_task_updates(edited)
+
+    posts = [r for r in server.requests if r["method"] == "POST"]
+    assert [r["path"].rsplit("/", 1)[-1] for r in posts] == ["values:batchUpdate"]
+    updated = [block["range"] for block in posts[0]["body"]["data"]]
+    # Owner and the row stamp of the two edited rows, plus the new stamp column's header
+    assert len(updated) == 5
+    assert server.spreadsheet.sheets["Tasks"][0][-1] == STAMP_COLUMN
+    assert changed_cells(before, sheet_cells(server, "Tasks")) == {
+        (key, column) for key in keys for column in ("Owner", STAMP_COLUMN)
+    }
+    assert all(sheet_cells(server, "Tasks")[(key, "Owner")] == "Someone new" for key in keys)
+
+
+def test_unchanged_save_sends_nothing(dm, server):
+    dm.prefetch()
+    server.requests.clear()
+    assert dm.save_task_updates(dm.load_data("Tasks").iloc[:5])
+    assert server.requests == []
+
+
+def test_save_is_visible_without_reloading_the_sheet(dm, server):
+    dm.prefetch()
+    edited = edit(dm, [2], Sub_Task="Renamed")
+    server.requests.clear()
+    dm.save_task_updates(edited)
+    server.requests.clear()
+
+    tasks = dm.load_data("Tasks").set_index("Task_ID")
+    assert tasks.loc[edited["Task_ID"].iloc[0], "Sub_Task"] == "Renamed"
+    assert server.requests == []
+
+
+def test_edit_from_an_older_page_reports_the_cell_saved_meanwhile(dm, server):
+    dm.prefetch()
+    page = dm.query("Tasks", columns=["Task_ID", "Owner"], limit=5)
+    generation = dm.snapshot_version("Tasks")[0]
+    key = page["Task_ID"].iloc[0]
+
+    # Another session saves the same cell after this page was shown
+    other = edit(DataManager(sheets_api=dm.api), [0], Owner="Other session")
+    assert other["Task_ID"].iloc[0] == key
+    job = dm.queue_task_updates(other)
+    assert dm.write_queue.wait(job, 5) == "committed"
+
+    mine = page.astype({"Owner": object}).iloc[:1].copy()
+    mine["Owner"] = "Mine"
+    job = dm.queue_task_updates(mine, base=page, generation=generation)
+
+    assert dm.write_queue.wait(job, 5) == "committed"
+    assert [(c["key"], c["remote"]) for c in dm.write_conflicts(job)] == [(key, "Other session")]
+    assert sheet_cells(server, "Tasks")[(key, "Owner")] == "Other session"
+
+
+def test_local_save_patches_only_the_changed_cells(sheets, tmp_path):
+    path = str(tmp_path / "mock_data.xlsx")
+    write_workbook(sheets, path)
+    dm = DataManager(file_path=path)
+    edited = edit(dm, [1, 4], Owner="Local owner")
+    edited.loc[edited.index[0], "Quantity_Done"] = 3
+    before = pd.read_excel(path, sheet_name=None)
+
+    assert dm.save_task_updates(edited)
+
+    after = pd.read_excel(path, sheet_name=None)
+    for name in before:
+        if name != "Tasks":
+            pd.testing.assert_frame_equal(before[name], after[name])
+    tasks = after["Tasks"].set_index("Task_ID")
+    untouched = [c for c in before["Tasks"].columns if c not in ("Task_ID", "Owner", "Quantity_Done")]
+    pd.testing.assert_frame_equal(before["Tasks"].set_index("Task_ID")[untouched], tasks[untouched])
+    keys = edited["Task_ID"].tolist()
+    assert tasks.loc[keys, "Owner"].tolist() == ["Local owner", "Local owner"]
+    assert tasks.loc[keys[0], "Quantity_Done"] == 3
+    assert tasks[STAMP_COLUMN].notna().sum() == 2
+
+
+def test_whole_sheet_write_waits_for_a_cell_patch_in_progress(sheets, tmp_path):
+    path = str(tmp_path / "mock_data.xlsx")
+    write_workbook(sheets, path)
+    dm = DataManager(file_path=path)
+    meetings = dm.load_data("MeetingRecommendations").iloc[:1]
+
+    with delta._workbook_lock:
+        writer = threading.Thread(target=dm._write_whole_sheet, args=("MeetingRecommendations", meetings))
+        writer.start()
+        writer.join(0.5)
+        assert writer.is_alive()
+    writer.join(10)
+
+    assert not writer.is_alive()
+    assert len(pd.read_excel(path, sheet_name="MeetingRecommendations")) == 1
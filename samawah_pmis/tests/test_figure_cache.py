@@ -0,0 +1,45 @@
+"""Figure and result caches (figure_cache.py)"""
+import pandas as pd
+import plotly.graph_objects as go
+
+from figure_cache import FigureCache, ResultCache
+
+
+def bar_figure():
+    return go.Figure(go.Bar(x=["a", "b"], y=[1, 2]), layout=dict(height=300))
+
+
+def test_figures_are_stored_serialized_and_rebuilt_per_hit():
+    cache, builds = FigureCache(), []
+
+    def build():
+        builds.append(1)
+        return bar_figure()
+
+    first = cache.get_or_build("chart", build, versions=(1,))
+    first.update_layout(height=900)  # one session changing its copy
+    second = cache.get_or_build("chart", build, versions=(1,))
+
+    assert len(builds) == 1
+    assert second is not first
+    assert second.layout.height == 300
+    assert second.to_plotly_json() == bar_figure().to_plotly_json()
+    assert cache.bytes == len(bar_figure().to_json())
+
+
+def test_new_version_rebuilds_and_unloaded_sheet_is_not_cached():
+    cache = FigureCache()
+    cache.get_or_build("chart", bar_figure, versions=(1,))
+    cache.get_or_build("chart", bar_figure, versions=(2,))
+    cache.get_or_build("chart", bar_figure, versions=(None,))
+    assert cache.stats == {"hits": 0, "misses": 2, "evictions": 0}
+    assert len(cache) == 2
+
+
+def test_results_are_evicted_past_the_byte_budget():
+    frame = pd.DataFrame({"x": range(1000)})
+    cache = ResultCache(max_bytes=int(frame.memory_usage(deep=True).sum() * 1.5))
+    assert cache.get_or_build("a", lambda: frame, versions=(1,)) is frame
+    cache.get_or_build("b", lambda: frame.copy(), versions=(1,))
+    assert len(cache) == 1
+    assert cache.stats["evictions"] == 1
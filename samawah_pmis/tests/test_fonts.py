@@ -0,0 +1,34 @@
+"""Brand font CSS (fonts.py)"""
+import time
+
+import pytest
+
+import fonts
+
+
+def test_background_build_serves_cairo_then_reports_its_failure_once(tmp_path):
+    missing = str(tmp_path / "no-fonts")
+    static = str(tmp_path / "static")
+
+    assert fonts.font_css(missing, static, wait=False) == fonts.FALLBACK_CSS
+    deadline = time.time() + 5
+    while fonts._building and time.time() < deadline:
+        time.sleep(0.01)
+
+    for _ in range(2):
+        with pytest.raises(FileNotFoundError):
+            fonts.font_css(missing, static, wait=False)
+    # No rebuild is started by later reruns
+    assert not fonts._building
+
+
+def test_inline_css_is_built_once(tmp_path):
+    fonts_dir = tmp_path / "fonts"
+    fonts_dir.mkdir()
+    for file_name in fonts.FONT_FACES.values():
+        (fonts_dir / file_name).write_bytes(b"not really a font")
+
+    css = fonts.font_css(str(fonts_dir), str(tmp_path / "static"), static_serving=False)
+
+    assert css.count("@font-face") == len(fonts.FONT_FACES)
+    assert fonts.font_css(str(fonts_dir), str(tmp_path / "static"), static_serving=False, wait=False) is css
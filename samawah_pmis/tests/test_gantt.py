@@ -0,0 +1,43 @@
+"""Gantt lanes (gantt.py): level of detail and paging"""
+import pandas as pd
+
+import gantt
+
+
+def tasks(count, owners=3):
+    start = pd.Timestamp("2026-01-01")
+    return pd.DataFrame({
+        "Task": [f"Section {i % 4}" for i in range(count)],
+        "Sub_Task": [f"Task {i}" for i in range(count)],
+        "Owner": [f"Owner {i % owners}" for i in range(count)],
+        "start": [start + pd.Timedelta(days=i) for i in range(count)],
+        "end": [start + pd.Timedelta(days=i + 3) for i in range(count)],
+        "status_code": 0,
+    })
+
+
+def test_owner_lanes_keep_a_bar_per_task():
+    lanes, level = gantt.build_lanes(tasks(12), gantt.LEVEL_OWNERS)
+    assert level == gantt.LEVEL_OWNERS
+    assert len(lanes) == 12
+    assert sorted(lanes["label"].unique()) == ["Owner 0", "Owner 1", "Owner 2"]
+    assert gantt.page_count(lanes, lanes_per_page=2) == 2
+    assert set(gantt.lane_page(lanes, 2, lanes_per_page=2)["label"]) == {"Owner 2"}
+
+
+def test_owner_lanes_collapse_to_spans_past_max_bars():
+    lanes, level = gantt.build_lanes(tasks(12), gantt.LEVEL_OWNERS, max_bars=10)
+    assert level == gantt.LEVEL_OWNER_SPANS
+    assert lanes["label"].tolist() == ["Owner 0 (4)", "Owner 1 (4)", "Owner 2 (4)"]
+    assert lanes["end"].tolist() == [pd.Timestamp("2026-01-13"), pd.Timestamp("2026-01-14"), pd.Timestamp("2026-01-15")]
+
+
+def test_task_lanes_collapse_to_sections_past_max_bars():
+    _, level = gantt.build_lanes(tasks(12), gantt.LEVEL_TASKS, max_bars=10)
+    assert level == gantt.LEVEL_SECTIONS
+
+
+def test_page_past_the_end_shows_the_last_page():
+    lanes, _ = gantt.build_lanes(tasks(12), gantt.LEVEL_OWNERS)
+    assert set(gantt.lane_page(lanes, 7, lanes_per_page=2)["label"]) == {"Owner 2"}
+    assert set(gantt.lane_page(lanes, 0, lanes_per_page=2)["label"]) == {"Owner 0", "Owner 1"}
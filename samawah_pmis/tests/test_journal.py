@@ -0,0 +1,129 @@
+"""Write-behind journal (write_queue.py) and local mirror (mirror.py) during outages"""
+import time
+
+import pytest
+
+from conftest import edit, sheet_cells
+from data_manager import DataManager
+from fake_sheets import FakeSheetsServer
+from sheets_api import SheetsValuesClient
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_save_during_an_outage_stays_journaled_and_replays(dm, server):
+    dm.prefetch()
+    server.offline = True
+    edited = edit(dm, [0], Owner="Offline owner")
+    key = edited["Task_ID"].iloc[0]
+    server.requests.clear()
+
+    job = dm.queue_task_updates(edited)
+
+    # Retried (and refused) a few times, still waiting in the journal
+    assert wait_until(lambda: len(server.requests) >= 2)
+    assert dm.write_status(job) == "pending"
+    assert dm.write_queue.pending_count("Tasks") == 1
+    assert sheet_cells(server, "Tasks")[(key, "Owner")] != "Offline owner"
+    # Served locally meanwhile, from the shared cache and from the mirror
+    assert dm.load_data("Tasks").set_index("Task_ID").loc[key, "Owner"] == "Offline owner"
+    assert dm.mirror.load("Tasks").set_index("Task_ID").loc[key, "Owner"] == "Offline owner"
+
+    server.offline = False
+    dm.write_queue.retry_now()
+
+    assert dm.write_queue.wait(job, 5) == "committed"
+    assert dm.write_queue.pending_count() == 0
+    assert sheet_cells(server, "Tasks")[(key, "Owner")] == "Offline owner"
+
+
+def test_replay_reports_a_remote_edit_instead_of_overwriting_it(dm, server):
+    dm.prefetch()
+    server.offline = True
+    edited = edit(dm, [1], Owner="Journaled owner")
+    key = edited["Task_ID"].iloc[0]
+    job = dm.queue_task_updates(edited)
+
+    # Someone edits the same cell in the spreadsheet while we are cut off
+    header, *rows = server.spreadsheet.sheets["Tasks"]
+    row = next(r for r in rows if r[0] == key)
+    base = row[header.index("Owner")]
+    row[header.index("Owner")] = "Remote owner"
+
+    server.offline = False
+    dm.write_queue.retry_now()
+
+    assert dm.write_queue.wait(job, 5) == "committed"
+    assert [(c["key"], c["column"], c["base"], c["local"], c["remote"]) for c in dm.write_conflicts(job)] == [
+        (key, "Owner", base, "Journaled owner", "Remote owner")
+    ]
+    assert sheet_cells(server, "Tasks")[(key, "Owner")] == "Remote owner"
+
+
+def test_cell_saves_are_logged_in_the_mirror_not_rewritten(dm, server):
+    dm.prefetch()
+    snapshot = dm.mirror.conn.execute("SELECT payload FROM sheets WHERE sheet = 'Tasks'").fetchone()
+    edited = edit(dm, [2, 5], Owner="Patched owner")
+    dm.save_task_updates(edited)
+    dm.append_rows("MeetingRecommendations", [{"Recommendation": "توصية جديدة"}])
+
+    assert dm.mirror.conn.execute("SELECT payload FROM sheets WHERE sheet = 'Tasks'").fetchone() == snapshot
+    assert dm.mirror.conn.execute("SELECT sheet, kind FROM patches ORDER BY id").fetchall() == [
+        ("Tasks", "cells"), ("MeetingRecommendations", "rows")
+    ]
+
+    tasks = dm.mirror.load("Tasks").set_index("Task_ID")
+    assert tasks.loc[edited["Task_ID"], "Owner"].tolist() == ["Patched owner", "Patched owner"]
+    assert dm.mirror.load("MeetingRecommendations")["Recommendation"].iloc[-1] == "توصية جديدة"
+    # Reading folds the log into the snapshot
+    assert dm.mirror.conn.execute("SELECT COUNT(*) FROM patches").fetchone() == (0,)
+
+
+def test_outage_retries_back_off_without_using_up_attempts(dm, server):
+    dm.prefetch()
+    server.offline = True
+    job = dm.queue_task_updates(edit(dm, [3], Owner="Waiting owner"))
+    queue = dm.write_queue
+
+    def row():
+        with queue.lock:
+            return queue.conn.execute(
+                "SELECT status, attempts, retries, next_attempt_at - updated_at FROM jobs WHERE id = ?", (job,)
+            ).fetchone()
+
+    # Delay set after each transient failure, by retry count
+    delays = {}
+    deadline = time.time() + 5
+    while len(delays) < 4 and time.time() < deadline:
+        status, attempts, retries, delay = row()
+        if retries:
+            delays[retries] = round(delay, 3)
+        time.sleep(0.005)
+
+    assert (status, attempts) == ("pending", 0)
+    # base_delay 0.05 doubling per retry, capped at max_delay 0.2
+    assert [delays[n] for n in sorted(delays)][-1] == pytest.approx(0.2)
+    assert all(delays[n] == pytest.approx(min(0.2, 0.05 * 2 ** (n - 1))) for n in delays)
+
+
+def test_mirror_patches_find_columns_under_the_sheet_s_own_headers(sheets):
+    sheets = dict(sheets, Tasks=sheets["Tasks"].rename(columns={"Task": "القسم", "Sub_Task": "المهمة"}))
+    with FakeSheetsServer(sheets) as server:
+        dm = DataManager(sheets_api=SheetsValuesClient("test", base_url=server.base_url, timeout=2))
+        dm.prefetch()
+        edited = edit(dm, [0], Sub_Task="Renamed in the app")
+        dm.save_task_updates(edited)
+        dm.append_rows("Tasks", edited.assign(Task_ID="T-NEW"))
+
+        mirrored = dm.mirror.load("Tasks")
+
+    assert list(mirrored.columns[:len(sheets["Tasks"].columns)]) == list(sheets["Tasks"].columns)
+    assert "Sub_Task" not in mirrored.columns and "Task" not in mirrored.columns
+    rows = mirrored.set_index("Task_ID")
+    assert rows.loc[edited["Task_ID"].iloc[0], "المهمة"] == "Renamed in the app"
+    assert rows.loc["T-NEW", "المهمة"] == "Renamed in the app"
@@ -0,0 +1,26 @@
+"""Metrics registry (metrics.py)"""
+import pytest
+
+from metrics import Metrics
+
+
+def test_failing_timed_block_with_labels_reraises_and_counts_the_error():
+    metrics = Metrics()
+
+    with pytest.raises(ValueError, match="boom"):
+        with metrics.timer("sheets_request_seconds", operation="batchGet", sheet="Tasks"):
+            raise ValueError("boom")
+
+    assert metrics.counter_rows() == [{
+        "metric": "errors_total", "operation": "batchGet", "sheet": "Tasks",
+        "timer": "sheets_request_seconds", "value": 1,
+    }]
+    assert [(row["metric"], row["count"]) for row in metrics.summary()] == [("sheets_request_seconds", 1)]
+
+
+def test_disabled_registry_times_nothing():
+    metrics = Metrics(enabled=False)
+    with pytest.raises(ValueError):
+        with metrics.timer("sheet_load_seconds", sheet="Tasks"):
+            raise ValueError
+    assert metrics.counter_rows() == [] and metrics.summary() == []
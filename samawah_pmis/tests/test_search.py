@@ -0,0 +1,37 @@
+"""Full-text search (search.py): Arabic normalization and prefixes"""
+import pandas as pd
+
+from search import SearchIndex
+
+
+def index_of(tasks):
+    index = SearchIndex()
+    frames = {"Tasks": pd.DataFrame(tasks)}
+    index.sync(lambda sheet: (1, frames.get(sheet, pd.DataFrame())))
+    return index
+
+
+def keys(index, text):
+    return sorted(hit["key"] for hit in index.search(text))
+
+
+def test_article_is_stripped_from_query_words_as_from_documents():
+    index = index_of({
+        "Task_ID": ["T1", "T2", "T3"],
+        "Sub_Task": ["مراجعة التصاميم", "المراجعة النهائية", "توريد المعدات"],
+        "Task": ["", "", ""],
+    })
+    assert keys(index, "المراجعة") == ["T1", "T2"]
+    assert keys(index, "مراجعة") == ["T1", "T2"]
+    assert keys(index, "والمراجعة") == ["T1", "T2"]
+    assert keys(index, "المعدات") == ["T3"]
+
+
+def test_last_word_matches_as_a_prefix_after_stripping():
+    index = index_of({
+        "Task_ID": ["T1", "T2"],
+        "Sub_Task": ["مراجعة التصاميم", "توريد المعدات"],
+        "Task": ["", ""],
+    })
+    assert keys(index, "المراج") == ["T1"]
+    assert keys(index, "مراجعه التص") == ["T1"]
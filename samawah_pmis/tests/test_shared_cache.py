@@ -0,0 +1,51 @@
+"""Shared sheet cache (shared_cache.py): refreshes that find nothing new keep the generation"""
+import time
+
+from data_manager import DataManager
+from generate_mock_data import write_workbook
+
+
+def refreshed(cache, count, timeout=5):
+    deadline = time.time() + timeout
+    while cache.stats["background_refreshes"] < count and time.time() < deadline:
+        time.sleep(0.01)
+    return cache.stats["background_refreshes"] >= count
+
+
+def test_soft_refresh_of_an_untouched_workbook_keeps_the_generation(sheets, tmp_path):
+    path = str(tmp_path / "mock_data.xlsx")
+    write_workbook(sheets, path)
+    dm = DataManager(file_path=path)
+    dm.project_aggregates()
+    generation = dm.snapshot_version("Tasks")
+
+    dm.cache.soft_ttl = 0
+    dm.load_data("Tasks")
+    assert refreshed(dm.cache, 1)
+    dm.cache.soft_ttl = 30
+
+    assert dm.snapshot_version("Tasks") == generation
+    assert dm.cache.stats["unchanged_reloads"] >= 1
+    dm.project_aggregates()
+    assert dm.aggregates.stats["builds"] == 1
+
+
+def test_soft_refresh_without_remote_changes_keeps_the_generation(dm, server):
+    dm.prefetch()
+    before = dm.snapshot_version("Tasks", "Projects")
+
+    dm.cache.soft_ttl = 0
+    dm.prefetch(("Tasks", "Projects"))
+    assert refreshed(dm.cache, 2)
+    dm.cache.soft_ttl = 30
+    assert dm.snapshot_version("Tasks", "Projects") == before
+
+    # A cell edited in the spreadsheet does give a new generation
+    header, *rows = server.spreadsheet.sheets["Tasks"]
+    rows[0][header.index("Owner")] = "Edited in the sheet"
+    dm.cache.soft_ttl = 0
+    dm.prefetch(("Tasks",))
+    assert refreshed(dm.cache, 3)
+    dm.cache.soft_ttl = 30
+    assert dm.snapshot_version("Tasks") != before[:1]
+    assert dm.load_data("Tasks")["Owner"].iloc[0] == "Edited in the sheet"
@@ -0,0 +1,42 @@
+"""Local workbook snapshots (snapshot.py)"""
+import pandas as pd
+
+import snapshot
+from generate_mock_data import write_workbook
+
+
+def test_sheets_of_a_snapshot_are_parsed_from_one_open_workbook(sheets, tmp_path, monkeypatch):
+    path = str(tmp_path / "mock_data.xlsx")
+    write_workbook(sheets, path)
+    opened = []
+    excel_file = pd.ExcelFile
+
+    def spy(*args, **kwargs):
+        opened.append(args)
+        return excel_file(*args, **kwargs)
+
+    monkeypatch.setattr(snapshot.pd, "ExcelFile", spy)
+    snap = snapshot.load_workbook_snapshot(path)
+
+    assert snap.has_sheet("Tasks")
+    for name in ("Projects", "Tasks", "Documents"):
+        pd.testing.assert_frame_equal(snap.get(name), pd.read_excel(path, sheet_name=name))
+    assert snap.get("No such sheet").empty
+    assert len(opened) == 1
+    assert snapshot.load_workbook_snapshot(path) is snap
+
+
+def test_a_rewritten_workbook_gets_a_new_snapshot(sheets, tmp_path):
+    path = str(tmp_path / "mock_data.xlsx")
+    write_workbook(sheets, path)
+    old = snapshot.load_workbook_snapshot(path)
+    old.get("Projects")
+
+    changed = dict(sheets, Projects=sheets["Projects"].iloc[:1])
+    write_workbook(changed, path)
+
+    new = snapshot.load_workbook_snapshot(path)
+    assert new is not old
+    assert len(new.get("Projects")) == 1
+    # Sheets the old snapshot had already parsed stay as they were
+    assert len(old.get("Projects")) == len(sheets["Projects"])
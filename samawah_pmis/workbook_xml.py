@@ -0,0 +1,213 @@
+"""Cell patches applied straight to the XML inside an .xlsx file.
+
+openpyxl loads every cell of every sheet into objects and serializes them
+all again on save, which costs about as much as the sheets are large. A
+cell-level save only needs to touch a few <c> elements of one worksheet
+part, so this rewrites that part as text and copies the rest of the zip
+over unchanged (see delta.patch_workbook):
+
+    sheet = SheetXml("mock_data.xlsx", "Tasks")
+    sheet.save(sheet.patched({(5, 2): "مكتمل"}))  # row 5, column C
+
+Edited strings are written as inline strings (the sharedStrings part is
+left alone) and existing cell styles are kept. Anything outside the layout
+openpyxl and Excel write (rows or cells without an `r` reference, a missing
+sheet) gives None instead, so the caller can fall back to openpyxl.
+"""
+import os
+import re
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape, unescape
+
+from sheets_api import column_letter
+
+_TAG_ATTRS = re.compile(r'([\w:]+)="([^"]*)"')
+_ROW = re.compile(r'<row\b[^>]*?\br="(\d+)"')
+_CELL = re.compile(r'<c\b([^>]*?)\br="([A-Z]+)(\d+)"([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+_ATTR = re.compile(r'\b(t|s)="([^"]*)"')
+_TEXT = re.compile(r"<t\b[^>]*>(.*?)</t>", re.S)
+_VALUE = re.compile(r"<v>(.*?)</v>", re.S)
+_SHARED = re.compile(r"<si>(.*?)</si>", re.S)
+_DIMENSION = re.compile(r'<dimension ref="([A-Z]+\d+):([A-Z]+)(\d+)"')
+
+
+def _col_index(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - 64)
+    return n - 1
+
+
+def _tags(xml, name):
+    """Attributes of every <name .../> element, in any attribute order"""
+    return [dict(_TAG_ATTRS.findall(m.group(1))) for m in re.finditer(r"<%s\b([^>]*)>" % name, xml)]
+
+
+def _sheet_part(book, sheet_name):
+    """Zip member holding `sheet_name`, or None"""
+    sheets = _tags(book.read("xl/workbook.xml").decode("utf-8"), "sheet")
+    rel_id = next((a.get("r:id") for a in sheets if unescape(a.get("name", ""), {"&quot;": '"'}) == sheet_name), None)
+    rels = _tags(book.read("xl/_rels/workbook.xml.rels").decode("utf-8"), "Relationship")
+    target = next((a.get("Target") for a in rels if rel_id is not None and a.get("Id") == rel_id), None)
+    if target is None:
+        return None
+    return target.lstrip("/") if target.startswith("/") else "xl/" + target
+
+
+def _cell_value(attrs, body, shared):
+    """Value of a <c> element the way openpyxl reads it (numbers as int/float)"""
+    kind = dict(_ATTR.findall(attrs)).get("t", "n")
+    if kind == "inlineStr":
+        return unescape("".join(_TEXT.findall(body or "")))
+    value = _VALUE.search(body or "")
+    if value is None:
+        return None
+    text = unescape(value.group(1))
+    if kind == "s":
+        return shared()[int(text)]
+    if kind in ("str", "e"):
+        return text
+    if kind == "b":
+        return text == "1"
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _cell_xml(ref, style, value):
+    if value is None or value == "":
+        return f'<c r="{ref}"{style}/>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{style} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"{style}><v>{value!r}</v></c>'
+    return f'<c r="{ref}"{style} t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+class SheetXml:
+    """One worksheet part of an .xlsx, read as text"""
+
+    def __init__(self, path, sheet_name):
+        self.path = path
+        self.name = sheet_name
+        self._book = zipfile.ZipFile(path)
+        self.part = _sheet_part(self._book, sheet_name)
+        self.xml = self._book.read(self.part).decode("utf-8") if self.part in self._book.namelist() else None
+        self._shared = None
+        self._rows = None
+
+    def close(self):
+        self._book.close()
+
+    def shared_strings(self):
+        if self._shared is None:
+            self._shared = []
+            if "xl/sharedStrings.xml" in self._book.namelist():
+                sst = self._book.read("xl/sharedStrings.xml").decode("utf-8")
+                self._shared = [unescape("".join(_TEXT.findall(si))) for si in _SHARED.findall(sst)]
+        return self._shared
+
+    def rows(self):
+        """{1-based row: offset of its <row> element}"""
+        if self._rows is None:
+            self._rows = {int(m.group(1)): m.start() for m in _ROW.finditer(self.xml)}
+        return self._rows
+
+    def _element(self, start, name):
+        """(start, end) of the element opening at `start`"""
+        close = self.xml.index(">", start)
+        if self.xml[close - 1] == "/":
+            return start, close + 1
+        return start, self.xml.index(f"</{name}>", close) + len(name) + 3
+
+    def row_cells(self, row):
+        """{0-based column: (match of the <c> element)} of one row, None if a cell has no reference"""
+        start, end = self._element(self.rows()[row], "row")
+        text = self.xml[start:end]
+        cells = {_col_index(m.group(2)): m for m in _CELL.finditer(text)}
+        if len(cells) != len(re.findall(r"<c\b", text)):
+            return None
+        return cells
+
+    def header(self):
+        if 1 not in self.rows():
+            return []
+        cells = self.row_cells(1) or {}
+        width = max(cells, default=-1) + 1
+        return [_cell_value(cells[i].group(1) + cells[i].group(4), cells[i].group(5), self.shared_strings)
+                if i in cells else None for i in range(width)]
+
+    def column(self, col):
+        """Values of one column from row 2 down, in sheet order (None for gaps)"""
+        values = {}
+        # Look for the cell references, then read just those elements
+        for m in re.finditer(r'r="%s(\d+)"' % column_letter(col), self.xml):
+            row = int(m.group(1))
+            start = self.xml.rfind("<", 0, m.start())
+            if row < 2 or not self.xml[m.start() - 1].isspace() or not self.xml.startswith("<c", start):
+                continue
+            cell = _CELL.match(self.xml, *self._element(start, "c"))
+            if cell is not None:
+                values[row] = _cell_value(cell.group(1) + cell.group(4), cell.group(5), self.shared_strings)
+        last = max(values, default=1)
+        return [values.get(row) for row in range(2, last + 1)]
+
+    def patched(self, cells):
+        """The sheet XML with `cells` ({(1-based row, 0-based col): value}) written,
+        None if a row or cell can't be addressed"""
+        by_row = {}
+        for (row, col), value in cells.items():
+            by_row.setdefault(row, {})[col] = value
+        rows = self.rows()
+        pieces, pos = [], 0
+        for row in sorted(by_row):
+            if row not in rows:
+                return None
+            current = self.row_cells(row)
+            if current is None:
+                return None
+            start, end = self._element(rows[row], "row")
+            text = self.xml[start:end]
+            open_tag = re.match(r"<row\b[^>]*?(/?)>", text)
+            # spans is only a hint and would be stale once a column is added
+            tag = re.sub(r'\sspans="[^"]*"', "", open_tag.group(0)[:-2 if open_tag.group(1) else -1])
+            elements = {col: m.group(0) for col, m in current.items()}
+            for col, value in by_row[row].items():
+                old = current.get(col)
+                style = ""
+                if old is not None:
+                    s = dict(_ATTR.findall(old.group(1) + old.group(4))).get("s")
+                    style = f' s="{s}"' if s is not None else ""
+                elements[col] = _cell_xml(f"{column_letter(col)}{row}", style, value)
+            pieces += [self.xml[pos:start], tag, ">", "".join(elements[c] for c in sorted(elements)), "</row>"]
+            pos = end
+        pieces.append(self.xml[pos:])
+        xml = "".join(pieces)
+
+        width = max((col for _, col in cells), default=0) + 1
+        dimension = _DIMENSION.search(xml)
+        if dimension is not None and width > _col_index(dimension.group(2)) + 1:
+            ref = f'<dimension ref="{dimension.group(1)}:{column_letter(width - 1)}{dimension.group(3)}"'
+            xml = xml[:dimension.start()] + ref + xml[dimension.end():]
+        return xml
+
+    def save(self, xml):
+        """Writes the workbook back with this part replaced; the file is swapped in atomically"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(suffix=".xlsx", dir=directory)
+        try:
+            os.chmod(tmp, os.stat(self.path).st_mode & 0o7777)
+            with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w") as out:
+                for info in self._book.infolist():
+                    if info.filename == self.part:
+                        out.writestr(info, xml.encode("utf-8"), compress_type=zipfile.ZIP_DEFLATED, compresslevel=1)
+                    else:
+                        out.writestr(info, self._book.read(info))
+            self.close()
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
@@ -0,0 +1,288 @@
+"""Durable write-behind queue for sheet saves.
+
+Saves are recorded in a small SQLite file and applied by a background
+thread, so the Streamlit session returns immediately. Repeated saves of the
+same sheet are merged while they are still pending:
+
+* a full-sheet write replaces any pending write of that sheet;
+* cell writes are merged into the pending cell write (last value wins);
+* appended rows are added to the pending append of the same columns.
+
+Failed writes are retried with exponential backoff; jobs left over from a
+crash are picked up again on the next start. Errors the `transient`
+predicate accepts (Sheets unreachable, rate limited) never use up a job's
+attempts: they are counted separately and only lengthen its backoff, up
+to `max_delay`. The queue is a write-ahead journal that is replayed, in
+order, whenever the sheet can be reached again.
+
+A writer may return a list of conflicts (cells someone else changed since
+the edit was made); they are kept with the job and `on_conflict` is called.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+PENDING = "pending"
+RUNNING = "running"
+COMMITTED = "committed"
+FAILED = "failed"
+MERGED = "merged"
+
+
+class WriteBehindQueue:
+    def __init__(self, path, writer, max_attempts=5, base_delay=1.0, max_delay=60.0, transient=None):
+        self.path = path
+        self.writer = writer  # writer(sheet_name, kind, payload) -> conflicts or None, raises on failure
+        self.on_failure = None  # called with the sheet name when a job gives up
+        self.on_conflict = None  # called with the sheet name when a job had conflicts
+        self.transient = transient or (lambda exc: False)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.wakeup = threading.Condition(self.lock)
+        self._stopped = False
+        self._init_db()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def _init_db(self):
+        with self.lock:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sheet TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL DEFAULT 0,
+                    merged_into INTEGER,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )""")
+            columns = [r[1] for r in self.conn.execute("PRAGMA table_info(jobs)")]
+            if "conflicts" not in columns:
+                self.conn.execute("ALTER TABLE jobs ADD COLUMN conflicts TEXT")
+            if "retries" not in columns:
+                # Transient failures, kept apart from `attempts` (see max_attempts)
+                self.conn.execute("ALTER TABLE jobs ADD COLUMN retries INTEGER NOT NULL DEFAULT 0")
+            # A job that was running when the process died never committed
+            self.conn.execute("UPDATE jobs SET status = ? WHERE status = ?", (PENDING, RUNNING))
+            self.conn.commit()
+
+    # --- Producer side ---
+    def enqueue(self, sheet_name, kind, payload):
+        """Records a write and returns its job id (which may be an existing,
+        merged job). `kind` is "sheet" (payload: values incl. header row),
+        "cells" (payload: {"key": column, "cells": [[key, column, value], ...]})
+        or "rows" (payload: {"columns": [...], "rows": [[...], ...]} to append)."""
+        now = time.time()
+        with self.lock:
+            pending = self.conn.execute(
+                "SELECT id, kind, payload FROM jobs WHERE sheet = ? AND status = ? ORDER BY id",
+                (sheet_name, PENDING),
+            ).fetchall()
+
+            if kind == "cells" and pending and pending[-1][1] == "cells":
+                job_id, _, old_payload = pending[-1]
+                merged = json.loads(old_payload)
+                if merged.get("key") == payload.get("key"):
+                    # Last value wins; the base value stays the one the first edit saw
+                    cells = {(cell[0], cell[1]): list(cell) for cell in merged["cells"]}
+                    for cell in payload["cells"]:
+                        old = cells.get((cell[0], cell[1]))
+                        cells[(cell[0], cell[1])] = list(cell[:3]) + (old[3:] if old else list(cell[3:]))
+                    merged["cells"] = list(cells.values())
+                    self.conn.execute(
+                        "UPDATE jobs SET payload = ?, updated_at = ? WHERE id = ?",
+                        (json.dumps(merged, ensure_ascii=False), now, job_id),
+                    )
+                    self.conn.commit()
+                    self.wakeup.notify_all()
+                    return job_id
+
+            if kind == "rows" and pending and pending[-1][1] == "rows":
+                job_id, _, old_payload = pending[-1]
+                merged = json.loads(old_payload)
+                if merged["columns"] == payload["columns"]:
+                    merged["rows"] += payload["rows"]
+                    self.conn.execute(
+                        "UPDATE jobs SET payload = ?, updated_at = ? WHERE id = ?",
+                        (json.dumps(merged, ensure_ascii=False), now, job_id),
+                    )
+                    self.conn.commit()
+                    self.wakeup.notify_all()
+                    return job_id
+
+            cur = self.conn.execute(
+                "INSERT INTO jobs (sheet, kind, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (sheet_name, kind, json.dumps(payload, ensure_ascii=False), PENDING, now, now),
+            )
+            job_id = cur.lastrowid
+            if kind == "sheet":
+                # A full rewrite makes every earlier pending write of this sheet redundant
+                for old_id, _, _ in pending:
+                    self.conn.execute(
+                        "UPDATE jobs SET status = ?, merged_into = ?, updated_at = ? WHERE id = ?",
+                        (MERGED, job_id, now, old_id),
+                    )
+            self.conn.commit()
+            self.wakeup.notify_all()
+            return job_id
+
+    def status(self, job_id):
+        """pending / committed / failed (following merges), or None if unknown"""
+        with self.lock:
+            for _ in range(100):
+                row = self.conn.execute("SELECT status, merged_into FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is None:
+                    return None
+                status, merged_into = row
+                if status != MERGED:
+                    return PENDING if status == RUNNING else status
+                job_id = merged_into
+        return None
+
+    def error(self, job_id):
+        with self.lock:
+            row = self.conn.execute("SELECT error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def conflicts(self, job_id=None, limit=50):
+        """Conflicts of one job, or of the latest jobs that had any"""
+        sql = "SELECT conflicts FROM jobs WHERE conflicts IS NOT NULL"
+        params = []
+        if job_id is not None:
+            sql += " AND id = ?"
+            params.append(job_id)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [c for (payload,) in rows for c in json.loads(payload)]
+
+    def retry_now(self):
+        """Makes backed-off jobs due immediately (e.g. once Sheets answers again)"""
+        with self.lock:
+            self.conn.execute("UPDATE jobs SET next_attempt_at = 0 WHERE status = ?", (PENDING,))
+            self.conn.commit()
+            self.wakeup.notify_all()
+
+    def pending_count(self, sheet_name=None):
+        sql = "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)"
+        params = [PENDING, RUNNING]
+        if sheet_name is not None:
+            sql += " AND sheet = ?"
+            params.append(sheet_name)
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()[0]
+
+    def wait(self, job_id, timeout=10.0):
+        """Blocks until the job commits or fails (used by scripts, not the UI)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            status = self.status(job_id)
+            if status in (COMMITTED, FAILED):
+                return status
+            time.sleep(0.02)
+        return self.status(job_id)
+
+    # --- Worker side ---
+    def _next_job(self):
+        """Oldest pending job whose sheet has no earlier job still waiting"""
+        now = time.time()
+        rows = self.conn.execute(
+            "SELECT id, sheet, kind, payload, attempts, retries, next_attempt_at FROM jobs WHERE status = ? ORDER BY id",
+            (PENDING,),
+        ).fetchall()
+        blocked = set()
+        soonest = None
+        for job_id, sheet, kind, payload, attempts, retries, next_at in rows:
+            if sheet in blocked:
+                continue
+            if next_at <= now:
+                return (job_id, sheet, kind, payload, attempts, retries), None
+            # Writes of one sheet stay in order: a backed-off job holds the rest
+            blocked.add(sheet)
+            soonest = next_at if soonest is None else min(soonest, next_at)
+        return None, soonest
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if self._stopped:
+                    return
+                job, soonest = self._next_job()
+                if job is None:
+                    self.wakeup.wait(None if soonest is None else max(0.01, soonest - time.time()))
+                    continue
+                job_id, sheet, kind, payload, attempts, retries = job
+                self.conn.execute("UPDATE jobs SET status = ? WHERE id = ?", (RUNNING, job_id))
+                self.conn.commit()
+
+            conflicts, transient = None, False
+            try:
+                conflicts = self.writer(sheet, kind, json.loads(payload))
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                transient = self.transient(e)
+
+            with self.lock:
+                now = time.time()
+                if error is None:
+                    self.conn.execute(
+                        "UPDATE jobs SET status = ?, error = NULL, conflicts = ?, updated_at = ? WHERE id = ?",
+                        (COMMITTED, json.dumps(conflicts, ensure_ascii=False, default=str) if conflicts else None, now, job_id),
+                    )
+                elif transient:
+                    # Sheets unreachable: keep the job, retry at the capped backoff
+                    retries += 1
+                    delay = min(self.max_delay, self.base_delay * (2 ** min(retries - 1, 16)))
+                    self.conn.execute(
+                        "UPDATE jobs SET status = ?, retries = ?, next_attempt_at = ?, error = ?, updated_at = ? WHERE id = ?",
+                        (PENDING, retries, now + delay, error, now, job_id),
+                    )
+                else:
+                    attempts += 1
+                    status = FAILED if attempts >= self.max_attempts else PENDING
+                    delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+                    self.conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = ?, next_attempt_at = ?, error = ?, updated_at = ? WHERE id = ?",
+                        (status, attempts, now + delay, error, now, job_id),
+                    )
+                self.conn.commit()
+                if error is not None and not transient and attempts >= self.max_attempts and self.on_failure:
+                    self.on_failure(sheet)
+                if conflicts and self.on_conflict:
+                    self.on_conflict(sheet)
+
+    def stop(self):
+        with self.lock:
+            self._stopped = True
+            self.wakeup.notify_all()
+        self._thread.join(timeout=5)
+
+
+# --- Process-wide queue (one per queue file) ---
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_queue(path, writer, on_failure=None, on_conflict=None, transient=None):
+    with _queues_lock:
+        queue = _queues.get(path)
+        if queue is None:
+            queue = WriteBehindQueue(path, writer, transient=transient)
+            _queues[path] = queue
+        # Always write through the latest session's DataManager
+        queue.writer = writer
+        queue.on_failure = on_failure
+        queue.on_conflict = on_conflict
+        if transient is not None:
+            queue.transient = transient
+        return queue